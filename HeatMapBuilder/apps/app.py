@@ -1,18 +1,22 @@
+import time
+PROCESS_START_TIME = time.time()  # 시작 소요시간 측정 기준 (무거운 모듈을 가져오기 전)
+
 import threading
 import json
-import time
 import os
 import asyncio
 import glob
-import shutil
-from PIL import Image  # Pillow 라이브러리 추가
 
-from map_generator import MapGenerator
+from lazy_generator import LazyMapGenerator
 from config_manager import ConfigManager
 from sensor_manager import SensorManager
 from custom_logger import CustomLogger
 from webserver import WebServer
 
+CHECK_INTERVAL = 60  # 백그라운드 작업 검사 간격 (초)
+# 생성 주기 + 이 시간이 지나도록 생성되지 않은 맵을 지연(overdue)으로 집계 (검사 간격과 생성 시간 여유)
+OVERDUE_GRACE = 2 * CHECK_INTERVAL
+
 class BackgroundTaskManager:
     def __init__(self, logger, config_manager, sensor_manager, map_generator):
         self.config_manager = config_manager
@@ -25,9 +29,14 @@ class BackgroundTaskManager:
         self.map_timers = {}
         self._main_loop = None
         self._task = None
+        self.metrics = map_generator.metrics
+        self.started_at = None
+        self.iterations = 0
+        self.last_iteration = None  # 마지막 루프 실행 정보 (시작 시각, 실행 시간, 생성 대상 맵 수)
 
     def start(self):
         self.running = True
+        self.started_at = time.time()
         self._main_loop = asyncio.get_event_loop()
         self.logger.debug(f"백그라운드 작업 이벤트 루프 ID: {id(self._main_loop)}")
         self.thread = threading.Thread(target=self.run)
@@ -40,117 +49,6 @@ class BackgroundTaskManager:
         if self.thread is not None:
             self.thread.join()
 
-    def rotate_images(self, map_id, output_path):
-        """이미지 로테이션 처리"""
-        try:
-            # 맵 설정에서 로테이션 수 가져오기
-            map_data = self.config_manager.db.load().get(map_id, {})
-            gen_config = map_data.get('gen_config', {})
-            rotation_count = gen_config.get('rotation_count', 20)  # 기본값 20
-            gif_enabled = gen_config.get('gif_enabled', False)  # GIF 생성 활성화 여부
-            gif_frame_duration = gen_config.get('gif_frame_duration', 1000)  # GIF 프레임 간격 (ms)
-
-            # 기존 이미지 파일 경로
-            base_path = os.path.splitext(output_path)[0]
-            ext = os.path.splitext(output_path)[1]
-            
-            # 현재 이미지가 존재하면 먼저 복사본 생성
-            if os.path.exists(output_path):
-                try:
-                    current_copy = f"{base_path}_current{ext}"
-                    shutil.copy2(output_path, current_copy)
-                except Exception as e:
-                    self.logger.warning(f"이미지 로테이션 중 에러, 현재 이미지 복사 실패: {str(e)}")
-            
-            # 현재 존재하는 파일들의 목록을 미리 확보
-            existing_files = []
-            for i in range(1, rotation_count):
-                file_path = f"{base_path}-{i}{ext}"
-                if os.path.exists(file_path):
-                    existing_files.append((file_path, i))
-            
-            # 가장 오래된 백업 파일 삭제
-            old_file = f"{base_path}-{rotation_count-1}{ext}"
-            try:
-                if os.path.exists(old_file):
-                    os.remove(old_file)
-            except Exception as e:
-                self.logger.warning(f"이미지 로테이션 중 에러, 오래된 파일 삭제 실패: {str(e)}")
-
-            # 기존 백업 파일들의 번호를 하나씩 증가
-            for old_path, index in reversed(existing_files):
-                try:
-                    new_name = f"{base_path}-{index+1}{ext}"
-                    if os.path.exists(old_path):  # 한번 더 확인
-                        shutil.move(old_path, new_name)
-                except Exception as e:
-                    self.logger.warning(f"이미지 로테이션 중 에러, 파일 이동 실패 ({old_path} -> {new_name}): {str(e)}")
-
-            # 현재 이미지를 첫 번째 로테이션 파일로 이동
-            current_copy = f"{base_path}_current{ext}"
-            if os.path.exists(current_copy):
-                try:
-                    first_rotation = f"{base_path}-1{ext}"
-                    shutil.move(current_copy, first_rotation)
-                except Exception as e:
-                    self.logger.warning(f"이미지 로테이션 중 에러, 현재 이미지 이동 실패: {str(e)}")
-
-            # GIF 생성 (활성화된 경우에만)
-            if gif_enabled:
-                try:
-                    images = []
-                    opened_images = []  # 리소스 정리를 위한 리스트
-                    
-                    try:
-                        # 가장 오래된 이미지부터 최신 순으로 GIF에 추가
-                        for i in range(rotation_count-1, 0, -1):
-                            img_path = f"{base_path}-{i}{ext}"
-                            if os.path.exists(img_path):
-                                try:
-                                    img = Image.open(img_path)
-                                    images.append(img)
-                                    opened_images.append(img)
-                                except Exception as e:
-                                    self.logger.warning(f"이미지 열기 실패 ({img_path}): {str(e)}")
-                        
-                        # 마지막으로 현재 이미지 추가
-                        if os.path.exists(output_path):
-                            try:
-                                img = Image.open(output_path)
-                                images.append(img)
-                                opened_images.append(img)
-                            except Exception as e:
-                                self.logger.warning(f"현재 이미지 열기 실패: {str(e)}")
-
-                        if images:
-                            # GIF 파일 경로
-                            gif_path = f"{base_path}_animation.gif"
-                            # 이미지들을 저장 (이미 오래된 순서부터 정렬되어 있음)
-                            try:
-                                images[0].save(
-                                    gif_path,
-                                    save_all=True,
-                                    append_images=images[1:],
-                                    duration=gif_frame_duration,  # 설정된 프레임 간격 사용
-                                    loop=0  # 무한 반복
-                                )
-                                self.logger.debug(f"GIF 애니메이션 생성 완료: {gif_path}")
-                            except Exception as e:
-                                self.logger.error(f"GIF 저장 실패: {str(e)}")
-                    finally:
-                        # 열린 이미지 리소스 정리
-                        for img in opened_images:
-                            try:
-                                img.close()
-                            except Exception:
-                                pass
-                                
-                except Exception as e:
-                    self.logger.error(f"GIF 생성 중 오류 발생: {str(e)}")
-
-        except Exception as e:
-            self.logger.error(f"이미지 로테이션 처리 중 오류 발생: {str(e)}")
-
     async def generate_map(self, map_id):
         """열지도 생성 로직"""
         if self.map_lock.acquire(blocking=False):  # 락 획득 시도
@@ -160,12 +58,12 @@ class BackgroundTaskManager:
                 # 웹소켓 클라이언트 상태 로깅
                 websocket_client = self.sensor_manager.websocket_client
                 _output_path = self.config_manager.get_output_path(map_id)
-                # 기존 이미지가 있다면 로테이션 수행
-                if os.path.exists(_output_path):
-                    self.rotate_images(map_id, _output_path)
                 
-                # 맵 생성 실행
-                result = await self.map_generator.generate(map_id, _output_path)
+                # 맵 생성 실행 (이미지가 바뀐 경우에만 이전 이미지 로테이션 및 GIF 생성)
+                result = await self.map_generator.generate(map_id, _output_path, rotate=True)
+                if result.get('busy'):  # 웹서버 요청 등에서 같은 맵을 생성 중
+                    self.logger.debug(f"다른 프로세스가 맵을 생성 중입니다. 이번 생성은 건너뜁니다: {map_id}")
+                    return False
                 if not result['success']:
                     raise Exception(result['error'])
                 return result['success']
@@ -181,6 +79,93 @@ class BackgroundTaskManager:
             self.logger.debug("다른 프로세스가 열지도를 생성 중입니다. 이번 생성은 건너뜁니다.")
             return False
 
+    async def generate_maps(self, map_ids):
+        """여러 맵을 하나의 센서 상태 스냅샷으로 병렬 생성하고 맵별 결과를 반환합니다."""
+        if self.map_lock.acquire(blocking=False):  # 락 획득 시도
+            try:
+                self.logger.info(f"배치 맵 생성 시작: {len(map_ids)}개 맵")
+                
+                jobs = [(map_id, self.config_manager.get_output_path(map_id)) for map_id in map_ids]
+                
+                # 배치 생성 실행 (이미지가 바뀐 맵만 이전 이미지 로테이션 및 GIF 생성)
+                return await self.map_generator.generate_batch(jobs, rotate=True)
+            except Exception as e:
+                self.logger.error(f"배치 열지도 생성 실패: {str(e)}")
+                import traceback
+                self.logger.error(traceback.format_exc())
+                raise e
+            finally:
+                self.map_lock.release()  # 락 해제
+                self.logger.trace("배치 맵 생성 락 해제")
+        else:
+            self.logger.debug("다른 프로세스가 열지도를 생성 중입니다. 이번 생성은 건너뜁니다.")
+            return {}
+
+    def _map_schedule(self, maps, now):
+        """자동 생성 맵별 마지막 생성 후 경과 시간과 지연 여부를 반환합니다.
+
+        마지막 생성 시각은 이 프로세스에서 백그라운드 생성에 성공한 시각이며, 아직 생성하지 않은
+        맵은 백그라운드 작업 시작 시각을 기준으로 합니다. 벽 또는 센서가 없는 맵은 생성 대상이 아니므로 제외합니다.
+        """
+        schedule = []
+        for map_id, map_data in (maps or {}).items():
+            gen_config = map_data.get('gen_config', {})
+            if not gen_config.get('auto_generation', False):
+                continue
+            if not map_data.get('walls', '') or not map_data.get('sensors', []):
+                continue
+            interval = gen_config.get('gen_interval', 5) * 60
+            last_generated = self.map_timers.get(map_id)
+            age = now - (last_generated or self.started_at or now)
+            schedule.append({
+                'map_id': map_id,
+                'name': map_data.get('name', '이름 없음'),
+                'interval': interval,
+                'last_generated': last_generated,
+                'age': round(age, 1),
+                'overdue': age > interval + OVERDUE_GRACE
+            })
+        return schedule
+
+    def _finish_iteration(self, started, maps, due_count):
+        """루프 1회 실행 시간과 지연된 맵 수를 기록합니다."""
+        now = time.time()
+        duration = now - started
+        self.iterations += 1
+        self.last_iteration = {'started': started, 'duration': round(duration, 3), 'due_maps': due_count}
+        overdue = [entry for entry in self._map_schedule(maps, now) if entry['overdue']]
+        self.metrics.background_iteration_duration.observe(duration)
+        self.metrics.background_last_iteration.set(now)
+        self.metrics.maps_overdue.set(len(overdue))
+        if overdue:
+            self.logger.warning("생성 주기가 지난 맵 %d개: %s", len(overdue),
+                                self.logger._colorize([entry['name'] for entry in overdue], "yellow"))
+
+    def status(self):
+        """상태 API용 백그라운드 작업 상태 (루프 실행 정보와 맵별 생성 지연)"""
+        now = time.time()
+        try:
+            maps = self.config_manager.db.load()
+        except Exception as e:
+            self.logger.error(f"맵 목록 조회 실패: {str(e)}")
+            maps = {}
+        schedule = self._map_schedule(maps, now)
+        last_finished = None
+        if self.last_iteration:
+            last_finished = self.last_iteration['started'] + self.last_iteration['duration']
+        return {
+            'running': self.running,
+            'started_at': self.started_at,
+            'check_interval': CHECK_INTERVAL,
+            'iterations': self.iterations,
+            'last_iteration': self.last_iteration,
+            # 검사 간격보다 훨씬 오래 루프가 돌지 않았으면 루프가 멈췄거나 생성이 오래 걸리는 중
+            'since_last_iteration': round(now - last_finished, 1) if last_finished else None,
+            'generating': self.map_lock.locked(),
+            'maps_overdue': sum(1 for entry in schedule if entry['overdue']),
+            'maps': schedule
+        }
+
     async def _run_async(self):
         """비동기 백그라운드 작업 실행"""
         # 메서드 실행 시 즉시 로그 출력
@@ -220,11 +205,13 @@ class BackgroundTaskManager:
                 maps = self.config_manager.db.load()
                 if not maps:
                     self.logger.debug("등록된 맵이 없습니다. 다음 검사를 기다립니다.")
-                    await asyncio.sleep(60)
+                    self._finish_iteration(current_time, maps, 0)
+                    await asyncio.sleep(CHECK_INTERVAL)
                     continue
                     
                 map_count = len(maps)
                 auto_gen_maps = []
+                due_maps = []  # 이번 주기에 생성할 맵 (map_id, map_name)
                 
                 for map_id, map_data in maps.items():
                     if not self.running:  # 실행 중지 확인
@@ -270,27 +257,7 @@ class BackgroundTaskManager:
                                             int(time_diff),
                                             gen_interval)
 
-                            self.logger.debug("백그라운드 맵 생성 시작 %s (%s)",
-                                            self.logger._colorize(map_name, "blue"), map_id)
-                                                            
-                            try:
-                                # 맵 생성 실행
-                                if await self.generate_map(map_id):
-                                    self.logger.info("백그라운드 맵 생성 완료 %s (%s) (소요시간: %s)",
-                                                    self.logger._colorize(map_name, "blue"),
-                                                    map_id,
-                                                    self.logger._colorize(self.config_manager.db.get_map(map_id).get('last_generation', {}).get('duration', ''), "green"))
-                                    # 현재 시간으로 타이머 업데이트
-                                    self.map_timers[map_id] = current_time
-                                else:
-                                    self.logger.error("백그라운드 맵 생성 실패 %s (%s)",
-                                                    self.logger._colorize(map_name, "blue"),
-                                                    map_id)
-                            except Exception as e:
-                                self.logger.error("맵 생성 중 오류 발생: %s",
-                                                self.logger._colorize(str(e), "red"))
-                                import traceback
-                                self.logger.error(traceback.format_exc())
+                            due_maps.append((map_id, map_name))
                         else:
                             # 다음 생성까지 남은 시간 계산
                             if auto_generation and check_counter % 5 == 0:  # 로그 과다 방지를 위해 5회 주기로만 출력
@@ -306,15 +273,69 @@ class BackgroundTaskManager:
                         self.logger.error(traceback.format_exc())
                         continue
 
+                if len(due_maps) == 1:
+                    map_id, map_name = due_maps[0]
+                    self.logger.debug("백그라운드 맵 생성 시작 %s (%s)",
+                                    self.logger._colorize(map_name, "blue"), map_id)
+                                                    
+                    try:
+                        # 맵 생성 실행
+                        if await self.generate_map(map_id):
+                            self.logger.info("백그라운드 맵 생성 완료 %s (%s) (소요시간: %s)",
+                                            self.logger._colorize(map_name, "blue"),
+                                            map_id,
+                                            self.logger._colorize(self.config_manager.db.get_map(map_id).get('last_generation', {}).get('duration', ''), "green"))
+                            # 현재 시간으로 타이머 업데이트
+                            self.map_timers[map_id] = current_time
+                        else:
+                            self.logger.error("백그라운드 맵 생성 실패 %s (%s)",
+                                            self.logger._colorize(map_name, "blue"),
+                                            map_id)
+                    except Exception as e:
+                        self.logger.error("맵 생성 중 오류 발생: %s",
+                                        self.logger._colorize(str(e), "red"))
+                        import traceback
+                        self.logger.error(traceback.format_exc())
+                elif len(due_maps) > 1:
+                    # 여러 맵이 동시에 생성 주기에 도달한 경우 상태 스냅샷을 공유하여 병렬 생성
+                    self.logger.debug("백그라운드 배치 맵 생성 시작: %s",
+                                    self.logger._colorize([name for _, name in due_maps], "blue"))
+                    try:
+                        results = await self.generate_maps([map_id for map_id, _ in due_maps])
+                        for map_id, map_name in due_maps:
+                            result = results.get(map_id)
+                            if result and result.get('success'):
+                                self.logger.info("백그라운드 맵 생성 완료 %s (%s) (소요시간: %s)",
+                                                self.logger._colorize(map_name, "blue"),
+                                                map_id,
+                                                self.logger._colorize(result.get('duration', ''), "green"))
+                                # 현재 시간으로 타이머 업데이트
+                                self.map_timers[map_id] = current_time
+                            elif result and result.get('busy'):
+                                self.logger.debug("맵 %s (%s): 다른 프로세스가 생성 중, 다음 주기에 다시 시도",
+                                                  self.logger._colorize(map_name, "blue"), map_id)
+                            elif result:
+                                self.logger.error("백그라운드 맵 생성 실패 %s (%s): %s",
+                                                self.logger._colorize(map_name, "blue"),
+                                                map_id,
+                                                self.logger._colorize(result.get('error', ''), "red"))
+                    except Exception as e:
+                        self.logger.error("배치 맵 생성 중 오류 발생: %s",
+                                        self.logger._colorize(str(e), "red"))
+                        import traceback
+                        self.logger.error(traceback.format_exc())
+
+                self._finish_iteration(current_time, maps, len(due_maps))
+
                 # 다음 실행 전 대기
-                await asyncio.sleep(60)  # 10초 대기
+                await asyncio.sleep(CHECK_INTERVAL)
                 
                 
             except Exception as e:
                 self.logger.error(f"백그라운드 작업 중 오류 발생: {str(e)}")
                 import traceback
                 self.logger.error(traceback.format_exc())
-                await asyncio.sleep(60)
+                await asyncio.sleep(CHECK_INTERVAL)
 
     def run(self):
         """백그라운드 작업 실행"""
@@ -413,6 +434,10 @@ if __name__ == '__main__':
     logger = CustomLogger(log_file=config_manager.paths['log'], log_level=str(log_level))
     logger.info("애플리케이션 시작 (로그 레벨: " + log_level + ")")
 
+    # matplotlib 폰트 목록 캐시를 /data에 두어 컨테이너 재시작 시 폰트를 다시 검색하지 않도록 함
+    os.makedirs(config_manager.paths['mplconfig'], exist_ok=True)
+    os.environ.setdefault('MPLCONFIGDIR', config_manager.paths['mplconfig'])
+
     supervisor_token = os.environ.get('SUPERVISOR_TOKEN')
     try:
         # 메인 스레드에서 이벤트 루프 생성 및 설정
@@ -440,12 +465,11 @@ if __name__ == '__main__':
         sensor_manager = SensorManager(is_local, config_manager, logger, supervisor_token)
         logger.trace("SensorManager 및 웹소켓 클라이언트 초기화 완료")
         
-        logger.trace("MapGenerator 초기화 시작")
-        map_generator = MapGenerator(config_manager, sensor_manager, logger)
-        logger.trace("MapGenerator 초기화 완료")
+        # matplotlib/scipy 등은 웹서버가 열린 뒤 백그라운드에서 불러옴 (LazyMapGenerator.prewarm)
+        map_generator = LazyMapGenerator(config_manager, sensor_manager, logger)
         
         logger.trace("WebServer 초기화 시작")
-        server = WebServer(config_manager,sensor_manager,map_generator,logger)
+        server = WebServer(config_manager,sensor_manager,map_generator,logger,started_at=PROCESS_START_TIME)
         logger.trace("WebServer 초기화 완료")
         
         # BackgroundTaskManager는 모든 초기화가 끝난 후 시작
@@ -0,0 +1,71 @@
+import io
+import hashlib
+from functools import lru_cache
+from typing import Dict, Any
+
+import numpy as np  # type: ignore
+import matplotlib  # type: ignore
+from PIL import Image  # type: ignore
+
+# 단일 미리보기 이미지 크기 (프론트엔드에서 background-size: cover로 늘려서 사용)
+PREVIEW_WIDTH = 512
+PREVIEW_HEIGHT = 32
+
+# 스프라이트 시트의 컬러맵 한 줄 크기
+SPRITE_WIDTH = 256
+SPRITE_ROW_HEIGHT = 16
+
+
+def get_colormap(name: str):
+    """이름에 해당하는 컬러맵을 반환합니다. 없는 이름이면 ValueError를 발생시킵니다."""
+    try:
+        return matplotlib.colormaps[name]
+    except KeyError:
+        raise ValueError(f"잘못된 컬러맵 이름입니다: {name}")
+
+
+def colormap_strip(cmap, width: int, height: int) -> np.ndarray:
+    """컬러맵 LUT에서 직접 (height, width, 4) uint8 RGBA 그라데이션을 만듭니다."""
+    row = cmap(np.linspace(0, 1, width), bytes=True)
+    return np.ascontiguousarray(np.broadcast_to(row, (height, width, 4)))
+
+
+def _encode_png(pixels: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(pixels, 'RGBA').save(buf, format='PNG', optimize=True)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=128)
+def render_preview_png(name: str, width: int = PREVIEW_WIDTH, height: int = PREVIEW_HEIGHT) -> bytes:
+    """컬러맵 미리보기 PNG를 반환합니다. 인코딩 결과는 이름별로 LRU 캐시됩니다."""
+    return _encode_png(colormap_strip(get_colormap(name), width, height))
+
+
+@lru_cache(maxsize=1)
+def build_sprite_sheet() -> Dict[str, Any]:
+    """사용 가능한 모든 컬러맵을 한 줄씩 쌓은 스프라이트 시트를 생성합니다.
+
+    Returns:
+        Dict[str, Any]: {
+            'png': bytes,         # 스프라이트 PNG
+            'etag': str,          # PNG 내용 해시
+            'names': list,        # 줄 순서대로의 컬러맵 이름
+            'width': int,         # 한 줄의 너비 (px)
+            'row_height': int     # 한 줄의 높이 (px)
+        }
+    """
+    names = sorted(matplotlib.colormaps, key=str.lower)
+    pixels = np.empty((len(names) * SPRITE_ROW_HEIGHT, SPRITE_WIDTH, 4), dtype=np.uint8)
+    for i, name in enumerate(names):
+        pixels[i * SPRITE_ROW_HEIGHT:(i + 1) * SPRITE_ROW_HEIGHT] = colormap_strip(
+            matplotlib.colormaps[name], SPRITE_WIDTH, SPRITE_ROW_HEIGHT)
+
+    png = _encode_png(pixels)
+    return {
+        'png': png,
+        'etag': hashlib.blake2b(png, digest_size=16).hexdigest(),
+        'names': names,
+        'width': SPRITE_WIDTH,
+        'row_height': SPRITE_ROW_HEIGHT
+    }
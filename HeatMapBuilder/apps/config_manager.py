@@ -1,8 +1,13 @@
 import os
+import re
 import json
-from typing import Dict, Tuple
+import hashlib
+from typing import Dict, Optional, Tuple
+from filelock import FileLock #type: ignore
 from jsonDB import JsonDB
-import time
+
+# 목록/갤러리용 축소 이미지 기본 크기 (긴 변 픽셀 수)
+DEFAULT_DERIVED_SIZES = {'thumb': 200, 'medium': 500}
 
 class ConfigManager:
     """설정 관리를 담당하는 클래스"""
@@ -12,6 +17,7 @@ class ConfigManager:
         self.CONFIG = CONFIG #아직 안쓰임임
         self.paths = self._init_paths()
         self.db = JsonDB(self.paths['maps'])
+        self._content_hashes: Dict[str, Tuple[int, int, str]] = {}  # 경로별 (mtime_ns, size, hash) 캐시
         
     def _init_paths(self) -> Dict[str, str]:
         """경로 초기화"""
@@ -25,6 +31,10 @@ class ConfigManager:
             'maps': os.path.join(base_path, 'maps.json'),  # 맵 데이터베이스 파일
             'log': os.path.join(base_path, 'thermomap.log'),
             'config': os.path.join(base_path, 'options.json'),
+            'history': os.path.join(base_path, 'history'),  # 맵별 격자 기록 (grid_history)
+            'geodesic': os.path.join(base_path, 'geodesic'),  # 맵별 센서 측지 거리장 캐시
+            'mplconfig': os.path.join(base_path, 'matplotlib'),  # matplotlib 설정/폰트 목록 캐시
+            'locks': os.path.join(base_path, 'locks'),  # 맵별 생성 락 파일
             'media': media_path
         }
 
@@ -46,15 +56,60 @@ class ConfigManager:
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
 
+    @staticmethod
+    def _output_format(gen_config: Dict) -> str:
+        """설정된 출력 포맷 (AVIF를 인코딩할 수 없는 Pillow이면 WebP)"""
+        format = str(gen_config.get('format', 'png')).lower()
+        if format == 'avif':
+            from image_output import avif_supported  # Pillow는 포맷을 확인할 때 불러옴
+            if not avif_supported():
+                return 'webp'
+        return format
+
     def get_output_filename(self, map_id: str) -> str:
         """맵의 출력 파일 이름을 반환"""
         gen_config = self.db.get_map(map_id).get('gen_config', {})
-        return f"{gen_config.get('file_name', 'map')}.{gen_config.get('format', 'png')}"
+        return f"{gen_config.get('file_name', 'map')}.{self._output_format(gen_config)}"
+
+    def get_layer_output_filename(self, map_id: str, layer_id: str) -> str:
+        """맵 추가 레이어의 출력 파일 이름을 반환"""
+        gen_config = self.db.get_map(map_id).get('gen_config', {})
+        return f"{gen_config.get('file_name', 'map')}_{layer_id}.{self._output_format(gen_config)}"
+
+    def get_derived_sizes(self, map_id: str) -> Dict[str, int]:
+        """맵의 축소 이미지 크기 설정({크기 이름: 긴 변의 픽셀 수})을 반환"""
+        gen_config = self.db.get_map(map_id).get('gen_config', {})
+        sizes = gen_config.get('derived_sizes', DEFAULT_DERIVED_SIZES)
+        return {str(name): int(px) for name, px in (sizes or {}).items()
+                if re.fullmatch(r'[A-Za-z0-9_-]+', str(name)) and int(px) > 0}
+
+    def get_derived_filename(self, map_id: str, size_name: str, index: Optional[int] = None) -> str:
+        """축소 이미지 파일 이름을 반환 (index가 있으면 로테이션된 이전 이미지)"""
+        gen_config = self.db.get_map(map_id).get('gen_config', {})
+        suffix = f"-{index}" if index is not None else ''
+        return f"{gen_config.get('file_name', 'map')}.{size_name}{suffix}.{self._output_format(gen_config)}"
+
+    def get_derived_urls(self, map_id: str, index: Optional[int] = None) -> Dict[str, str]:
+        """존재하는 축소 이미지의 내용 기반 URL을 {크기 이름: URL}로 반환"""
+        urls = {}
+        for size_name in self.get_derived_sizes(map_id):
+            filename = self.get_derived_filename(map_id, size_name, index)
+            if os.path.exists(os.path.join(self.paths['media'], map_id, filename)):
+                urls[size_name] = self.get_versioned_url(map_id, filename)
+        return urls
+
+    def get_history_path(self, map_id: str) -> str:
+        """맵의 격자 기록 파일 경로를 반환"""
+        return os.path.join(self.paths['history'], f"{map_id}.hmh")
+
+    def get_geodesic_dir(self, map_id: str) -> str:
+        """맵의 측지 거리장 캐시 디렉토리 경로를 반환"""
+        return os.path.join(self.paths['geodesic'], map_id)
 
     def get_output_format(self, map_id: str) -> str:
         """맵의 출력 파일 포맷을 반환"""
         gen_config = self.db.get_map(map_id).get('gen_config', {})
-        return gen_config.get('format', 'png')
+        return self._output_format(gen_config)
 
     def get_output_path(self, map_id: str) -> str:
         """맵의 출력 파일 전체 경로를 반환"""
@@ -64,12 +119,58 @@ class ConfigManager:
     def get_output_info(self, map_id: str) -> Tuple[str, str, str]:
         """맵의 출력 파일 정보(파일명, 포맷, 경로)를 한번에 반환"""
         gen_config = self.db.get_map(map_id).get('gen_config', {})
-        format = gen_config.get('format', 'png')
+        format = self._output_format(gen_config)
         filename = f"{gen_config.get('file_name', 'map')}.{format}"
         os.makedirs(os.path.join(self.paths['media'], map_id), exist_ok=True)
         path = os.path.join(self.paths['media'], map_id, filename)
         return filename, format, path
 
+    def get_generation_lock(self, map_id: str) -> FileLock:
+        """맵 생성 락을 반환 (웹서버, 백그라운드 작업, 배치 생성 워커 프로세스가 같은 파일을 공유)"""
+        return FileLock(os.path.join(self.paths['locks'], f"{map_id}.lock"))
+
+    def get_content_hash(self, path: str) -> str:
+        """파일 내용의 해시를 반환합니다.
+
+        수정 시각과 크기가 같으면 캐시된 값을 사용하므로 반복 호출 비용이 작습니다.
+        ETag와 내용 기반 URL에 사용됩니다.
+        """
+        stat = os.stat(path)
+        cached = self._cached_content_hash(path, stat)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        self._content_hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        return content_hash
+
+    def get_cached_content_hash(self, path: str) -> Optional[str]:
+        """파일을 읽지 않고 캐시된 내용 해시만 반환합니다. (캐시가 없거나 파일이 바뀌었으면 None)"""
+        return self._cached_content_hash(path, os.stat(path))
+
+    def _cached_content_hash(self, path: str, stat: os.stat_result) -> Optional[str]:
+        cached = self._content_hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        return None
+
+    def get_versioned_url(self, map_id: str, filename: str) -> str:
+        """맵 미디어 파일의 내용 기반 URL을 반환합니다.
+
+        쿼리 문자열이 파일 내용 해시이므로 내용이 바뀔 때만 URL이 바뀝니다.
+        파일이 아직 없으면 쿼리 없는 URL을 반환합니다.
+        """
+        url = f"/local/HeatMapBuilder/{map_id}/{filename}"
+        path = os.path.join(self.paths['media'], map_id, filename)
+        try:
+            return f"{url}?{self.get_content_hash(path)}"
+        except OSError:
+            return url
+
     def get_image_url(self, map_id: str) -> str:
         """맵의 이미지 URL을 반환합니다.
         
@@ -82,25 +183,18 @@ class ConfigManager:
         map_data = self.db.get_map(map_id)
         img_url = map_data.get('img_url', '')
         if not img_url:
-            timestamp = map_data.get('last_generation', {}).get('timestamp', int(time.time()))
-            output_filename = self.get_output_filename(map_id)
-            img_url = f"/local/HeatMapBuilder/{map_id}/{output_filename}?{timestamp}"
+            img_url = self.get_versioned_url(map_id, self.get_output_filename(map_id))
             self.db.update_map(map_id, {'img_url': img_url})
         return img_url
     
     def get_gif_url(self, map_id: str) -> str:
-        map_data = self.db.get_map(map_id)
-        gif_url = map_data.get('gif_url', '')
-        if not gif_url:
-            timestamp = map_data.get('last_generation', {}).get('timestamp', int(time.time()))
-            output_filename = self.get_output_filename(map_id)
-            gif_filename = f"{output_filename.replace('.png', '')}_animation.gif"
-            gif_url = f"/local/HeatMapBuilder/{map_id}/{gif_filename}?{timestamp}"
-            self.db.update_map(map_id, {'gif_url': gif_url})
-        return gif_url
+        """맵의 GIF 애니메이션 URL을 반환합니다. (내용 해시 포함)"""
+        output_filename = self.get_output_filename(map_id)
+        gif_filename = f"{os.path.splitext(output_filename)[0]}_animation.gif"
+        return self.get_versioned_url(map_id, gif_filename)
     
     def get_previous_image_url(self, map_id: str, index: int) -> str:
-        """이전 생성 이미지의 URL을 생성합니다. cache_buster 추가
+        """이전 생성 이미지의 URL을 생성합니다. (내용 해시 포함)
         
         Args:
             map_id: 맵 ID
@@ -112,7 +206,6 @@ class ConfigManager:
         map_data = self.db.get_map(map_id)
         gen_config = map_data.get('gen_config', {})
         filename = gen_config.get('file_name', 'map')
-        file_format = gen_config.get('format', 'png')
-        cache_buster = int(time.time())
+        file_format = self._output_format(gen_config)
             
-        return f"/local/HeatMapBuilder/{map_id}/{filename}-{index}.{file_format}?{cache_buster}"
+        return self.get_versioned_url(map_id, f"{filename}-{index}.{file_format}")
@@ -0,0 +1,183 @@
+"""벽을 돌아 문으로 이어지는 센서별 격자 거리(측지 거리) 계산과 캐시
+
+area 보간은 area마다 직선(유클리드) 거리만 쓰므로 센서가 없는 방은 값이 없습니다.
+여기서는 보간 격자에서 실내 area 안쪽이면서 벽(line) 근처가 아닌 칸만 지나갈 수 있다고 보고,
+센서마다 8방향 격자 그래프 최단 거리(Dijkstra)를 미리 계산해 둡니다. 벽 선이 그려지지 않은
+area 경계(문, 열린 공간)로만 이어지므로 벽 너머의 센서는 멀어지고, 닫힌 방은 닿지 않습니다(inf).
+
+거리장은 벽 데이터, 센서 위치, 격자가 같으면 다시 계산하지 않도록 키(field_key)별로
+메모리와 파일(npz)에 보관합니다.
+"""
+import os
+import hashlib
+from io import StringIO
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import xml.etree.ElementTree as ET
+
+import numpy as np  # type: ignore
+from scipy.sparse import coo_matrix  # type: ignore
+from scipy.sparse.csgraph import dijkstra  # type: ignore
+from scipy.spatial import cKDTree  # type: ignore
+
+GEODESIC_KERNELS = ('gaussian', 'idw')
+WALL_BAND = 0.75  # 벽 선에서 이 거리(격자 간격 배수) 이내의 칸은 막힘 (대각선 이동으로 벽을 건너지 못하도록 > 1/√2)
+MAX_CACHED_FIELDS = 4  # 맵별로 파일에 보관할 거리장 수 (추가 레이어 센서 구성 포함)
+MAX_MEMORY_FIELDS = 16  # 메모리에 보관할 거리장 수 (모든 맵)
+
+
+def parse_wall_segments(walls_data: str) -> np.ndarray:
+    """벽 SVG의 line 요소를 (K, 5) 배열 [x1, y1, x2, y2, 선 두께]로 반환합니다."""
+    root = ET.parse(StringIO(f'<svg>{walls_data}</svg>')).getroot()
+    segments = []
+    for line in root.findall('.//{*}line'):
+        try:
+            segments.append([float(line.get(name, 0)) for name in ('x1', 'y1', 'x2', 'y2')]
+                            + [float(line.get('stroke-width', 0) or 0)])
+        except ValueError:
+            continue
+    return np.array(segments, dtype=float).reshape(-1, 5)
+
+
+def field_key(walls_data: str, sources: Dict[str, Tuple[float, float]], grid_shape: Sequence[int]) -> str:
+    """거리장 캐시 키 (벽 데이터, 센서 위치, 격자 크기의 해시)"""
+    digest = hashlib.sha1(walls_data.encode('utf-8'))
+    for sensor_id in sorted(sources):
+        x, y = sources[sensor_id]
+        digest.update(f"{sensor_id}:{x:.1f},{y:.1f};".encode('utf-8'))
+    digest.update(f"{tuple(grid_shape)}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def passable_mask(grid_x: np.ndarray, grid_y: np.ndarray, area_masks: Sequence[np.ndarray],
+                  walls: np.ndarray) -> np.ndarray:
+    """지나갈 수 있는 격자 칸 (실내 area 안쪽이면서 벽 선에서 떨어진 칸)"""
+    passable = np.zeros(grid_x.shape, dtype=bool)
+    for mask in area_masks:
+        passable |= mask
+    spacing = max(grid_x[1, 0] - grid_x[0, 0], grid_y[0, 1] - grid_y[0, 0])
+    points = np.column_stack((grid_x[passable], grid_y[passable]))
+    blocked = np.zeros(len(points), dtype=bool)
+    for x1, y1, x2, y2, width in walls:
+        start, direction = np.array([x1, y1]), np.array([x2 - x1, y2 - y1])
+        length_sq = float(direction @ direction)
+        t = np.clip((points - start) @ direction / length_sq, 0, 1) if length_sq > 0 else np.zeros(len(points))
+        distances = np.linalg.norm(points - (start + t[:, np.newaxis] * direction), axis=1)
+        blocked |= distances <= max(width / 2, WALL_BAND * spacing)
+    passable[passable] = ~blocked
+    return passable
+
+
+def distance_fields(grid_x: np.ndarray, grid_y: np.ndarray, passable: np.ndarray,
+                    sources: np.ndarray) -> np.ndarray:
+    """sources (S, 2) 각각에서 passable 칸을 따라 이동한 최단 거리 (S, H, W) float32 (닿지 않으면 inf)
+
+    센서는 가장 가까운 지나갈 수 있는 칸에서 출발하며, 대각선 이동은 양옆 칸이 모두 열려 있을
+    때만 허용합니다. (벽 모서리를 가로지르지 않음)
+    """
+    shape = grid_x.shape
+    fields = np.full((len(sources), passable.size), np.inf, dtype=np.float32)
+    cells = np.flatnonzero(passable)
+    if len(sources) == 0 or len(cells) == 0:
+        return fields.reshape((len(sources),) + shape)
+
+    dx, dy = grid_x[1, 0] - grid_x[0, 0], grid_y[0, 1] - grid_y[0, 0]
+    node = np.full(passable.size, -1, dtype=np.int64)
+    node[cells] = np.arange(len(cells))
+    node = node.reshape(shape)
+
+    rows, cols, weights = [], [], []
+    height, width = shape
+    for di, dj in ((1, 0), (0, 1), (1, 1), (1, -1)):
+        i0, i1 = 0, height - di
+        j0, j1 = max(0, -dj), width - max(0, dj)
+        a = passable[i0:i1, j0:j1]
+        b = passable[i0 + di:i1 + di, j0 + dj:j1 + dj]
+        edge = a & b
+        if di and dj:
+            # 대각선: 양옆(가로/세로) 칸도 열려 있어야 함
+            edge &= passable[i0 + di:i1 + di, j0:j1] & passable[i0:i1, j0 + dj:j1 + dj]
+        rows.append(node[i0:i1, j0:j1][edge])
+        cols.append(node[i0 + di:i1 + di, j0 + dj:j1 + dj][edge])
+        weights.append(np.full(int(edge.sum()), np.hypot(di * dx, dj * dy)))
+    graph = coo_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                       shape=(len(cells), len(cells))).tocsr()
+
+    cell_points = np.column_stack((grid_x.ravel()[cells], grid_y.ravel()[cells]))
+    offsets, start_nodes = cKDTree(cell_points).query(sources)
+    distances = dijkstra(graph, directed=False, indices=start_nodes)
+    fields[:, cells] = distances + offsets[:, np.newaxis]
+    return fields.reshape((len(sources),) + shape)
+
+
+def kernel_values(distances: np.ndarray, temps: np.ndarray, kernel: str, sigma: float,
+                  power: float = 2.0) -> np.ndarray:
+    """측지 거리 (S, M)로 센서값 (S,)을 가중 평균합니다. 어느 센서에서도 닿지 않는 점은 NaN
+
+    kernel: 'gaussian' (exp(-d²/2σ²)) 또는 'idw' (1/d^power, 센서 위치는 센서값)
+    """
+    distances = np.asarray(distances, dtype=float)
+    reachable = np.isfinite(distances)
+    if kernel == 'idw':
+        with np.errstate(divide='ignore'):
+            weights = np.where(reachable, 1.0 / np.maximum(distances, 1e-6) ** power, 0.0)
+    else:
+        weights = np.where(reachable, np.exp(-(np.where(reachable, distances, 0) ** 2) / (2 * sigma ** 2)), 0.0)
+    weight_sum = weights.sum(axis=0)
+    values = (weights * np.asarray(temps, dtype=float)[:, np.newaxis]).sum(axis=0) / np.where(weight_sum > 0, weight_sum, 1)
+    # 가우시안 가중치가 언더플로한 먼 점은 가장 가까운 센서값 사용
+    nearest = np.where(reachable, distances, np.inf).argmin(axis=0)
+    any_reachable = reachable.any(axis=0)
+    values = np.where(weight_sum > 0, values, np.asarray(temps, dtype=float)[nearest])
+    return np.where(any_reachable, values, np.nan)
+
+
+class GeodesicFieldCache:
+    """맵별 센서 거리장 캐시 (메모리 + 디렉토리의 npz 파일)
+
+    항목: {'sensor_ids': [...], 'fields': (S, H, W) float32}
+    """
+
+    def __init__(self, max_fields: int = MAX_CACHED_FIELDS, max_memory_fields: int = MAX_MEMORY_FIELDS):
+        self.max_fields = max_fields
+        self.max_memory_fields = max_memory_fields
+        self._memory: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+    def get(self, directory: str, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        path = os.path.join(directory, f"{key}.npz")
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                entry = {'sensor_ids': [str(s) for s in data['sensor_ids']], 'fields': data['fields']}
+        except (OSError, ValueError, KeyError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, directory: str, key: str, sensor_ids: List[str], fields: np.ndarray) -> Dict[str, Any]:
+        entry = {'sensor_ids': list(sensor_ids), 'fields': fields}
+        self._remember(key, entry)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{key}.tmp.npz")
+        np.savez(temp_path, sensor_ids=np.array(sensor_ids), fields=fields)
+        os.replace(temp_path, os.path.join(directory, f"{key}.npz"))
+        # 오래된 파일 정리 (최근 max_fields개만 유지)
+        files = sorted((entry.path for entry in os.scandir(directory) if entry.name.endswith('.npz')
+                        and not entry.name.startswith('.')), key=os.path.getmtime)
+        for path in files[:-self.max_fields]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return entry
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_fields:
+            self._memory.popitem(last=False)
@@ -0,0 +1,239 @@
+"""맵별 보간 격자 기록 저장소
+
+생성할 때마다 grid_z를 uint8로 양자화(grid_payload.quantize_uint8)하여 고정 크기
+링 버퍼 파일에 추가합니다. 파일은 메모리 맵으로 열어 필요한 슬롯만 읽고 쓰므로
+기록이 길어져도 추가/조회 비용이 일정합니다. (150x150 격자 기준 프레임당 약 23KB,
+기본 288 프레임 = 10분 간격 2일 ≈ 6.5MB)
+
+파일 구조 (little-endian):
+
+    offset  size   내용
+    0       64     헤더: 매직 b'HMHS', 포맷 버전, 예약, capacity, nx, ny, max_sensors,
+                   head(다음에 쓸 슬롯), count, bounds(4 x float32)
+    64      8192   센서 ID 목록 (u32 길이 + UTF-8 JSON 배열)
+    8256    ...    슬롯 capacity개
+
+슬롯: timestamp(u64, 생성 시작 시각 ns, 0 = 비어 있음), scale(f32), offset(f32),
+      sensors(f32 x max_sensors, 센서 ID 목록 순서, 값이 없으면 NaN),
+      grid(u8 x nx*ny, grid_z를 C 순서로 평탄화, 255 = 값 없음)
+
+슬롯을 쓸 때는 timestamp를 0으로 지운 뒤 데이터를 쓰고 마지막에 timestamp를 기록하므로,
+읽는 쪽은 복사 전후 timestamp가 같은지로 덮어쓰기 중인 슬롯을 걸러냅니다.
+파일 생성과 추가(헤더의 head/count 갱신)는 '<기록 파일>.lock' 파일 락으로 보호하므로
+배치 생성 워커처럼 다른 프로세스에서 같은 기록에 써도 안전합니다.
+"""
+import os
+import json
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+from filelock import FileLock  # type: ignore
+
+from grid_payload import quantize_uint8, dequantize_uint8
+
+HISTORY_MAGIC = b'HMHS'
+HISTORY_FORMAT_VERSION = 1
+DEFAULT_CAPACITY = 288
+DEFAULT_MAX_SENSORS = 64  # 슬롯당 센서값 수 최솟값 (센서가 더 많으면 sensor_capacity로 늘림)
+
+_HEADER = struct.Struct('<4sBBHIIIIII4f')
+_HEADER_SIZE = 64
+_SENSOR_TABLE_SIZE = 8192
+_DATA_OFFSET = _HEADER_SIZE + _SENSOR_TABLE_SIZE
+
+
+
+def sensor_capacity(sensor_count: int) -> int:
+    """센서 sensor_count개를 담을 슬롯당 센서값 수 (DEFAULT_MAX_SENSORS 이상의 2의 거듭제곱)"""
+    return max(DEFAULT_MAX_SENSORS, 1 << max(0, sensor_count - 1).bit_length())
+
+
+def _record_dtype(nx: int, ny: int, max_sensors: int) -> np.dtype:
+    return np.dtype([
+        ('timestamp', '<u8'),
+        ('scale', '<f4'),
+        ('offset', '<f4'),
+        ('sensors', '<f4', (max_sensors,)),
+        ('grid', 'u1', (nx * ny,))
+    ])
+
+
+class GridHistory:
+    """메모리 맵 링 버퍼로 저장된 맵 하나의 격자 기록
+
+    GridHistory.open()으로 기존 파일을 열거나 GridHistory.open_or_create()로
+    (필요하면 새로) 만들어 사용하고, 사용 후 close() 합니다. (with 문 지원)
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r+' if writable else 'r')
+        magic, version, _, _, capacity, nx, ny, max_sensors, _, _, *bounds = _HEADER.unpack_from(self._mm, 0)
+        if magic != HISTORY_MAGIC or version != HISTORY_FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"격자 기록 파일 형식이 올바르지 않습니다: {path}")
+        self.capacity = capacity
+        self.shape = (nx, ny)
+        self.max_sensors = max_sensors
+        self.bounds = tuple(float(b) for b in bounds)
+        dtype = _record_dtype(nx, ny, max_sensors)
+        self._records = self._mm[_DATA_OFFSET:_DATA_OFFSET + capacity * dtype.itemsize].view(dtype)
+
+    @classmethod
+    def open(cls, path: str) -> 'GridHistory':
+        """기존 기록 파일을 읽기 전용으로 엽니다. (없으면 FileNotFoundError)"""
+        return cls(path)
+
+    @classmethod
+    def open_or_create(cls, path: str, capacity: int, shape: Tuple[int, int],
+                       bounds: Tuple[float, float, float, float],
+                       max_sensors: int = DEFAULT_MAX_SENSORS) -> 'GridHistory':
+        """기록 파일을 쓰기 가능하게 엽니다.
+
+        파일이 없거나 capacity/격자 크기/범위가 현재 설정과 다르거나 슬롯의 센서값 수가
+        max_sensors보다 적으면 새로 만듭니다. (기존 기록은 삭제됩니다)
+        """
+        with FileLock(f"{path}.lock"):
+            return cls._open_or_create(path, capacity, shape, bounds, max_sensors)
+
+    @classmethod
+    def _open_or_create(cls, path: str, capacity: int, shape: Tuple[int, int],
+                        bounds: Tuple[float, float, float, float], max_sensors: int) -> 'GridHistory':
+        if os.path.exists(path):
+            try:
+                history = cls(path, writable=True)
+                if (history.capacity == capacity and history.shape == tuple(shape)
+                        and history.max_sensors >= max_sensors
+                        and np.allclose(history.bounds, bounds)):
+                    return history
+                history.close()
+            except ValueError:
+                pass
+
+        nx, ny = shape
+        size = _DATA_OFFSET + capacity * _record_dtype(nx, ny, max_sensors).itemsize
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(HISTORY_MAGIC, HISTORY_FORMAT_VERSION, 0, 0, capacity, nx, ny,
+                                 max_sensors, 0, 0, *bounds))
+            f.truncate(size)  # 나머지는 0 (빈 슬롯, 빈 센서 목록)
+        os.replace(tmp_path, path)
+        return cls(path, writable=True)
+
+    def close(self):
+        """변경 내용을 디스크에 반영하고 메모리 맵 참조를 해제합니다."""
+        if getattr(self, '_mm', None) is not None:
+            if self.writable:
+                self._mm.flush()
+            self._records = None
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[9]
+
+    @property
+    def sensor_ids(self) -> List[str]:
+        length = struct.unpack_from('<I', self._mm, _HEADER_SIZE)[0]
+        if length == 0:
+            return []
+        return json.loads(bytes(self._mm[_HEADER_SIZE + 4:_HEADER_SIZE + 4 + length]).decode('utf-8'))
+
+    def _register_sensors(self, sensor_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """새 센서 ID를 목록에 추가합니다.
+
+        Returns:
+            (센서 ID 목록, max_sensors 또는 테이블 크기를 넘어 기록하지 못한 센서 ID 목록)
+        """
+        known = self.sensor_ids
+        dropped = []
+        added = False
+        for sensor_id in sensor_ids:
+            if sensor_id in known:
+                continue
+            encoded = json.dumps(known + [sensor_id]).encode('utf-8')
+            if len(known) >= self.max_sensors or len(encoded) > _SENSOR_TABLE_SIZE - 4:
+                dropped.append(sensor_id)
+                continue
+            known.append(sensor_id)
+            added = True
+        if added:
+            encoded = json.dumps(known).encode('utf-8')
+            self._mm[_HEADER_SIZE + 4:_HEADER_SIZE + 4 + len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+            struct.pack_into('<I', self._mm, _HEADER_SIZE, len(encoded))
+        return known, dropped
+
+    def append(self, timestamp: int, grid_z: np.ndarray, sensor_values: Dict[str, float]) -> List[str]:
+        """프레임을 추가합니다. 가득 차면 가장 오래된 프레임을 덮어씁니다.
+
+        Returns:
+            센서 목록이 가득 차 값을 기록하지 못한 센서 ID 목록 (격자는 기록됨)
+        """
+        if not self.writable:
+            raise PermissionError("읽기 전용으로 열린 격자 기록입니다")
+        if tuple(grid_z.shape) != self.shape:
+            raise ValueError(f"격자 크기가 기록과 다릅니다: {grid_z.shape} != {self.shape}")
+
+        values, scale, offset = quantize_uint8(grid_z)
+        with FileLock(f"{self.path}.lock"):
+            known, dropped = self._register_sensors(list(sensor_values))
+            sensors = np.full(self.max_sensors, np.nan, dtype=np.float32)
+            for i, sensor_id in enumerate(known):
+                if sensor_id in sensor_values:
+                    sensors[i] = sensor_values[sensor_id]
+
+            header = list(_HEADER.unpack_from(self._mm, 0))
+            head, count = header[8], header[9]
+            record = self._records[head]
+            record['timestamp'] = 0
+            record['scale'] = scale
+            record['offset'] = offset
+            record['sensors'] = sensors
+            record['grid'] = values.ravel()
+            record['timestamp'] = int(timestamp)
+
+            header[8] = (head + 1) % self.capacity
+            header[9] = min(count + 1, self.capacity)
+            _HEADER.pack_into(self._mm, 0, *header)
+        return dropped
+
+    def timestamps(self) -> List[int]:
+        """저장된 프레임의 timestamp 목록 (오래된 순)"""
+        header = _HEADER.unpack_from(self._mm, 0)
+        head, count = header[8], header[9]
+        slots = [(head - count + i) % self.capacity for i in range(count)]
+        stamps = self._records['timestamp'][slots] if slots else []
+        return [int(ts) for ts in stamps if ts]
+
+    def read(self, timestamp: int) -> Optional[Dict[str, Any]]:
+        """timestamp의 프레임을 복원합니다. 없거나 덮어쓰는 중이면 None
+
+        Returns:
+            {'version', 'time', 'bounds', 'grid_z'(float64, 값 없음 = NaN), 'sensors'({센서 ID: 값})}
+        """
+        slots = np.flatnonzero(self._records['timestamp'] == np.uint64(timestamp))
+        if slots.size == 0:
+            return None
+        record = self._records[int(slots[0])].copy()
+        if int(self._records[int(slots[0])]['timestamp']) != int(timestamp):
+            return None
+
+        grid_z = dequantize_uint8(record['grid'].reshape(self.shape), float(record['scale']), float(record['offset']))
+        sensors = {sensor_id: float(value)
+                   for sensor_id, value in zip(self.sensor_ids, record['sensors'])
+                   if not np.isnan(value)}
+        return {
+            'version': int(timestamp),
+            'time': datetime.fromtimestamp(int(timestamp) / 1e9).strftime('%Y-%m-%d %H:%M:%S'),
+            'bounds': self.bounds,
+            'grid_z': grid_z,
+            'sensors': sensors
+        }
@@ -0,0 +1,111 @@
+"""보간 격자(grid_z) 바이너리 페이로드 인코딩
+
+클라이언트(브라우저, 커스텀 카드)가 서버 렌더링 없이 직접 그릴 수 있도록
+마지막으로 생성된 격자를 압축된 바이너리로 제공합니다.
+
+페이로드 구조 (little-endian):
+
+    offset  size  내용
+    0       4     매직 b'HMGD'
+    4       1     포맷 버전 (GRID_FORMAT_VERSION)
+    5       1     값 타입 (1: float16, 2: uint8 양자화)
+    6       2     예약 (0)
+    8       4     rows (y 방향 격자 수)
+    12      4     cols (x 방향 격자 수)
+    16      16    bounds: min_x, min_y, max_x, max_y (float32, SVG 좌표)
+    32      4     scale (float32)
+    36      4     offset (float32)
+    40      8     version (uint64, 생성 시작 시각 ns)
+    48      ...   값 rows*cols개 (행 우선, 행 = y, 열 = x)
+    ...     ...   마스크 ceil(rows*cols/8) 바이트 (np.packbits, 1 = 값 있음)
+
+값 복원: value = offset + raw * scale
+- float16: scale=1, offset=0 이며 값이 없는 칸은 NaN
+- uint8: 0~254를 [min, max]에 선형 매핑하고 값이 없는 칸은 255
+격자점은 bounds 양 끝을 포함하여 균등 간격으로 배치됩니다.
+"""
+import struct
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+GRID_MAGIC = b'HMGD'
+GRID_FORMAT_VERSION = 1
+GRID_DTYPES = {'float16': 1, 'uint8': 2}
+GRID_FIELDS = {'value': 'grid_z', 'stddev': 'grid_stddev'}  # 격자 항목 키 (stddev: 크리깅 표준편차)
+UINT8_NODATA = 255
+
+_HEADER = struct.Struct('<4sBBHII4fffQ')
+
+
+def grid_key(map_id: str, layer_id: Optional[str] = None) -> str:
+    """격자 캐시(grid_cache) 키를 반환합니다. (기본 레이어는 맵 ID, 추가 레이어는 '맵 ID/레이어 ID')"""
+    return map_id if not layer_id else f"{map_id}/{layer_id}"
+
+
+def drop_map_grids(grid_cache: Dict[str, Dict[str, Any]], map_id: str):
+    """격자 캐시에서 맵의 모든 레이어 격자를 제거합니다."""
+    for key in [key for key in grid_cache if key == map_id or key.startswith(f"{map_id}/")]:
+        del grid_cache[key]
+
+
+def quantize_uint8(grid: np.ndarray) -> Tuple[np.ndarray, float, float]:
+    """격자를 uint8로 양자화합니다. (0~254를 [min, max]에 선형 매핑, 값이 없는 칸은 255)
+
+    Returns:
+        (양자화된 배열, scale, offset): value = offset + raw * scale
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    mask = ~np.isnan(grid)
+    if mask.any():
+        vmin, vmax = float(grid[mask].min()), float(grid[mask].max())
+    else:
+        vmin, vmax = 0.0, 0.0
+    offset = vmin
+    scale = (vmax - vmin) / (UINT8_NODATA - 1) if vmax > vmin else 1.0
+    values = np.full(grid.shape, UINT8_NODATA, dtype=np.uint8)
+    values[mask] = np.clip(np.rint((grid[mask] - offset) / scale), 0, UINT8_NODATA - 1).astype(np.uint8)
+    return values, scale, offset
+
+
+def dequantize_uint8(values: np.ndarray, scale: float, offset: float) -> np.ndarray:
+    """quantize_uint8의 역변환 (값이 없는 칸은 NaN)"""
+    grid = offset + values.astype(np.float64) * scale
+    grid[values == UINT8_NODATA] = np.nan
+    return grid
+
+
+def encode_grid(entry: Dict[str, Any], dtype: str = 'float16', field: str = 'value') -> bytes:
+    """캐시된 격자 항목을 바이너리 페이로드로 인코딩합니다.
+
+    Args:
+        entry: MapGenerator.grid_cache의 항목 ('grid_z', 'bounds', 'version' 포함)
+        dtype: 'float16' 또는 'uint8'
+        field: 'value' (보간값) 또는 'stddev' (크리깅 표준편차, 크리깅하지 않은 칸은 값 없음)
+
+    Returns:
+        bytes: 페이로드
+    """
+    if dtype not in GRID_DTYPES:
+        raise ValueError(f"지원하지 않는 격자 값 타입입니다: {dtype}")
+    if field not in GRID_FIELDS:
+        raise ValueError(f"지원하지 않는 격자 필드입니다: {field}")
+
+    # 행 = y, 열 = x (이미지 순서)가 되도록 전치
+    source = entry.get(GRID_FIELDS[field])
+    if source is None:
+        source = np.full_like(entry['grid_z'], np.nan)
+    grid = np.asarray(source, dtype=np.float64).T
+    mask = ~np.isnan(grid)
+    rows, cols = grid.shape
+
+    if dtype == 'float16':
+        scale, offset = 1.0, 0.0
+        values = grid.astype('<f2')
+    else:
+        values, scale, offset = quantize_uint8(grid)
+
+    min_x, min_y, max_x, max_y = entry['bounds']
+    header = _HEADER.pack(GRID_MAGIC, GRID_FORMAT_VERSION, GRID_DTYPES[dtype], 0, rows, cols,
+                          min_x, min_y, max_x, max_y, scale, offset, int(entry['version']))
+    return header + values.tobytes() + np.packbits(mask, axis=None).tobytes()
@@ -0,0 +1,122 @@
+"""캐시된 보간 격자에 대한 지점/영역 값 조회
+
+MapGenerator.grid_cache 항목만 사용하며 새로운 맵 생성을 일으키지 않습니다.
+지점 조회는 가장 가까운 격자점을 인덱스 계산으로 찾으므로 O(1)이고,
+영역 집계는 생성 시 미리 계산해 둔 area별 격자 인덱스만 사용하므로
+O(area 내 격자 수)입니다.
+"""
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+
+def build_area_cells(area_index: np.ndarray, area_count: int) -> Dict[int, np.ndarray]:
+    """area 인덱스 격자로부터 area별 평탄화된 격자 인덱스를 만듭니다."""
+    flat = area_index.ravel()
+    order = np.argsort(flat, kind='stable')
+    bounds = np.searchsorted(flat[order], np.arange(area_count + 1))
+    return {
+        area_idx: order[bounds[area_idx]:bounds[area_idx + 1]].astype(np.int32)
+        for area_idx in range(area_count)
+        if bounds[area_idx + 1] > bounds[area_idx]
+    }
+
+
+def _to_float(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+
+def query_point(entry: Dict[str, Any], x: float, y: float) -> Dict[str, Any]:
+    """(x, y) SVG 좌표에서 가장 가까운 격자점의 값과 area를 반환합니다."""
+    grid_z = entry['grid_z']
+    min_x, min_y, max_x, max_y = entry['bounds']
+    nx, ny = grid_z.shape  # grid_z[i, j]는 (x_i, y_j)의 값
+
+    result: Dict[str, Any] = {'x': x, 'y': y, 'value': None, 'area': None}
+    if not (min_x <= x <= max_x and min_y <= y <= max_y):
+        result['error'] = '좌표가 맵 범위를 벗어났습니다'
+        return result
+
+    i = int(round((x - min_x) / (max_x - min_x) * (nx - 1)))
+    j = int(round((y - min_y) / (max_y - min_y) * (ny - 1)))
+    result['value'] = _to_float(grid_z[i, j])
+    if entry.get('grid_stddev') is not None:
+        # 크리깅 표준편차 (크리깅하지 않은 area는 None)
+        result['stddev'] = _to_float(entry['grid_stddev'][i, j])
+    area_idx = int(entry['area_index'][i, j])
+    result['area'] = area_idx if area_idx >= 0 else None
+    return result
+
+
+def resolve_area(entry: Dict[str, Any], region: Dict[str, Any]) -> Optional[int]:
+    """영역 지정({'area': 인덱스 또는 path id} / {'sensor': entity_id})을 area 인덱스로 변환합니다."""
+    if 'sensor' in region:
+        return entry['sensor_areas'].get(region['sensor'])
+
+    area = region.get('area')
+    if isinstance(area, int) and not isinstance(area, bool):
+        return area if 0 <= area < len(entry['area_ids']) else None
+    if isinstance(area, str):
+        if area in entry['area_ids']:
+            return entry['area_ids'].index(area)
+        if area.isdigit():
+            return resolve_area(entry, {'area': int(area)})
+    return None
+
+
+def aggregate_area(entry: Dict[str, Any], area_idx: int,
+                   percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """area 내 격자값의 평균/최소/최대/백분위수와 (크리깅 area면) 표준편차 평균/최대를 반환합니다."""
+    cells = entry['area_cells'].get(area_idx)
+    values = entry['grid_z'].ravel()[cells] if cells is not None else np.empty(0)
+    values = values[~np.isnan(values)]
+
+    result: Dict[str, Any] = {'area': area_idx, 'count': int(values.size)}
+    if entry.get('grid_stddev') is not None:
+        stddev = entry['grid_stddev'].ravel()[cells] if cells is not None else np.empty(0)
+        stddev = stddev[~np.isnan(stddev)]
+        result['stddev'] = ({'mean': _to_float(stddev.mean()), 'max': _to_float(stddev.max())}
+                            if stddev.size else None)
+    if values.size == 0:
+        result.update({'mean': None, 'min': None, 'max': None,
+                       'percentiles': {f'{p:g}': None for p in percentiles}})
+        return result
+
+    result.update({
+        'mean': _to_float(values.mean()),
+        'min': _to_float(values.min()),
+        'max': _to_float(values.max()),
+        'percentiles': {f'{p:g}': _to_float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+    })
+    return result
+
+
+def run_query(entry: Dict[str, Any], points: List[Dict[str, Any]], regions: List[Dict[str, Any]],
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """여러 지점/영역 조회를 한 번에 처리합니다.
+
+    Args:
+        entry: MapGenerator.grid_cache 항목
+        points: [{'x': float, 'y': float}, ...]
+        regions: [{'area': int | str} 또는 {'sensor': entity_id}, ...]
+        percentiles: 영역 집계에 포함할 백분위수 목록 (0~100)
+    """
+    point_results = [query_point(entry, float(p['x']), float(p['y'])) for p in points]
+
+    region_results = []
+    for region in regions:
+        area_idx = resolve_area(entry, region)
+        if area_idx is None:
+            region_results.append({**region, 'error': '해당하는 area를 찾을 수 없습니다'})
+            continue
+        region_results.append({**region, **aggregate_area(entry, area_idx, percentiles)})
+
+    return {
+        'version': entry['version'],
+        'time': entry['time'],
+        'unit': entry.get('unit', ''),
+        'points': point_results,
+        'regions': region_results
+    }
@@ -0,0 +1,266 @@
+"""격자 기록(grid_history)으로 애니메이션 렌더링
+
+저장된 격자에서 프레임을 직접 그리므로, 보관된 PNG를 디코딩하지 않고 현재 컬러바/스타일로
+지난 기록을 다시 재생할 수 있습니다.
+
+- 프레임: 격자값 -> 컬러맵 LUT 색인 -> 출력 크기로 보간 확대 -> 정적 오버레이 합성
+  (matplotlib은 오버레이를 만들 때 한 번만 사용)
+- 선택적으로 인접 프레임 사이를 선형 보간한 중간 프레임을 추가
+- 프레임 렌더링은 스레드 풀에서 병렬로 수행하고, GIF는 프레임이 인코딩되는 대로 전송
+  (WebP는 Pillow가 모든 프레임을 메모리에서 조립한 뒤 한 번에 쓰므로 인코딩이 끝나야 전송 시작)
+"""
+import os
+import io
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+from PIL import Image, ImageDraw, ImageFont  # type: ignore
+
+from colormap_preview import get_colormap
+
+ANIMATION_FORMATS = {'gif': ('GIF', 'image/gif'), 'webp': ('WEBP', 'image/webp')}
+MAX_ANIMATION_FRAMES = 600
+FRAME_ALPHA = 230  # 생성 이미지의 contourf alpha=0.9와 맞춤
+FRAME_WORKERS = min(4, os.cpu_count() or 1)  # 프레임 렌더링 스레드 수
+CHUNK_SIZE = 64 * 1024  # 인코딩된 바이트를 이 크기만큼 모아 전송
+MAX_PENDING_CHUNKS = 8  # 전송을 기다리는 청크 수 상한 (느린 클라이언트면 인코더가 기다림)
+
+_frame_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_frame_pool() -> ThreadPoolExecutor:
+    """프레임 렌더링용 스레드 풀을 반환합니다. (numpy/Pillow 연산은 GIL을 해제)"""
+    global _frame_pool
+    if _frame_pool is None:
+        _frame_pool = ThreadPoolExecutor(max_workers=FRAME_WORKERS, thread_name_prefix='animation-frame')
+    return _frame_pool
+
+
+def _reset_frame_pool():
+    global _frame_pool
+    _frame_pool = None
+
+
+os.register_at_fork(after_in_child=_reset_frame_pool)
+
+
+def _ordered_map(pool: ThreadPoolExecutor, fn: Callable, items: Iterator, window: int) -> Iterator:
+    """pool에서 fn을 병렬 실행하되 결과는 입력 순서대로, 최대 window개만 앞서 계산합니다.
+
+    Executor.map은 모든 작업을 한 번에 제출하므로 인코더보다 앞서 렌더링된 프레임이
+    메모리에 쌓이는 것을 막기 위해 사용합니다.
+    """
+    pending: deque = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def build_lut(cmap_name: str, steps: int) -> np.ndarray:
+    """컬러맵을 steps단계 (steps, 4) uint8 LUT로 만듭니다. (생성 이미지의 등고선 단계와 맞춤)"""
+    steps = max(2, min(int(steps), 256))
+    lut = get_colormap(cmap_name)(np.linspace(0, 1, steps), bytes=True)
+    lut[:, 3] = FRAME_ALPHA
+    return lut
+
+
+def value_range(grids: List[np.ndarray], colorbar_config: Dict[str, Any]) -> Tuple[float, float]:
+    """애니메이션 전체에 공통으로 쓸 값 범위를 반환합니다. (auto_range면 모든 프레임 기준)"""
+    if not colorbar_config.get('auto_range', False):
+        return float(colorbar_config.get('min_temp', 0)), float(colorbar_config.get('max_temp', 100))
+    finite = [grid[~np.isnan(grid)] for grid in grids]
+    finite = [values for values in finite if values.size]
+    if not finite:
+        return 0.0, 1.0
+    vmin = float(min(values.min() for values in finite))
+    vmax = float(max(values.max() for values in finite))
+    padding = (vmax - vmin) * 0.1 if vmax > vmin else 0.5
+    return vmin - padding, vmax + padding
+
+
+def interpolate_frames(frames: List[Dict[str, Any]], steps: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """(version, grid_z) 프레임 사이에 steps개의 선형 보간 프레임을 넣어 반환합니다.
+
+    한쪽이라도 값이 없는 칸은 보간 프레임에서도 값이 없습니다.
+    """
+    for previous, current in zip(frames, frames[1:]):
+        yield previous['version'], previous['grid_z']
+        for step in range(1, steps + 1):
+            t = step / (steps + 1)
+            version = int(previous['version'] + (current['version'] - previous['version']) * t)
+            yield version, previous['grid_z'] * (1 - t) + current['grid_z'] * t
+    if frames:
+        yield frames[-1]['version'], frames[-1]['grid_z']
+
+
+def render_frame(grid_z: np.ndarray, lut: np.ndarray, vmin: float, vmax: float, overlay: np.ndarray,
+                 label: Optional[str] = None, label_style: Optional[Dict[str, Any]] = None) -> Image.Image:
+    """격자 하나를 오버레이와 같은 크기의 RGBA 프레임으로 렌더링합니다.
+
+    Args:
+        grid_z: (nx, ny) 격자 (grid_z[i, j] = (x_i, y_j)의 값, 값 없음 = NaN)
+        lut: build_lut()의 결과
+        vmin, vmax: 컬러맵 범위
+        overlay: (높이, 너비, 4) uint8 정적 오버레이
+        label: 프레임에 표시할 문자열 (시각 등)
+        label_style: {'font_size', 'font_color', 'position', 'shadow'} (gen_config.timestamp 형식)
+    """
+    grid = grid_z.T  # 행 = y, 열 = x (이미지 순서)
+    mask = np.isnan(grid)
+    scaled = (np.nan_to_num(grid, nan=vmin) - vmin) / ((vmax - vmin) or 1.0)
+    index = np.clip(np.rint(scaled * (len(lut) - 1)), 0, len(lut) - 1).astype(np.intp)
+    rgba = lut[index]
+    rgba[mask] = 0
+
+    height, width = overlay.shape[:2]
+    frame = Image.fromarray(rgba, 'RGBA').resize((width, height), Image.BILINEAR)
+    frame.alpha_composite(Image.fromarray(overlay, 'RGBA'))
+
+    if label:
+        style = label_style or {}
+        scale = width / 1000
+        font = ImageFont.load_default(size=max(8, int(style.get('font_size', 16) * scale * 1.5)))
+        draw = ImageDraw.Draw(frame)
+        left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+        margin = int(10 * scale)
+        position = style.get('position', 'bottom-right')
+        x = margin if position.endswith('left') else width - margin - (right - left)
+        y = margin if position.startswith('top') else height - margin - (bottom - top)
+        draw.text((x - left, y - top), label, font=font, fill=style.get('font_color', '#ffffff'),
+                  stroke_width=max(1, int(2 * scale)), stroke_fill=style.get('shadow', {}).get('color', '#000000'))
+    return frame
+
+
+class AnimationCancelled(Exception):
+    """클라이언트 연결이 끊겨 애니메이션 렌더링/인코딩을 중단함"""
+
+
+def _put_threadsafe(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, item: Optional[bytes],
+                    cancelled: threading.Event):
+    """다른 스레드에서 이벤트 루프의 큐에 넣습니다. 큐가 가득 차면 기다리고, 그동안 취소되면 중단합니다."""
+    future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+    while True:
+        if cancelled.is_set():
+            future.cancel()
+            raise AnimationCancelled()
+        try:
+            future.result(timeout=0.5)
+            return
+        except FutureTimeoutError:
+            continue
+
+
+class _ChunkWriter(io.RawIOBase):
+    """인코더가 쓴 바이트를 CHUNK_SIZE만큼 모아 이벤트 루프의 (크기 제한) 큐로 넘기는 파일 객체"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, cancelled: threading.Event):
+        self._loop = loop
+        self._queue = queue
+        self._cancelled = cancelled
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._buffer += chunk
+        if len(self._buffer) >= CHUNK_SIZE:
+            self.drain()
+        return len(chunk)
+
+    def drain(self):
+        """모아 둔 바이트를 큐로 넘깁니다."""
+        if self._buffer:
+            _put_threadsafe(self._loop, self._queue, bytes(self._buffer), self._cancelled)
+            self._buffer.clear()
+
+
+def encode_animation(frames: Iterator[Image.Image], format: str, duration: int, fp):
+    """프레임들을 애니메이션 GIF/WebP로 인코딩하여 fp에 씁니다."""
+    pil_format = ANIMATION_FORMATS[format][0]
+    first = next(frames)
+    options: Dict[str, Any] = {'save_all': True, 'append_images': frames, 'duration': duration, 'loop': 0}
+    if pil_format == 'GIF':
+        options['disposal'] = 2  # 투명 배경에 이전 프레임이 남지 않도록
+    else:
+        options['quality'] = 80
+    first.save(fp, format=pil_format, **options)
+
+
+async def stream_animation(frames: List[Dict[str, Any]], overlay: np.ndarray, lut: np.ndarray,
+                           vrange: Tuple[float, float], format: str = 'gif', duration: int = 200,
+                           interpolate: int = 0, label_format: Optional[str] = '%Y-%m-%d %H:%M',
+                           label_style: Optional[Dict[str, Any]] = None,
+                           on_error: Optional[Callable[[Exception], None]] = None) -> AsyncIterator[bytes]:
+    """격자 기록 프레임을 렌더링/인코딩하면서 인코딩된 바이트를 순서대로 내보냅니다.
+
+    GIF만 프레임 단위로 스트리밍됩니다. Pillow의 WebP 인코더는 모든 프레임을 메모리의
+    애니메이션으로 조립한 뒤 결과를 한 번에 쓰므로, WebP는 렌더링이 스레드에서 진행되어
+    이벤트 루프를 막지 않을 뿐 첫 바이트는 인코딩이 끝난 뒤에 나가고 메모리도 전체 크기만큼 사용합니다.
+
+    Args:
+        frames: GridHistory.read()의 결과 목록 (오래된 순)
+        overlay: 정적 오버레이 RGBA (MapGenerator.render_overlay)
+        lut: 컬러맵 LUT (build_lut)
+        vrange: (vmin, vmax)
+        format: 'gif' 또는 'webp'
+        duration: 프레임 간격 (밀리초, 보간 프레임 포함)
+        interpolate: 인접 프레임 사이에 넣을 보간 프레임 수
+        label_format: 프레임 시각 표시 형식 (None이면 표시하지 않음)
+        label_style: 시각 표시 스타일 (gen_config.timestamp 형식)
+        on_error: 전송 중 인코딩 오류를 알릴 콜백 (응답이 이미 시작되어 상태 코드로 알릴 수 없음)
+
+    전송을 기다리는 바이트는 CHUNK_SIZE x MAX_PENDING_CHUNKS로 제한되어 클라이언트가 느리면
+    인코더가 기다리고, 제너레이터가 닫히면(연결 끊김) 남은 프레임은 렌더링하지 않습니다.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_CHUNKS)
+    cancelled = threading.Event()
+    vmin, vmax = vrange
+
+    def render(item: Tuple[int, np.ndarray]) -> Image.Image:
+        if cancelled.is_set():
+            raise AnimationCancelled()
+        version, grid_z = item
+        label = datetime.fromtimestamp(version / 1e9).strftime(label_format) if label_format else None
+        return render_frame(grid_z, lut, vmin, vmax, overlay, label, label_style)
+
+    def encode():
+        try:
+            rendered = _ordered_map(get_frame_pool(), render, interpolate_frames(frames, interpolate),
+                                    FRAME_WORKERS * 2)
+            writer = _ChunkWriter(loop, queue, cancelled)
+            encode_animation(rendered, format, duration, writer)
+            writer.drain()
+        finally:
+            if not cancelled.is_set():
+                _put_threadsafe(loop, queue, None, cancelled)
+
+    # 인코더가 프레임 풀의 결과를 기다리므로 인코딩은 별도 스레드(기본 실행기)에서 수행
+    task = loop.run_in_executor(None, encode)
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        try:
+            await task
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                raise
+    finally:
+        # 클라이언트 연결이 끊겨 제너레이터가 닫히거나 취소되면 남은 프레임 렌더링/인코딩 중단
+        cancelled.set()
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
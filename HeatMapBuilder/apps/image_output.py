@@ -0,0 +1,330 @@
+import io
+import functools
+import importlib
+import importlib.util
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np  # type: ignore
+from PIL import Image  # type: ignore
+
+# 인코딩 기본 옵션 (gen_config.encoder로 덮어씀)
+DEFAULT_ENCODER_OPTIONS = {
+    'png_compress_level': 6,  # 0(무압축, 가장 빠름) ~ 9(가장 작음)
+    'quality': 85,            # JPG/WebP/AVIF 손실 압축 품질, 무손실 WebP에서는 압축 노력 정도 (0~100)
+    'webp_lossless': False,
+    'webp_method': 4,         # 0(빠름) ~ 6(작음)
+    'avif_speed': 6,          # 0(느림, 작음) ~ 10(빠름)
+    'derived_png_colors': 256  # 축소 PNG 팔레트 색상 수 (0이면 양자화하지 않음)
+}
+
+# Pillow 인코더는 GIL을 해제하므로 스레드 풀로 이벤트 루프/렌더링과 분리
+_encoder_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_encoder_pool() -> ThreadPoolExecutor:
+    """이미지 인코딩용 스레드 풀을 반환합니다. (처음 호출 시 생성)"""
+    global _encoder_pool
+    if _encoder_pool is None:
+        _encoder_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-encoder')
+    return _encoder_pool
+
+
+def _reset_encoder_pool():
+    # fork된 자식 프로세스(일괄 생성 워커)는 부모의 스레드를 물려받지 못하므로 새로 생성하도록 초기화
+    global _encoder_pool
+    _encoder_pool = None
+
+
+os.register_at_fork(after_in_child=_reset_encoder_pool)
+
+
+@functools.lru_cache(maxsize=None)
+def avif_supported() -> bool:
+    """현재 Pillow에서 AVIF 인코딩이 가능한지 확인합니다. (내장 코덱 또는 pillow-avif-plugin)"""
+    if importlib.util.find_spec('pillow_avif') is not None:
+        importlib.import_module('pillow_avif')  # 가져오면 Pillow에 AVIF 플러그인이 등록됨
+    return '.avif' in Image.registered_extensions()
+
+
+def render_rgba(fig, **savefig_kwargs) -> np.ndarray:
+    """figure를 인코딩 없이 (높이, 너비, 4) uint8 RGBA 배열로 렌더링합니다.
+
+    savefig의 bbox_inches/pad_inches/dpi 처리를 그대로 사용하며, 렌더링 크기는
+    마지막으로 그린 Agg 렌더러에서 가져옵니다.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='rgba', **savefig_kwargs)
+    renderer = fig.canvas.renderer
+    width, height = int(round(renderer.width)), int(round(renderer.height))
+    data = buffer.getvalue()
+    if width * height * 4 != len(data):
+        # 렌더러 크기를 알 수 없는 경우 PNG로 저장 후 디코딩
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', **savefig_kwargs)
+        buffer.seek(0)
+        with Image.open(buffer) as image:
+            return np.asarray(image.convert('RGBA'))
+    return np.frombuffer(data, dtype=np.uint8).reshape(height, width, 4)
+
+
+def _encode(image: Image.Image, format: str, options: Dict[str, Any],
+            background: Tuple[int, int, int] = (255, 255, 255), palette_colors: int = 0) -> bytes:
+    """RGBA 이미지를 지정한 포맷의 바이트로 인코딩합니다. (palette_colors > 0이면 PNG를 팔레트로 양자화)"""
+    options = {**DEFAULT_ENCODER_OPTIONS, **(options or {})}
+    format = format.lower()
+    buffer = io.BytesIO()
+    if format == 'png':
+        if palette_colors > 0:
+            image = image.quantize(min(int(palette_colors), 256), method=Image.Quantize.FASTOCTREE)
+        image.save(buffer, format='PNG', compress_level=int(options['png_compress_level']))
+    elif format in ('jpg', 'jpeg'):
+        flattened = Image.new('RGB', image.size, background)
+        flattened.paste(image, mask=image)
+        flattened.save(buffer, format='JPEG', quality=int(options['quality']))
+    elif format == 'webp':
+        image.save(buffer, format='WEBP', lossless=bool(options['webp_lossless']),
+                   quality=int(options['quality']), method=int(options['webp_method']))
+    elif format == 'avif':
+        if not avif_supported():
+            raise ValueError("AVIF 인코딩을 지원하지 않는 Pillow입니다. (Pillow 11.2 이상 또는 pillow-avif-plugin 필요)")
+        image.save(buffer, format='AVIF', quality=int(options['quality']), speed=int(options['avif_speed']))
+    else:
+        raise ValueError(f"지원하지 않는 출력 포맷입니다: {format}")
+    return buffer.getvalue()
+
+
+def encode_image(rgba: np.ndarray, format: str, options: Optional[Dict[str, Any]] = None,
+                 background: Tuple[int, int, int] = (255, 255, 255)) -> Tuple[bytes, Dict[str, Any]]:
+    """RGBA 배열을 지정한 포맷으로 인코딩합니다.
+
+    Args:
+        rgba: (높이, 너비, 4) uint8 배열
+        format: png, jpg/jpeg, webp, avif
+        options: DEFAULT_ENCODER_OPTIONS 형식의 인코딩 옵션
+        background: 알파를 지원하지 않는 포맷(JPEG)의 배경색
+
+    Returns:
+        (인코딩된 바이트, {'format', 'width', 'height', 'bytes', 'encode_time'})
+    """
+    start_time = time.time()
+    image = Image.fromarray(rgba, 'RGBA')
+    data = _encode(image, format, options or {}, background)
+    return data, {
+        'format': format.lower(),
+        'width': image.width,
+        'height': image.height,
+        'bytes': len(data),
+        'encode_time': time.time() - start_time
+    }
+
+
+def derived_image_path(output_path: str, size_name: str) -> str:
+    """축소 이미지 경로를 반환합니다. (예: map.png -> map.thumb.png)"""
+    base_path, ext = os.path.splitext(output_path)
+    return f"{base_path}.{size_name}{ext}"
+
+
+def publish_derived_images(output_path: str, rgba: np.ndarray, format: str, sizes: Dict[str, int],
+                           logger, options: Optional[Dict[str, Any]] = None, rotate: bool = False,
+                           rotation_count: int = 20, missing_only: bool = False) -> Dict[str, Dict[str, int]]:
+    """같은 렌더링 버퍼에서 축소 이미지(썸네일 등)를 만들어 원본 옆에 저장합니다.
+
+    Args:
+        output_path: 원본 이미지 경로
+        rgba: 원본 RGBA 배열
+        format: 출력 포맷 (원본과 동일)
+        sizes: {크기 이름: 긴 변의 픽셀 수}, 원본보다 크거나 같은 크기는 건너뜀
+        logger: 로거
+        options: 인코딩 옵션
+        rotate: True이면 원본과 같은 번호 체계로 기존 축소 이미지를 로테이션
+        rotation_count: 로테이션 보관 개수
+        missing_only: True이면 파일이 없는 크기만 생성 (원본 내용이 바뀌지 않은 경우)
+
+    Returns:
+        Dict: {크기 이름: {'width', 'height', 'bytes'}} (생성된 크기만)
+    """
+    image = Image.fromarray(rgba, 'RGBA')
+    options = {**DEFAULT_ENCODER_OPTIONS, **(options or {})}
+    derived: Dict[str, Dict[str, int]] = {}
+    for size_name, max_side in sizes.items():
+        scale = int(max_side) / max(image.size)
+        if scale >= 1:
+            continue
+        path = derived_image_path(output_path, size_name)
+        exists = os.path.exists(path)
+        if missing_only and exists:
+            continue
+        try:
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            # 축소 이미지는 부드러운 그라데이션이 늘어 PNG 압축률이 떨어지므로 팔레트로 양자화
+            data = _encode(image.resize(size, Image.LANCZOS, reducing_gap=2.0), format, options,
+                           palette_colors=options['derived_png_colors'])
+            if rotate and exists:
+                rotate_images(path, rotation_count, logger)
+            atomic_write(path, data)
+            derived[size_name] = {'width': size[0], 'height': size[1], 'bytes': len(data)}
+        except Exception as e:
+            logger.error(f"축소 이미지({size_name}) 생성 중 오류 발생: {str(e)}")
+    return derived
+
+
+def content_hash(data: bytes) -> str:
+    """바이트 내용의 해시를 반환합니다. (ConfigManager.get_content_hash와 같은 방식)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def atomic_write(path: str, data: bytes):
+    """같은 디렉토리의 임시 파일에 쓴 뒤 rename으로 교체합니다.
+
+    읽는 쪽(HA 대시보드 등)은 항상 이전 파일이나 완성된 새 파일 중 하나만 보게 됩니다.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix=os.path.splitext(path)[1], dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def rotate_images(output_path: str, rotation_count: int, logger):
+    """현재 이미지를 {이름}-1로 보관하고 기존 보관 이미지의 번호를 하나씩 증가시킵니다.
+
+    rotation_count-1 번째 이미지는 삭제됩니다. 현재 이미지는 복사하므로 새 이미지가
+    게시될 때까지 그대로 제공됩니다.
+    """
+    base_path, ext = os.path.splitext(output_path)
+
+    # 현재 이미지가 존재하면 먼저 복사본 생성
+    current_copy = f"{base_path}_current{ext}"
+    if os.path.exists(output_path):
+        try:
+            shutil.copy2(output_path, current_copy)
+        except Exception as e:
+            logger.warning(f"이미지 로테이션 중 에러, 현재 이미지 복사 실패: {str(e)}")
+
+    # 현재 존재하는 파일들의 목록을 미리 확보
+    existing_files = []
+    for i in range(1, rotation_count):
+        file_path = f"{base_path}-{i}{ext}"
+        if os.path.exists(file_path):
+            existing_files.append((file_path, i))
+
+    # 가장 오래된 백업 파일 삭제
+    old_file = f"{base_path}-{rotation_count-1}{ext}"
+    try:
+        if os.path.exists(old_file):
+            os.remove(old_file)
+    except Exception as e:
+        logger.warning(f"이미지 로테이션 중 에러, 오래된 파일 삭제 실패: {str(e)}")
+
+    # 기존 백업 파일들의 번호를 하나씩 증가
+    for old_path, index in reversed(existing_files):
+        try:
+            new_name = f"{base_path}-{index+1}{ext}"
+            if os.path.exists(old_path):  # 한번 더 확인
+                shutil.move(old_path, new_name)
+        except Exception as e:
+            logger.warning(f"이미지 로테이션 중 에러, 파일 이동 실패 ({old_path} -> {new_name}): {str(e)}")
+
+    # 현재 이미지를 첫 번째 로테이션 파일로 이동
+    if os.path.exists(current_copy):
+        try:
+            shutil.move(current_copy, f"{base_path}-1{ext}")
+        except Exception as e:
+            logger.warning(f"이미지 로테이션 중 에러, 현재 이미지 이동 실패: {str(e)}")
+
+
+def build_gif(output_path: str, rotation_count: int, frame_duration: int, logger):
+    """보관된 이미지(오래된 순)와 현재 이미지로 {이름}_animation.gif를 생성합니다."""
+    base_path, ext = os.path.splitext(output_path)
+    opened_images = []  # 리소스 정리를 위한 리스트
+    try:
+        # 가장 오래된 이미지부터 최신 순으로 GIF에 추가, 마지막으로 현재 이미지 추가
+        img_paths = [f"{base_path}-{i}{ext}" for i in range(rotation_count-1, 0, -1)] + [output_path]
+        for img_path in img_paths:
+            if os.path.exists(img_path):
+                try:
+                    opened_images.append(Image.open(img_path))
+                except Exception as e:
+                    logger.warning(f"이미지 열기 실패 ({img_path}): {str(e)}")
+
+        if opened_images:
+            gif_path = f"{base_path}_animation.gif"
+            tmp_path = f"{base_path}_animation.tmp.gif"
+            opened_images[0].save(
+                tmp_path,
+                save_all=True,
+                append_images=opened_images[1:],
+                duration=frame_duration,  # 설정된 프레임 간격 사용
+                loop=0  # 무한 반복
+            )
+            os.replace(tmp_path, gif_path)
+            logger.debug(f"GIF 애니메이션 생성 완료: {gif_path}")
+    except Exception as e:
+        logger.error(f"GIF 생성 중 오류 발생: {str(e)}")
+    finally:
+        # 열린 이미지 리소스 정리
+        for img in opened_images:
+            try:
+                img.close()
+            except Exception:
+                pass
+
+
+def publish_image(output_path: str, data: bytes, logger, current_hash: Optional[str] = None,
+                  gen_config: Optional[Dict] = None, rotate: bool = False) -> Dict:
+    """렌더링된 이미지를 게시합니다.
+
+    현재 파일과 내용 해시가 같으면 쓰기, 로테이션, GIF 생성을 모두 건너뜁니다.
+    다르면 (rotate=True인 경우) 로테이션 후 원자적으로 교체하고 GIF를 다시 만듭니다.
+
+    Args:
+        output_path: 게시할 이미지 경로
+        data: 인코딩된 이미지 바이트
+        logger: 로거
+        current_hash: 현재 게시된 파일의 내용 해시 (없으면 None)
+        gen_config: 맵 생성 설정 (rotation_count, gif_enabled, gif_frame_duration)
+        rotate: 로테이션/GIF 처리 여부
+
+    Returns:
+        Dict: {'changed': bool, 'hash': str, 'timings': {'write', 'rotation', 'gif'}}
+    """
+    new_hash = content_hash(data)
+    timings: Dict[str, float] = {}
+    if current_hash == new_hash:
+        logger.debug(f"이미지 내용이 같아 저장을 건너뜁니다: {output_path}")
+        return {'changed': False, 'hash': new_hash, 'timings': timings}
+
+    gen_config = gen_config or {}
+    rotation_count = gen_config.get('rotation_count', 20)  # 기본값 20
+    if rotate and current_hash is not None:
+        stage_start = time.time()
+        try:
+            rotate_images(output_path, rotation_count, logger)
+        except Exception as e:
+            logger.error(f"이미지 로테이션 처리 중 오류 발생: {str(e)}")
+        timings['rotation'] = time.time() - stage_start
+
+    stage_start = time.time()
+    atomic_write(output_path, data)
+    timings['write'] = time.time() - stage_start
+
+    if rotate and gen_config.get('gif_enabled', False):
+        stage_start = time.time()
+        build_gif(output_path, rotation_count, gen_config.get('gif_frame_duration', 1000), logger)
+        timings['gif'] = time.time() - stage_start
+
+    return {'changed': True, 'hash': new_hash, 'timings': timings}
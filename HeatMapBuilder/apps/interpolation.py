@@ -0,0 +1,179 @@
+"""area 보간 방법별 계산 함수
+
+MapGenerator의 area 온도 계산과 보간 방법 자동 선택(interpolation_tuner)이 같은 계산을
+쓰도록 방법마다 함수 하나로 분리합니다. 각 함수는 실패하면 예외를 그대로 올리며,
+폴백 여부는 호출하는 쪽에서 정합니다.
+
+공통 인자:
+    points: (M, 2) 값을 구할 좌표
+    locs: (N, 2) 센서 좌표
+    temps: (N,) 센서값
+    chunk_points: 주어지면 모델(RBF 가중치, 크리깅 베리오그램)은 한 번만 맞추고 points를
+        chunk_points개씩 나눠 계산합니다. (격자점 수 x 센서 수 크기의 임시 배열을 제한)
+
+결과는 points와 같은 dtype(기본 float32 격자)으로 반환합니다.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np  # type: ignore
+from scipy.interpolate import Rbf  # type: ignore
+from pykrige.ok import OrdinaryKriging  # type: ignore
+
+from local_kriging import execute_neighborhood
+from geodesic import kernel_values
+
+METHODS = ('gaussian', 'rbf', 'kriging')
+MIN_CHUNK_POINTS = 1024  # 메모리 예산이 작아도 한 번에 계산하는 최소 격자점 수
+
+
+def working_bytes_per_point(method: str, sensor_count: int, parameters: Dict[str, Any]) -> int:
+    """method로 격자점 하나를 계산할 때 생기는 임시 배열의 대략적인 크기 (바이트, float64 기준)"""
+    n = max(1, sensor_count) + 1
+    if method == 'kriging':
+        k = int(parameters.get('kriging', {}).get('n_closest_points', 0) or 0)
+        if 0 < k < sensor_count:
+            # 지역 크리깅: 격자점별 (k+1)x(k+1) 역행렬 사본과 우변 벡터
+            return 8 * ((k + 1) ** 2 + 4 * (k + 1) + 8)
+        return 8 * (5 * n + 8)
+    if method == 'rbf':
+        return 8 * (3 * n + 8)
+    # 가우시안: 직선 거리는 센서마다 누적, 측지 거리는 (센서 수, 격자점 수) 가중치 배열
+    return 8 * (4 * n + 8)
+
+
+def chunk_size(method: str, sensor_count: int, parameters: Dict[str, Any],
+               memory_budget: Optional[int]) -> Optional[int]:
+    """memory_budget(바이트) 안에서 한 번에 계산할 격자점 수 (예산이 없으면 None = 나누지 않음)"""
+    if not memory_budget:
+        return None
+    return max(MIN_CHUNK_POINTS, int(memory_budget) // working_bytes_per_point(method, sensor_count, parameters))
+
+
+def evaluate_in_chunks(evaluate: Callable[[slice], Any], count: int, chunk_points: Optional[int]) -> Any:
+    """evaluate(slice)를 chunk_points개씩 호출하여 결과(배열 또는 배열 튜플)를 이어 붙입니다."""
+    if not chunk_points or count <= chunk_points:
+        return evaluate(slice(0, count))
+    parts = [evaluate(slice(start, min(start + chunk_points, count))) for start in range(0, count, chunk_points)]
+    if isinstance(parts[0], tuple):
+        return tuple(np.concatenate(part) for part in zip(*parts))
+    return np.concatenate(parts)
+
+
+def gaussian(points: np.ndarray, locs: np.ndarray, temps: np.ndarray, sigma: float,
+             chunk_points: Optional[int] = None) -> np.ndarray:
+    """센서값의 가우시안 가중 평균 (실패하지 않는 최후의 방법, points의 dtype으로 누적)"""
+    locs = np.asarray(locs, dtype=points.dtype)
+
+    def evaluate(part: slice) -> np.ndarray:
+        chunk = points[part]
+        weighted_temps = np.zeros_like(chunk[:, 0])
+        weight_sum = np.zeros_like(chunk[:, 0])
+        for loc, temp in zip(locs, temps):
+            distances_sq = np.sum((chunk - loc) ** 2, axis=1)
+            weights = np.exp(-distances_sq / (2 * sigma ** 2))
+            weighted_temps += weights * temp
+            weight_sum += weights
+        return weighted_temps / (weight_sum + 1e-10)
+
+    return evaluate_in_chunks(evaluate, len(points), chunk_points)
+
+
+def rbf(points: np.ndarray, locs: np.ndarray, temps: np.ndarray, function: str, epsilon: float,
+        chunk_points: Optional[int] = None) -> np.ndarray:
+    """방사 기저 함수 보간 (센서값 범위의 ±10%로 제한)"""
+    interpolator = Rbf(locs[:, 0], locs[:, 1], temps, function=function, epsilon=epsilon)
+    values = evaluate_in_chunks(lambda part: interpolator(points[part, 0], points[part, 1]),
+                                len(points), chunk_points)
+    temp_min, temp_max = np.min(temps), np.max(temps)
+    margin = 0.1 * (temp_max - temp_min)
+    return np.clip(values, temp_min - margin, temp_max + margin)
+
+
+def kriging(points: np.ndarray, locs: np.ndarray, temps: np.ndarray,
+            kriging_parameters: Dict[str, Any], chunk_points: Optional[int] = None) -> Tuple[np.ndarray, str, np.ndarray]:
+    """정규 크리깅 (센서값 범위의 ±50%로 제한)
+
+    같은 위치의 센서는 평균 하나로 합치며, n_closest_points가 지정되고 센서가 그보다
+    많으면 지역 크리깅을 사용합니다.
+
+    Returns:
+        (값, 실제 사용한 방법 'kriging' 또는 'kriging_local', 크리깅 분산)
+        분산은 같은 연립방정식 풀이에서 함께 나오는 값이며 음수(수치 오차)는 0으로 맞춥니다.
+    """
+    unique_locs: Dict[Tuple[float, float], list] = {}
+    for loc, temp in zip(locs, temps):
+        unique_locs.setdefault((loc[0], loc[1]), []).append(temp)
+    unique_sensor_locs = np.array(list(unique_locs.keys()))
+    unique_sensor_temps = np.array([np.mean(values) for values in unique_locs.values()])
+
+    # 지역 크리깅 설정은 OrdinaryKriging 인자가 아니므로 분리
+    kriging_parameters = dict(kriging_parameters)
+    n_closest_points = int(kriging_parameters.pop('n_closest_points', 0) or 0)
+    neighborhood_backend = kriging_parameters.pop('neighborhood_backend', 'kdtree')
+    ok = OrdinaryKriging(
+        unique_sensor_locs[:, 0],
+        unique_sensor_locs[:, 1],
+        unique_sensor_temps,
+        **kriging_parameters
+    )
+    if 0 < n_closest_points < len(unique_sensor_temps):
+        # 가까운 n_closest_points개 센서만 사용 (센서가 많은 넓은 area)
+        values, variances = evaluate_in_chunks(
+            lambda part: execute_neighborhood(ok, points[part, 0], points[part, 1], n_closest_points,
+                                              neighborhood_backend),
+            len(points), chunk_points)
+        method = 'kriging_local'
+    else:
+        values, variances = evaluate_in_chunks(
+            lambda part: tuple(np.asarray(result) for result in ok.execute('points', points[part, 0], points[part, 1])),
+            len(points), chunk_points)
+        method = 'kriging'
+    temp_min, temp_max = np.min(temps), np.max(temps)
+    margin = 0.5 * (temp_max - temp_min)
+    variances = np.maximum(np.asarray(variances, dtype=float), 0.0)
+    return np.clip(values, temp_min - margin, temp_max + margin), method, variances
+
+
+def interpolate(method: str, points: np.ndarray, locs: np.ndarray, temps: np.ndarray,
+                parameters: Dict[str, Any], size: float, distances: Optional[np.ndarray] = None,
+                extras: Optional[Dict[str, Any]] = None,
+                memory_budget: Optional[int] = None, kernel: str = 'gaussian',
+                power: float = 2.0) -> Tuple[np.ndarray, str]:
+    """method 하나만 실행합니다. (폴백 없음)
+
+    Args:
+        method: 'gaussian', 'rbf', 'kriging'
+        parameters: 맵 parameters 형식 ({'gaussian': {...}, 'rbf': {...}, 'kriging': {...}})
+        size: sigma/epsilon 계산 기준 길이 (보간 영역의 짧은 변)
+        distances: (N, M) 센서별 측지 거리 (주어지면 가우시안은 직선 거리 대신 kernel 가중 평균 사용)
+        extras: 주어지면 크리깅 분산을 extras['variance']에, 나눠 계산한 횟수를 extras['chunks']에 기록
+            (크리깅 외 방법은 분산 기록 없음, 나누지 않았으면 chunks 기록 없음)
+        memory_budget: 격자점 계산 임시 배열의 최대 크기 (바이트, None이면 나누지 않음)
+        kernel, power: 측지 거리 가중 방식 ('gaussian' 또는 'idw', geodesic.kernel_values 참고)
+
+    Returns:
+        (값, 실제 사용한 방법)
+    """
+    if method not in METHODS:
+        raise ValueError(f"알 수 없는 보간 방법입니다: {method}")
+    chunk_points = chunk_size(method, len(temps), parameters, memory_budget)
+    if extras is not None and chunk_points and len(points) > chunk_points:
+        extras['chunks'] = -(-len(points) // chunk_points)
+
+    if method == 'gaussian' and distances is not None:
+        sigma = size / parameters['gaussian']['sigma_factor']
+        values = evaluate_in_chunks(lambda part: kernel_values(distances[:, part], temps, kernel, sigma, power),
+                                    len(points), chunk_points)
+        method_used = f'geodesic_{kernel}'
+    elif method == 'gaussian':
+        values = gaussian(points, locs, temps, size / parameters['gaussian']['sigma_factor'], chunk_points)
+        method_used = 'gaussian'
+    elif method == 'rbf':
+        values = rbf(points, locs, temps, parameters['rbf']['function'],
+                     size / parameters['rbf']['epsilon_factor'], chunk_points)
+        method_used = 'rbf'
+    else:
+        values, method_used, variances = kriging(points, locs, temps, parameters['kriging'], chunk_points)
+        if extras is not None:
+            extras['variance'] = variances.astype(points.dtype, copy=False)
+    return np.asarray(values).astype(points.dtype, copy=False), method_used
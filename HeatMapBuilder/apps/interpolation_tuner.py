@@ -0,0 +1,162 @@
+"""area별 보간 방법 자동 선택 (leave-one-out 교차 검증)
+
+센서 수만으로 방법을 고르고 실패하면 크리깅 -> RBF -> 가우시안 순으로 다시 시도하는 대신,
+area마다 후보 방법/파라미터를 교차 검증하여 오차와 소요시간을 기록하고 가장 적합한 방법
+하나를 저장해 둡니다. 이후 생성에서는 저장된 방법만 실행합니다.
+
+- 오차: 센서 하나씩 빼고 나머지로 보간한 값과 실제 값의 차이 (RMSE, MAE)
+- 소요시간: 모든 센서로 area 전체 격자점을 보간하는 시간
+- 선택: RMSE가 최솟값의 (1 + RMSE_TOLERANCE) 배 이내인 후보 중 가장 빠른 것
+
+저장된 결과는 area 모양과 area에 속한 센서가 바뀌면(signature 불일치) 사용하지 않습니다.
+"""
+import time
+import hashlib
+import statistics
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+import interpolation
+
+RMSE_TOLERANCE = 0.05  # 최소 RMSE 대비 허용 오차 (이 안에서는 빠른 방법 우선)
+MIN_LOO_SENSORS = 3  # 교차 검증에 필요한 최소 센서 수
+MIN_KRIGING_SENSORS = 4  # 기존 규칙(센서 4개 이상)과 같게 학습 센서가 4개 이상일 때만 크리깅 후보
+LOCAL_KRIGING_NEIGHBORS = 12
+MAX_REPORTED_CANDIDATES = 10
+
+RBF_FUNCTIONS = ('inverse', 'multiquadric', 'gaussian', 'linear', 'cubic', 'thin_plate')
+RBF_EPSILON_FACTORS = (0.25, 0.5, 1.0)
+GAUSSIAN_SIGMA_FACTORS = (2, 3, 5, 8)
+VARIOGRAM_MODELS = ('linear', 'power', 'gaussian', 'spherical', 'exponential')
+
+
+def area_signature(area: Dict[str, Any], sensors: List[Tuple[Any, float, str]]) -> str:
+    """area 모양과 센서 구성(ID, 위치)의 해시 (저장된 선택 결과의 유효성 확인용)"""
+    digest = hashlib.sha1(area['polygon'].wkb)
+    for point, _, sensor_id in sorted(sensors, key=lambda sensor: sensor[2]):
+        digest.update(f"{sensor_id}:{point.x:.1f},{point.y:.1f};".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def candidates(parameters: Dict[str, Any], sensor_count: int) -> List[Dict[str, Any]]:
+    """후보 목록 [{'method', 'parameters'(해당 방법 설정 부분)}] (현재 맵 설정 포함)"""
+    result: List[Dict[str, Any]] = []
+
+    def add(method: str, section: Dict[str, Any]):
+        candidate = {'method': method, 'parameters': section}
+        if candidate not in result:
+            result.append(candidate)
+
+    if 'gaussian' in parameters:
+        add('gaussian', dict(parameters['gaussian']))
+    for sigma_factor in GAUSSIAN_SIGMA_FACTORS:
+        add('gaussian', {'sigma_factor': sigma_factor})
+
+    if 'rbf' in parameters:
+        add('rbf', dict(parameters['rbf']))
+    for function in RBF_FUNCTIONS:
+        for epsilon_factor in RBF_EPSILON_FACTORS:
+            add('rbf', {'function': function, 'epsilon_factor': epsilon_factor})
+
+    # 교차 검증의 학습 센서 수(sensor_count - 1) 기준
+    if sensor_count - 1 >= MIN_KRIGING_SENSORS:
+        base = {key: value for key, value in parameters.get('kriging', {}).items()
+                if key not in ('variogram_model', 'variogram_parameters', 'n_closest_points')}
+        if 'kriging' in parameters:
+            add('kriging', dict(parameters['kriging']))
+        for model in VARIOGRAM_MODELS:
+            # variogram_parameters를 비우면 pykrige가 센서값으로 베리오그램을 맞춤
+            add('kriging', {**base, 'variogram_model': model, 'variogram_parameters': None})
+        if sensor_count - 1 > LOCAL_KRIGING_NEIGHBORS:
+            add('kriging', {**base, 'variogram_model': 'linear', 'variogram_parameters': None,
+                            'n_closest_points': LOCAL_KRIGING_NEIGHBORS})
+    return result
+
+
+def _evaluate(candidate: Dict[str, Any], parameters: Dict[str, Any], locs: np.ndarray, temps: np.ndarray,
+              mask_points: np.ndarray, size: float) -> Optional[Dict[str, Any]]:
+    """후보 하나의 leave-one-out 오차와 전체 보간 소요시간 (실패하면 None)"""
+    method = candidate['method']
+    merged = {**parameters, method: candidate['parameters']}
+    try:
+        errors = []
+        for i in range(len(temps)):
+            keep = np.arange(len(temps)) != i
+            predicted, _ = interpolation.interpolate(method, locs[i:i + 1], locs[keep], temps[keep], merged, size)
+            errors.append(float(predicted[0]) - float(temps[i]))
+        errors_array = np.array(errors)
+        if not np.all(np.isfinite(errors_array)):
+            return None
+
+        start_time = time.perf_counter()
+        values, method_used = interpolation.interpolate(method, mask_points, locs, temps, merged, size)
+        runtime = time.perf_counter() - start_time
+        if not np.all(np.isfinite(values)):
+            return None
+    except Exception:
+        return None
+
+    return {
+        **candidate,
+        'method_used': method_used,
+        'rmse': float(np.sqrt(np.mean(errors_array ** 2))),
+        'mae': float(np.mean(np.abs(errors_array))),
+        'runtime': runtime
+    }
+
+
+def tune_area(area: Dict[str, Any], sensors: List[Tuple[Any, float, str]], mask_points: np.ndarray,
+              parameters: Dict[str, Any], size: float) -> Dict[str, Any]:
+    """area 하나의 후보들을 교차 검증하여 선택 결과를 반환합니다.
+
+    Returns:
+        {'signature', 'sensors', 'method', 'parameters', 'rmse', 'mae', 'runtime', 'candidates'}
+        센서가 MIN_LOO_SENSORS개 미만이면 method는 None (기존 규칙 사용)
+    """
+    result: Dict[str, Any] = {
+        'signature': area_signature(area, sensors),
+        'sensors': len(sensors),
+        'method': None
+    }
+    if len(sensors) < MIN_LOO_SENSORS:
+        result['reason'] = f"센서가 {MIN_LOO_SENSORS}개 미만"
+        return result
+
+    locs = np.array([[point.x, point.y] for point, _, _ in sensors])
+    temps = np.array([temp for _, temp, _ in sensors], dtype=float)
+    if np.ptp(temps) == 0:
+        result['reason'] = "센서값이 모두 같음"
+        return result
+
+    evaluated = [evaluation for evaluation in (
+        _evaluate(candidate, parameters, locs, temps, mask_points, size)
+        for candidate in candidates(parameters, len(sensors))
+    ) if evaluation is not None]
+    if not evaluated:
+        result['reason'] = "성공한 후보 없음"
+        return result
+
+    best_rmse = min(evaluation['rmse'] for evaluation in evaluated)
+    acceptable = [evaluation for evaluation in evaluated if evaluation['rmse'] <= best_rmse * (1 + RMSE_TOLERANCE)]
+    chosen = min(acceptable, key=lambda evaluation: (evaluation['runtime'], evaluation['rmse']))
+
+    evaluated.sort(key=lambda evaluation: evaluation['rmse'])
+    result.update({
+        'method': chosen['method'],
+        'parameters': chosen['parameters'],
+        'rmse': chosen['rmse'],
+        'mae': chosen['mae'],
+        'runtime': chosen['runtime'],
+        'median_runtime': statistics.median(evaluation['runtime'] for evaluation in evaluated),
+        'candidates': evaluated[:MAX_REPORTED_CANDIDATES]
+    })
+    return result
+
+
+def area_parameters(parameters: Dict[str, Any], tuned: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """저장된 선택 결과를 맵 parameters에 적용한 area용 parameters를 반환합니다."""
+    if not tuned or not tuned.get('method'):
+        return parameters
+    method = tuned['method']
+    return {**parameters, 'method': method, method: tuned['parameters']}
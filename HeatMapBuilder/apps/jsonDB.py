@@ -71,7 +71,8 @@ class JsonDB:
                     'created_at': map_data.get('created_at', ''),
                     'updated_at': map_data.get('updated_at', ''),
                     'walls': map_data.get('walls', ''),
-                    'img_url': map_data.get('img_url', '')
+                    'img_url': map_data.get('img_url', ''),
+                    'derived_urls': map_data.get('derived_urls', {})  # 썸네일 등 축소 이미지 URL
                 })
         return maps
 
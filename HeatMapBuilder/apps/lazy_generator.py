@@ -0,0 +1,96 @@
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+import grid_payload
+from metrics import MetricsRegistry
+
+
+class LazyMapGenerator:
+    """MapGenerator를 처음 사용할 때(또는 prewarm 시) 불러오는 대리 객체
+
+    map_generator 모듈은 matplotlib/scipy/pykrige/shapely를 불러오므로 가져오는 데
+    수백 ms~수 초가 걸립니다. 웹서버가 먼저 응답할 수 있도록 모듈 가져오기와 생성기
+    초기화를 미루고, 서버가 열린 뒤 prewarm()으로 백그라운드에서 미리 불러옵니다.
+
+    메트릭 레지스트리와 격자 캐시(grid_cache, grid_key, drop_grids)는 대리 객체가 가지고
+    있어 생성기를 불러오기 전에도 /api/metrics와 격자 API가 이벤트 루프를 막지 않고
+    동작합니다. 그 외 속성은 접근 시 생성기를 불러와 위임합니다.
+    """
+
+    def __init__(self, config_manager, sensor_manager, logger):
+        self.config_manager = config_manager
+        self.sensor_manager = sensor_manager
+        self.logger = logger
+        self.metrics = MetricsRegistry()
+        self.grid_cache: Dict[str, Dict[str, Any]] = {}  # 생성기와 공유하는 맵별 보간 격자
+        self._generator = None
+        self._load_lock = threading.Lock()
+        self._prewarm_thread: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._generator is not None
+
+    def load(self):
+        """MapGenerator를 불러와 반환합니다. (여러 스레드에서 호출해도 한 번만 초기화)"""
+        if self._generator is not None:
+            return self._generator
+        with self._load_lock:
+            if self._generator is None:
+                start_time = time.time()
+                from map_generator import MapGenerator
+                self._generator = MapGenerator(self.config_manager, self.sensor_manager, self.logger,
+                                               metrics=self.metrics, grid_cache=self.grid_cache)
+                elapsed = time.time() - start_time
+                self.metrics.gauge('heatmap_startup_seconds', '프로세스 시작 후 단계별 소요시간').set(
+                    elapsed, {'stage': 'map_generator_load'})
+                self.logger.info(f"맵 생성기 로드 완료: {elapsed:.3f}초")
+        return self._generator
+
+    def prewarm(self):
+        """백그라운드 스레드에서 생성기를 미리 불러오고 렌더링 프로세스를 시작합니다."""
+        if self._generator is not None or self._prewarm_thread is not None:
+            return
+
+        def run():
+            try:
+                self.load().start_render_process()
+            except Exception as e:
+                self.logger.error(f"맵 생성기 미리 로드 실패: {str(e)}")
+                import traceback
+                self.logger.error(traceback.format_exc())
+
+        self._prewarm_thread = threading.Thread(target=run, name='map-generator-prewarm', daemon=True)
+        self._prewarm_thread.start()
+
+    grid_key = staticmethod(grid_payload.grid_key)
+
+    def drop_grids(self, map_id: str):
+        """맵의 모든 레이어 격자를 캐시에서 제거합니다. (생성기를 불러오지 않음)"""
+        grid_payload.drop_map_grids(self.grid_cache, map_id)
+
+    def create_instance(self, sensor_manager=None):
+        """공유 생성기와 상태를 나누지 않는 별도 MapGenerator를 만듭니다.
+
+        필요하면 생성기 모듈을 불러오므로 이벤트 루프가 아닌 스레드에서 호출합니다.
+        (asyncio.to_thread(map_generator.create_instance, ...))
+        """
+        return type(self.load())(self.config_manager, sensor_manager, self.logger)
+
+    async def generate(self, *args, **kwargs):
+        """이벤트 루프를 막지 않도록 생성기를 스레드에서 불러온 뒤 generate()를 호출합니다."""
+        generator = self._generator or await asyncio.to_thread(self.load)
+        return await generator.generate(*args, **kwargs)
+
+    async def generate_batch(self, *args, **kwargs):
+        """이벤트 루프를 막지 않도록 생성기를 스레드에서 불러온 뒤 generate_batch()를 호출합니다."""
+        generator = self._generator or await asyncio.to_thread(self.load)
+        return await generator.generate_batch(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # 인스턴스/클래스에 없는 속성만 여기로 옴 (내부 속성은 초기화 전 재귀 방지)
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
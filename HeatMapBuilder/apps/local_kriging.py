@@ -0,0 +1,85 @@
+"""이웃 센서만 사용하는 지역(이동 창) 정규 크리깅
+
+전역 크리깅은 area의 모든 센서로 연립방정식을 세우므로 센서 수가 많은 넓은 공간에서
+느려집니다. 여기서는 pykrige OrdinaryKriging으로 전체 센서에 맞춘 베리오그램을 그대로
+쓰되, 각 격자점마다 KD-트리로 찾은 가장 가까운 k개 센서만으로 크리깅합니다.
+
+격자점은 이웃 센서 집합이 같은 것끼리 묶어 집합마다 크리깅 행렬의 역행렬을 한 번만
+구하고, 가중치는 전부 배열 연산으로 계산합니다. (pykrige의 n_closest_points 이동 창
+방식과 같은 결과이며, 격자점마다 방정식을 푸는 반복문이 없음)
+"""
+from typing import Tuple
+
+import numpy as np  # type: ignore
+from scipy.spatial import cKDTree  # type: ignore
+
+NEIGHBORHOOD_BACKENDS = ('kdtree', 'pykrige')
+EXACT_DISTANCE = 1e-10  # pykrige와 같이 이 거리 이내면 센서값을 그대로 사용
+
+
+def _adjust_for_anisotropy(x: np.ndarray, y: np.ndarray, ok) -> np.ndarray:
+    """pykrige와 같은 방식으로 좌표에 이방성(회전/배율)을 적용합니다."""
+    center = np.array([ok.XCENTER, ok.YCENTER])
+    theta = -np.deg2rad(ok.anisotropy_angle)
+    rotation = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    stretch = np.array([[1.0, 0.0], [0.0, ok.anisotropy_scaling]])
+    points = np.column_stack((x, y)).astype(float) - center
+    return points @ (stretch @ rotation).T + center
+
+
+def execute_local(ok, x: np.ndarray, y: np.ndarray, n_closest_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """맞춰진 OrdinaryKriging(ok)으로 (x, y) 지점들을 가장 가까운 n_closest_points개 센서만 사용해 크리깅합니다.
+
+    Returns:
+        (추정값, 크리깅 분산) - ok.execute('points', ...)와 같은 형식 (masked array 아님)
+    """
+    locs = np.column_stack((ok.X_ADJUSTED, ok.Y_ADJUSTED))
+    values = np.asarray(ok.Z, dtype=float)
+    k = max(1, min(int(n_closest_points), len(values)))
+    points = _adjust_for_anisotropy(np.asarray(x), np.asarray(y), ok)
+
+    distances, neighbors = cKDTree(locs).query(points, k=k)
+    distances = distances.reshape(len(points), k)
+    neighbors = neighbors.reshape(len(points), k)
+
+    # 이웃 집합을 정렬하여 같은 집합을 가진 격자점끼리 묶음
+    order = np.argsort(neighbors, axis=1)
+    neighbors = np.take_along_axis(neighbors, order, axis=1)
+    distances = np.take_along_axis(distances, order, axis=1)
+    # (행 단위 np.unique(axis=0)보다 빠르도록 각 행을 하나의 바이트열 값으로 보고 비교)
+    neighbors = np.ascontiguousarray(neighbors)
+    row_keys = neighbors.view(np.dtype((np.void, neighbors.dtype.itemsize * k))).ravel()
+    _, first, set_index = np.unique(row_keys, return_index=True, return_inverse=True)
+    sets = neighbors[first]
+    set_index = set_index.reshape(-1)
+
+    # 집합별 크리깅 행렬 [[-γ(d_ij), 1], [1, 0]] (대각은 0)의 역행렬
+    set_locs = locs[sets]
+    pairwise = np.linalg.norm(set_locs[:, :, np.newaxis, :] - set_locs[:, np.newaxis, :, :], axis=-1)
+    a = np.ones((len(sets), k + 1, k + 1))
+    a[:, :k, :k] = -ok.variogram_function(ok.variogram_model_parameters, pairwise)
+    a[:, np.arange(k), np.arange(k)] = 0.0
+    a[:, k, k] = 0.0
+    a_inv = np.linalg.inv(a)
+
+    b = np.ones((len(points), k + 1))
+    b[:, :k] = -ok.variogram_function(ok.variogram_model_parameters, distances)
+    b[:, :k][distances <= EXACT_DISTANCE] = 0.0
+
+    weights = np.einsum('pij,pj->pi', a_inv[set_index], b)
+    estimates = np.sum(weights[:, :k] * values[neighbors], axis=1)
+    variances = np.sum(weights * -b, axis=1)
+    return estimates, variances
+
+
+def execute_neighborhood(ok, x: np.ndarray, y: np.ndarray, n_closest_points: int,
+                         backend: str = 'kdtree') -> Tuple[np.ndarray, np.ndarray]:
+    """지역 크리깅을 backend('kdtree' = execute_local, 'pykrige' = pykrige 이동 창)로 실행합니다."""
+    if backend not in NEIGHBORHOOD_BACKENDS:
+        raise ValueError(f"알 수 없는 이웃 탐색 방식입니다: {backend}")
+    if backend == 'pykrige':
+        # C 확장을 불러오지 못하면 pykrige가 스스로 순수 파이썬 구현(loop)으로 대체
+        n_closest_points = max(1, min(int(n_closest_points), len(ok.Z)))
+        estimates, variances = ok.execute('points', x, y, backend='C', n_closest_points=n_closest_points)
+        return np.asarray(estimates), np.asarray(variances)
+    return execute_local(ok, x, y, n_closest_points)
@@ -0,0 +1,78 @@
+"""asyncio 이벤트 루프 지연(lag) 측정
+
+일정 간격으로 잠들었다 깨어나는 태스크를 두고 예정된 깨어남 시각과 실제 시각의 차이를
+기록합니다. 맵 생성처럼 루프를 막는 작업이 있으면 그동안 웹 요청, 웹소켓 메시지 처리와
+함께 이 태스크도 늦게 깨어나므로 차이가 커집니다.
+"""
+import time
+import asyncio
+from collections import deque
+from typing import Any, Dict, Optional
+
+INTERVAL = 0.5  # 측정 간격 (초)
+STALL_THRESHOLD = 0.25  # 이보다 늦게 깨어나면 정체로 집계 (초)
+WINDOW = 120  # 상태 API에 보여줄 최근 측정 수 (약 1분)
+
+
+class LoopLagMonitor:
+    """이벤트 루프 지연을 측정하여 메트릭과 상태 API에 제공하는 클래스"""
+
+    def __init__(self, metrics, logger=None, interval: float = INTERVAL, stall_threshold: float = STALL_THRESHOLD):
+        self.metrics = metrics
+        self.logger = logger
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.stalls = 0
+        self.worst = {'lag': 0.0, 'at': None}  # 시작 후 최대 지연과 그 시각
+        self._recent = deque(maxlen=WINDOW)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """현재 실행 중인 이벤트 루프에서 측정을 시작합니다. (이미 실행 중이면 무시)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - scheduled))
+
+    def record(self, lag: float):
+        """측정값 하나를 기록합니다."""
+        self._recent.append(lag)
+        self.metrics.event_loop_lag.observe(lag)
+        self.metrics.event_loop_lag_max.set(max(self._recent))
+        if lag > self.worst['lag']:
+            self.worst = {'lag': lag, 'at': time.time()}
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            self.metrics.event_loop_stalls.inc()
+            if self.logger:
+                self.logger.warning("이벤트 루프 정체: 예정보다 %.3f초 늦게 실행됨", lag)
+
+    def status(self) -> Dict[str, Any]:
+        """최근 측정 구간의 지연 통계 (초)"""
+        recent = sorted(self._recent)
+        stats: Dict[str, Any] = {
+            'running': self._task is not None and not self._task.done(),
+            'interval': self.interval,
+            'stall_threshold': self.stall_threshold,
+            'samples': len(recent),
+            'stalls': self.stalls,
+            'worst': {'lag': round(self.worst['lag'], 4), 'at': self.worst['at']}
+        }
+        if recent:
+            stats.update({
+                'last': round(self._recent[-1], 4),
+                'mean': round(sum(recent) / len(recent), 4),
+                'p95': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 4),
+                'max': round(recent[-1], 4)
+            })
+        return stats
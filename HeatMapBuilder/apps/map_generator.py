@@ -1,33 +1,118 @@
 import os
 import re
+import json
 import time
+import hashlib
+import asyncio
+import shutil
+import tempfile
+import cProfile
+import pstats
+import functools
 from datetime import datetime
 from io import StringIO
+import multiprocessing
 from multiprocessing import Pool, cpu_count
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Dict, Tuple, Any, Optional
 
 import numpy as np  #type: ignore
 import matplotlib.pyplot as plt  #type: ignore
 import matplotlib.font_manager as fm  #type: ignore
-import matplotlib.patches as patches  #type: ignore
-from matplotlib.lines import Line2D  #type: ignore
-from matplotlib.patches import Circle, Rectangle, Polygon  #type: ignore
 from matplotlib.ticker import MaxNLocator  #type: ignore
+from matplotlib.figure import Figure  #type: ignore
+from matplotlib.backends.backend_agg import FigureCanvasAgg  #type: ignore
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes  #type: ignore
 import matplotlib.patheffects as path_effects  #type: ignore
-from scipy.interpolate import griddata, Rbf  #type: ignore
+from scipy.interpolate import griddata  #type: ignore
 import xml.etree.ElementTree as ET
 from shapely.geometry import Point, Polygon, MultiPolygon  #type: ignore
 from shapely.vectorized import contains  #type: ignore
-from pykrige.ok import OrdinaryKriging  #type: ignore
 import matplotlib #type: ignore
+from filelock import Timeout  #type: ignore
+from config_manager import ConfigManager
+from metrics import MetricsRegistry
+from grid_query import build_area_cells
+import interpolation
+import interpolation_tuner
+import geodesic
+import grid_payload
+from local_kriging import NEIGHBORHOOD_BACKENDS
+import process_memory
+import render_process
+from grid_history import GridHistory, DEFAULT_CAPACITY as DEFAULT_HISTORY_CAPACITY, sensor_capacity
+from sensor_markers import draw_markers, SensorLabels, marker_sprite, stamp_sprite, CROSS_LINE_WIDTH
+from image_output import (publish_image, publish_derived_images, render_rgba, encode_image, get_encoder_pool,
+                          derived_image_path)
 matplotlib.use('Agg')  # GUI 없는 백엔드 강제 사용
 plt.switch_backend('Agg')
 
+_font_configured = False
+
+GRID_RESOLUTION = 150  # 보간 격자 한 변의 점 수
+GRID_DTYPES = ('float32', 'float64')
+DEFAULT_GRID_DTYPE = 'float32'  # 센서값(소수 둘째 자리)과 1000 크기 좌표에는 float32로 충분
+DEFAULT_MEMORY_BUDGET_MB = 256  # 생성 하나의 보간 임시 배열 예산 (area 워커가 나눠 씀)
+# 배치 생성 워커는 스레드가 없는 forkserver에서 포크 (웹서버의 이벤트 루프/인코더/렌더링 스레드를 물려받지 않음)
+BATCH_START_METHOD = 'forkserver'
+
+_batch_worker: Optional[Tuple[ConfigManager, Any]] = None  # 배치 생성 워커 프로세스의 (설정 관리자, 로거)
+
+
+def _init_batch_worker(is_local: bool, config: Dict[str, Any]):
+    """배치 생성 워커 초기화: 설정 관리자와 로거를 작업마다 넘기지 않고 워커마다 한 번만 만듭니다."""
+    global _batch_worker
+    from custom_logger import CustomLogger
+    # 워커마다 렌더링 프로세스를 두지 않고 워커에서 렌더링
+    config_manager = ConfigManager(is_local, {**config, 'render_process': False})
+    logger = CustomLogger(log_file=config_manager.paths['log'],
+                          log_level=str(config.get('log_level', 'debug')).upper())
+    _batch_worker = (config_manager, logger)
+
+
+def setup_korean_font(logger):
+    """한글 폰트와 rcParams를 설정합니다.
+
+    rcParams는 프로세스 전역이므로 한 번만 설정하고, 이후 호출(오버레이용 생성기,
+    배치 작업 프로세스 등)은 바로 반환합니다. 포크된 작업 프로세스는 설정을 물려받습니다.
+    """
+    global _font_configured
+    if _font_configured:
+        return
+    try:
+        font_paths = [
+            '/usr/share/fonts/truetype/nanum/NanumGothic.ttf',  # Linux 나눔고딕
+        ]
+
+        font_found = False
+        for font_path in font_paths:
+            if os.path.exists(font_path):
+                # 폰트 추가
+                fm.fontManager.addfont(font_path)
+                # 기본 폰트 설정
+                plt.rcParams['font.family'] = 'NanumGothic'  # 폰트 이름으로 직접 설정
+                font_found = True
+                break
+
+        if not font_found:
+            logger.warning("한글 폰트를 찾을 수 없습니다. 기본 폰트를 사용합니다.")
+
+        # 마이너스 기호 깨짐 방지
+        plt.rcParams['axes.unicode_minus'] = False
+        _font_configured = True
+
+    except Exception as e:
+        logger.error(f"한글 폰트 설정 중 오류 발생: {str(e)}")
+
+
 class MapGenerator:
-    def __init__(self, config_manager, sensor_manager, logger):
+    def __init__(self, config_manager, sensor_manager, logger, metrics: Optional[MetricsRegistry] = None,
+                 grid_cache: Optional[Dict[str, Dict[str, Any]]] = None):
         """
         온도맵 생성기를 초기화합니다.
+
+        metrics를 주면 해당 레지스트리에 메트릭을 기록합니다. (LazyMapGenerator가 불러오기 전부터 사용)
+        grid_cache를 주면 해당 dict에 맵별 보간 격자를 저장합니다. (LazyMapGenerator와 공유)
         """
         self.logger = logger
         self.config_manager = config_manager
@@ -38,39 +123,39 @@ class MapGenerator:
         self.sensors_data = []
         self.parameters = {}
         self.gen_config = {}
+        self.unit = ''
+        self.sensor_attribute: Optional[str] = None  # 상태값 대신 사용할 센서 속성 (추가 레이어용)
+        self.layers: List[Dict[str, Any]] = []  # 추가 레이어 설정 (같은 area/격자로 다른 값을 그림)
+        self.interpolation_tuning: Dict[str, Any] = {}  # area별 보간 방법 자동 선택 결과
         
         self.areas: List[Dict[str, Any]] = []  # area 폴리곤과 속성 저장용 (polygon, is_exterior)
         self.area_sensors: Dict[int, List[Tuple[Point, float, str]]] = {}  # area별 센서 그룹
 
+        # 단계별 소요시간 메트릭 (여러 생성 실행에 걸쳐 누적)
+        self.metrics = metrics or MetricsRegistry()
+
+        # 맵별 마지막 보간 격자 (격자 데이터 API용)
+        self.grid_cache: Dict[str, Dict[str, Any]] = grid_cache if grid_cache is not None else {}
+
+        # 센서별 측지 거리장 (벽/센서 위치가 바뀔 때만 다시 계산)
+        self.geodesic_cache = geodesic.GeodesicFieldCache()
+
+        # 격자 dtype과 생성당 보간 메모리 예산 (애드온 옵션 grid_dtype, generation_memory_budget_mb)
+        options = getattr(config_manager, 'CONFIG', None) or {}
+        self.grid_dtype = options.get('grid_dtype') or DEFAULT_GRID_DTYPE
+        if self.grid_dtype not in GRID_DTYPES:
+            self.logger.warning("지원하지 않는 grid_dtype입니다: %s (%s 사용)", self.grid_dtype, DEFAULT_GRID_DTYPE)
+            self.grid_dtype = DEFAULT_GRID_DTYPE
+        self.memory_budget = int(options.get('generation_memory_budget_mb') or DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024
+        self._worker_peak_rss = 0  # 현재 생성에서 area 워커 프로세스의 최대 RSS (바이트)
+
         # 한글 폰트 설정
         self._setup_korean_font()
 
     def _setup_korean_font(self):
-        """한글 폰트를 설정합니다."""
-        try:
-            font_paths = [
-                '/usr/share/fonts/truetype/nanum/NanumGothic.ttf',  # Linux 나눔고딕
-            ]
-            
-            font_found = False
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    # 폰트 추가
-                    fm.fontManager.addfont(font_path)
-                    # 기본 폰트 설정
-                    plt.rcParams['font.family'] = 'NanumGothic'  # 폰트 이름으로 직접 설정
-                    font_found = True
-                    break
-            
-            if not font_found:
-                self.logger.warning("한글 폰트를 찾을 수 없습니다. 기본 폰트를 사용합니다.")
-                
-            # 마이너스 기호 깨짐 방지
-            plt.rcParams['axes.unicode_minus'] = False
-            
-        except Exception as e:
-            self.logger.error(f"한글 폰트 설정 중 오류 발생: {str(e)}")
-            
+        """한글 폰트를 설정합니다. (프로세스당 한 번만 수행)"""
+        setup_korean_font(self.logger)
+
     def _parse_svg_path(self, d: str) -> Optional[Polygon]:
         """
         SVG path의 d 속성을 파싱하여 Shapely Polygon 객체를 반환합니다.
@@ -177,7 +262,8 @@ class MapGenerator:
                 if polygon and polygon.is_valid:
                     self.areas.append({
                         'polygon': polygon,
-                        'is_exterior': is_exterior
+                        'is_exterior': is_exterior,
+                        'id': path.get('id')
                     })
                 else:
                     self.logger.warning(f"Path {i}: 유효한 폴리곤 생성 실패")
@@ -193,8 +279,12 @@ class MapGenerator:
             self.logger.error(traceback.format_exc())
             return [], None
 
-    async def _collect_sensor_data(self, states_dict: Dict[str, Dict[str, Any]]) -> Tuple[List[List[float]], List[float], List[str]]:
-        """센서 데이터를 수집하여 좌표, 온도값, 센서ID 리스트를 반환합니다."""
+    async def _collect_sensor_data(self, states_dict: Dict[str, Dict[str, Any]],
+                                   attribute: Optional[str] = None) -> Tuple[List[List[float]], List[float], List[str]]:
+        """센서 데이터를 수집하여 좌표, 온도값, 센서ID 리스트를 반환합니다.
+
+        attribute가 주어지면 상태값 대신 해당 속성값을 사용합니다. (예: 레이어의 humidity)
+        """
         points = []
         temperatures = []
         sensor_ids = []
@@ -216,7 +306,10 @@ class MapGenerator:
             
             try:
                 # 온도값 파싱 및 보정값 적용
-                raw_state = state.get('state', '0')  # 상태값을 state 키에서 가져옴
+                if attribute:
+                    raw_state = str(state.get('attributes', {}).get(attribute, 'unknown'))
+                else:
+                    raw_state = state.get('state', '0')  # 상태값을 state 키에서 가져옴
                 
                 # unavailable, unknown, N/A 등의 값 체크
                 if raw_state.lower() in ['unavailable', 'unknown', 'n/a', 'null', 'none']:
@@ -310,14 +403,45 @@ class MapGenerator:
     def _calculate_area_temperature_static(area_idx: int, area: Dict[str, Any], grid_points: np.ndarray,
                                        grid_x: np.ndarray, grid_y: np.ndarray, min_x: float, max_x: float,
                                        min_y: float, max_y: float, area_sensors: Dict[int, List[Tuple[Point, float, str]]],
-                                       parameters: Dict) -> np.ndarray:
-        """특정 area의 온도 분포를 계산합니다."""
+                                       parameters: Dict, area_mask: Optional[np.ndarray] = None,
+                                       info: Optional[Dict[str, Any]] = None,
+                                       geodesic_args: Optional[Dict[str, Any]] = None,
+                                       extras: Optional[Dict[str, Any]] = None,
+                                       memory_budget: Optional[int] = None) -> np.ndarray:
+        """특정 area의 온도 분포를 계산합니다.
+
+        area_mask가 주어지면 마스크를 다시 계산하지 않으며, info가 주어지면
+        실제로 사용된 보간 방법을 info['method']에 기록합니다.
+        geodesic_args ({'distances': (센서 수, area 격자점 수), 'temps', 'kernel', 'power'})가 주어지면
+        가우시안 보간은 직선 거리 대신 측지 거리의 kernel 가중 평균을 쓰고, 센서가 없는 area는
+        같은 kernel로 도달 가능한 센서값을 채웁니다.
+        extras가 주어지면 크리깅으로 계산된 area의 크리깅 분산을 extras['variance']에 기록합니다.
+        memory_budget(바이트)이 주어지면 보간 임시 배열이 예산을 넘지 않도록 격자점을 나눠 계산하며,
+        결과는 grid_x와 같은 dtype입니다.
+        """
+        if info is None:
+            info = {}
         try:
-            pmask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
-            area_mask = pmask.reshape(grid_x.shape)
+            if area_mask is None:
+                pmask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
+                area_mask = pmask.reshape(grid_x.shape)
             temps = np.full_like(grid_x[area_mask], np.nan)
             
+            size = min(max_x - min_x, max_y - min_y)
             if area_idx not in area_sensors:
+                if geodesic_args is not None:
+                    # 센서 없는 area: 문으로 이어진 센서들의 측지 거리 가중 평균 (닿지 않는 곳은 NaN)
+                    kernel = geodesic_args['kernel']
+                    distances = geodesic_args['distances']
+                    chunk_points = interpolation.chunk_size('gaussian', len(distances), parameters, memory_budget)
+                    temps = interpolation.evaluate_in_chunks(
+                        lambda part: geodesic.kernel_values(distances[:, part], geodesic_args['temps'], kernel,
+                                                            size / parameters['gaussian']['sigma_factor'],
+                                                            geodesic_args.get('power', 2.0)),
+                        distances.shape[1], chunk_points).astype(grid_x.dtype, copy=False)
+                    info['method'] = f'geodesic_{kernel}' if np.any(np.isfinite(temps)) else 'none'
+                    return temps
+                info['method'] = 'none'
                 return temps
             
             # 센서가 있는 area
@@ -326,71 +450,41 @@ class MapGenerator:
             sensor_temps = np.array([t for _, t, _ in sensors])
             mask_points = grid_points[area_mask.flatten()]
             
-            # 가우시안 분포 계산 함수
-            def calculate_gaussian_distribution(points, locs, temps, sigma):
-                weighted_temps = np.zeros_like(points[:, 0])
-                weight_sum = np.zeros_like(points[:, 0])
-                
-                for loc, temp in zip(locs, temps):
-                    distances = np.sqrt(np.sum((points - loc) ** 2, axis=1))
-                    weights = np.exp(-(distances ** 2) / (2 * sigma ** 2))
-                    weighted_temps += weights * temp
-                    weight_sum += weights
-                
-                return weighted_temps / (weight_sum + 1e-10)
-            
             # 센서 개수에 따른 처리
             sensor_count = len(sensors)
-            area_width = max_x - min_x
-            area_height = max_y - min_y
-            
-            # 가우시안 sigma 계산
-            sigma = min(area_width, area_height) / parameters['gaussian']['sigma_factor']
+            tuned_method = parameters.get('method')
+            distances, kernel_args = None, {}
+            if geodesic_args is not None:
+                distances = geodesic_args['distances']
+                kernel_args = {'kernel': geodesic_args['kernel'], 'power': geodesic_args.get('power', 2.0)}
+
+            def run(method):
+                return interpolation.interpolate(method, mask_points, sensor_locs, sensor_temps, parameters, size,
+                                                 distances, extras, memory_budget, **kernel_args)
             
             if sensor_count == 1:  # 단일 센서: 단일값 적용
                 temps = np.full_like(mask_points[:, 0], sensor_temps[0])
+                info['method'] = 'single'
+            elif tuned_method:
+                # 자동 선택(교차 검증)으로 정해진 방법 하나만 실행
+                try:
+                    temps, info['method'] = run(tuned_method)
+                except Exception:
+                    temps, info['method'] = run('gaussian')
+                    info['fallback_from'] = tuned_method
             elif sensor_count <= 3:
                 try:
-                    rbf = Rbf(sensor_locs[:, 0], sensor_locs[:, 1], sensor_temps,
-                            function=parameters['rbf']['function'],
-                            epsilon=min(area_width, area_height) / parameters['rbf']['epsilon_factor'])
-                    temps = rbf(mask_points[:, 0], mask_points[:, 1])
-                    temp_min, temp_max = np.min(sensor_temps), np.max(sensor_temps)
-                    margin = 0.1 * (temp_max - temp_min)
-                    temps = np.clip(temps, temp_min - margin, temp_max + margin)
+                    temps, info['method'] = run('rbf')
                 except Exception:
-                    temps = calculate_gaussian_distribution(mask_points, sensor_locs, sensor_temps, sigma)
+                    temps, info['method'] = run('gaussian')
             else:
                 try:
-                    unique_locs = {}
-                    for loc, temp in zip(sensor_locs, sensor_temps):
-                        key = (loc[0], loc[1])
-                        if key not in unique_locs:
-                            unique_locs[key] = []
-                        unique_locs[key].append(temp)
-                    unique_sensor_locs = np.array(list(unique_locs.keys()))
-                    unique_sensor_temps = np.array([np.mean(temps) for temps in unique_locs.values()])
-                    ok = OrdinaryKriging(
-                        unique_sensor_locs[:, 0],
-                        unique_sensor_locs[:, 1],
-                        unique_sensor_temps,
-                        **parameters['kriging']
-                    )
-                    temps, _ = ok.execute('points', mask_points[:, 0], mask_points[:, 1])
-                    temp_min, temp_max = np.min(sensor_temps), np.max(sensor_temps)
-                    margin = 0.5 * (temp_max - temp_min)
-                    temps = np.clip(temps, temp_min - margin, temp_max + margin)
+                    temps, info['method'] = run('kriging')
                 except Exception:
                     try:
-                        rbf = Rbf(sensor_locs[:, 0], sensor_locs[:, 1], sensor_temps,
-                                function=parameters['rbf']['function'],
-                                epsilon=min(area_width, area_height) / parameters['rbf']['epsilon_factor'])
-                        temps = rbf(mask_points[:, 0], mask_points[:, 1])
-                        temp_min, temp_max = np.min(sensor_temps), np.max(sensor_temps)
-                        margin = 0.1 * (temp_max - temp_min)
-                        temps = np.clip(temps, temp_min - margin, temp_max + margin)
+                        temps, info['method'] = run('rbf')
                     except Exception:
-                        temps = calculate_gaussian_distribution(mask_points, sensor_locs, sensor_temps, sigma)
+                        temps, info['method'] = run('gaussian')
             
             if np.any(np.isnan(temps)):
                 nearest_temps = griddata(sensor_locs, sensor_temps, mask_points, method='nearest')
@@ -399,30 +493,121 @@ class MapGenerator:
             return temps
             
         except Exception as e:
+            info['method'] = 'error'
             return np.full_like(grid_x[area_mask], np.nan)
 
     @staticmethod
-    def _process_area_static(args: Tuple[int, Dict[str, Any], np.ndarray, np.ndarray, np.ndarray, float, float, float, float, Dict[int, List[Tuple[Point, float, str]]], Dict]) -> Tuple[int, np.ndarray, np.ndarray]:
-        """멀티프로세싱용 area 처리 함수"""
-        area_idx, area, grid_points, grid_x, grid_y, min_x, max_x, min_y, max_y, area_sensors, parameters = args
+    def _process_area_static(args: Tuple[int, Dict[str, Any], Dict[str, Any], float, float, float, float, Dict[int, List[Tuple[Point, float, str]]], Dict, Optional[np.ndarray], Optional[Dict[str, Any]]]) -> Tuple[int, np.ndarray, np.ndarray, Dict[str, Any], Optional[np.ndarray]]:
+        """멀티프로세싱용 area 처리 함수 (이전 레이어의 area 마스크를 받으면 재사용, 마지막 인자는 측지 거리 인자)
+
+        격자 배열은 작업마다 복사해 넘기지 않고 grid_options({'dtype', 'memory_budget', 'pooled'})로
+        프로세스 안에서 만든 격자(캐시)를 사용합니다. pooled이면 area별 최대 RSS를 timing['peak_rss']에 기록합니다.
+
+        Returns:
+            (area 인덱스, area 온도값, area 마스크, 단계별 소요시간 및 보간 방법, 크리깅 분산(크리깅 area만))
+        """
+        (area_idx, area, grid_options, min_x, max_x, min_y, max_y, area_sensors, parameters, area_mask,
+         geodesic_args) = args
         
         try:
+            timing: Dict[str, Any] = {'area': area_idx}
+            # 풀 워커에서만 초기화 (순차 처리는 메인 프로세스의 생성 단위 측정을 유지)
+            measure_memory = grid_options.get('pooled') and process_memory.reset_peak()
+            grid_x, grid_y, grid_points, _ = MapGenerator._build_grid(grid_options['dtype'])
+
+            # area 마스크 생성 (이전 레이어에서 만든 마스크가 있으면 재사용)
+            if area_mask is None:
+                stage_start = time.time()
+                pmask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
+                area_mask = pmask.reshape(grid_x.shape)
+                timing['mask_build'] = time.time() - stage_start
+
+            stage_start = time.time()
+            extras: Dict[str, Any] = {}
             area_temps = MapGenerator._calculate_area_temperature_static(
                 area_idx, area, grid_points, grid_x, grid_y,
-                min_x, max_x, min_y, max_y, area_sensors, parameters
+                min_x, max_x, min_y, max_y, area_sensors, parameters,
+                area_mask=area_mask, info=timing, geodesic_args=geodesic_args, extras=extras,
+                memory_budget=grid_options.get('memory_budget')
             )
+            timing['interpolation'] = time.time() - stage_start
+            if 'chunks' in extras:
+                timing['chunks'] = extras['chunks']
+            if measure_memory:
+                timing['peak_rss'] = process_memory.peak_rss_bytes()
             
-            # area 마스크 생성
-            pmask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
-            area_mask = pmask.reshape(grid_x.shape)
-            
-            return area_idx, area_temps, area_mask
+            return area_idx, area_temps, area_mask, timing, extras.get('variance')
             
         except Exception as e:
             import traceback
             print(traceback.format_exc())  # 프로세스 내부 로그
             raise
 
+    @staticmethod
+    def _generate_map_static(args: Tuple[str, str, List[Dict], Dict[str, float], bool, int]) -> Dict[str, Any]:
+        """멀티프로세싱용 맵 생성 함수 (배치 생성 시 맵 하나를 담당, _init_batch_worker로 초기화된 워커에서 실행)"""
+        map_id, output_path, states, timings, rotate, processes = args
+        start_time = time.time()
+
+        try:
+            config_manager, logger = _batch_worker
+            # 작업마다 독립된 생성기 사용 (부모의 인스턴스 상태와 공유하지 않음)
+            generator = MapGenerator(config_manager, None, logger)
+            result = asyncio.run(generator.generate(map_id, output_path, states=states, processes=processes,
+                                                    timings=timings, rotate=rotate))
+            # 부모 프로세스의 격자 캐시를 갱신할 수 있도록 (레이어 포함) 격자를 함께 반환
+            if generator.grid_cache:
+                result['grids'] = generator.grid_cache
+        except Exception as e:
+            import traceback
+            print(traceback.format_exc())  # 프로세스 내부 로그
+            result = {'success': False, 'error': str(e), 'time': '', 'duration': ''}
+
+        result['map_id'] = map_id
+        result['elapsed'] = time.time() - start_time
+        return result
+
+    @staticmethod
+    def _process_area_profiled_static(args: Tuple[str, Tuple]) -> Tuple[int, np.ndarray, np.ndarray, Dict[str, Any], Optional[np.ndarray]]:
+        """프로파일링 모드용 area 처리 함수. 워커의 cProfile 결과를 파일로 저장합니다."""
+        profile_dir, area_args = args
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return MapGenerator._process_area_static(area_args)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(profile_dir, f'area_{area_args[0]}_{os.getpid()}.prof'))
+
+    def _save_profile(self, map_id: str, output_path: str, profiler: cProfile.Profile,
+                      worker_profile_dir: str, top_n: int) -> Dict[str, Any]:
+        """메인 프로세스와 area 워커의 프로파일 결과를 병합하여 저장합니다.
+
+        Returns:
+            Dict[str, Any]: {'url': .prof 다운로드 URL, 'summary_url': 요약 URL, 'summary': 상위 N개 요약}
+        """
+        summary_io = StringIO()
+        stats = pstats.Stats(profiler, stream=summary_io)
+        for filename in sorted(os.listdir(worker_profile_dir)):
+            stats.add(os.path.join(worker_profile_dir, filename))
+
+        output_dir = os.path.dirname(output_path)
+        profile_path = os.path.join(output_dir, 'profile.prof')
+        summary_path = os.path.join(output_dir, 'profile.txt')
+        stats.dump_stats(profile_path)
+
+        stats.sort_stats('cumulative').print_stats(top_n)
+        summary = summary_io.getvalue()
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(summary)
+
+        self.logger.debug(f"프로파일 저장 완료: {profile_path}")
+        return {
+            'url': f'/local/HeatMapBuilder/{map_id}/profile.prof',
+            'summary_url': f'/local/HeatMapBuilder/{map_id}/profile.txt',
+            'summary': summary
+        }
+
     def _get_polygon_coords(self, geom) -> List[Tuple[np.ndarray, np.ndarray]]:
         """폴리곤 또는 멀티폴리곤에서 좌표를 추출합니다."""
         coords = []
@@ -438,180 +623,282 @@ class MapGenerator:
         self.configs = self.config_manager.db.get_map(map_id)
         self.walls_data = self.configs.get('walls', '')
         self.sensors_data = self.configs.get('sensors', [])
-        self.parameters = self.configs.get('parameters', {})
+        self.parameters = self._check_parameters(self.configs.get('parameters', {}))
         self.gen_config = self.configs.get('gen_config', {})
         self.unit = self.configs.get('unit', '')
+        self.sensor_attribute = None  # 기본 레이어는 센서 상태값 사용
+        self.layers = self._load_layers(self.configs.get('layers', []))
+        self.interpolation_tuning = self.configs.get('interpolation_tuning') or {}
+
+    def _check_parameters(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """보간 parameters 중 알 수 없는 값을 경고하고 기본값으로 바꿉니다."""
+        kriging = parameters.get('kriging', {})
+        backend = kriging.get('neighborhood_backend', 'kdtree')
+        if backend not in NEIGHBORHOOD_BACKENDS:
+            self.logger.warning("알 수 없는 크리깅 이웃 탐색 방식이라 kdtree를 사용합니다: %s",
+                                self.logger._colorize(backend, "red"))
+            parameters = {**parameters, 'kriging': {**kriging, 'neighborhood_backend': 'kdtree'}}
+        return parameters
+
+    def _load_layers(self, layers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """맵 설정의 추가 레이어 목록을 검증하여 반환합니다.
 
-    def save_generation_time(self, map_id: str, generation_time: str, generation_duration: str):
-        """생성 시간 저장"""
+        레이어 설정:
+            id: 레이어 ID (영문, 숫자, _, -) - 출력 파일명에 사용
+            unit: 단위
+            attribute: 상태값 대신 사용할 센서 속성 이름 (선택)
+            sensors: 맵 sensors와 같은 형식의 센서 목록 (선택, 없으면 맵 센서 사용)
+            colorbar: gen_config.colorbar를 덮어쓸 설정 (선택, 기본값은 auto_range와 레이어 단위 label)
+        """
+        valid_layers = []
+        for layer in layers or []:
+            layer_id = str(layer.get('id', ''))
+            if not re.fullmatch(r'[A-Za-z0-9_-]+', layer_id):
+                self.logger.warning("레이어 ID가 유효하지 않아 건너뜁니다: %s",
+                                    self.logger._colorize(layer_id, "red"))
+                continue
+            if any(existing['id'] == layer_id for existing in valid_layers):
+                self.logger.warning("중복된 레이어 ID를 건너뜁니다: %s",
+                                    self.logger._colorize(layer_id, "red"))
+                continue
+            valid_layers.append({**layer, 'id': layer_id})
+        return valid_layers
+
+    def _area_parameters(self, area_idx: int, area: Dict[str, Any]) -> Dict:
+        """area에 적용할 보간 parameters를 반환합니다.
+
+        기본 레이어이고 자동 선택 결과가 현재 area 모양/센서 구성과 일치하면 선택된 방법 하나만
+        실행하도록 method를 지정하고, 아니면 맵 parameters를 그대로 반환합니다.
+        """
+        tuned = self.interpolation_tuning.get('areas', {}).get(str(area_idx))
+        if not tuned or self.sensor_attribute is not None or area_idx not in self.area_sensors:
+            return self.parameters
+        if tuned.get('signature') != interpolation_tuner.area_signature(area, self.area_sensors[area_idx]):
+            return self.parameters
+        return interpolation_tuner.area_parameters(self.parameters, tuned)
+
+    def _geodesic_fields(self, map_id: str, grid_x: np.ndarray, grid_y: np.ndarray, grid_points: np.ndarray,
+                         area_masks: Dict[int, np.ndarray]) -> Optional[Dict[str, Any]]:
+        """맵 센서 위치별 측지 거리장을 반환합니다. (벽 데이터/센서 위치가 같으면 캐시 사용)
+
+        area_masks에 없는 area의 마스크는 새로 만들어 채웁니다. (area 작업에 넘길 거리를 자르는 데 사용)
+
+        Returns:
+            {'sensor_ids': [...], 'fields': (센서 수, H, W)} 또는 측지 거리 미사용/실패 시 None
+        """
+        if not self.parameters.get('geodesic', {}).get('enabled'):
+            return None
+        try:
+            sources = {sensor['entity_id']: (float(sensor['position']['x']), float(sensor['position']['y']))
+                       for sensor in self.sensors_data if sensor.get('entity_id') and 'position' in sensor}
+            # area별 거리는 마스크로 잘라서 넘기므로 캐시를 쓰더라도 마스크는 필요
+            for area_idx, area in enumerate(self.areas):
+                if area_idx not in area_masks:
+                    pmask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
+                    area_masks[area_idx] = pmask.reshape(grid_x.shape)
+
+            key = geodesic.field_key(self.walls_data, sources, grid_x.shape)
+            directory = self.config_manager.get_geodesic_dir(map_id)
+            entry = self.geodesic_cache.get(directory, key)
+            if entry is not None:
+                return entry
+
+            passable = geodesic.passable_mask(
+                grid_x, grid_y, [area_masks[area_idx] for area_idx, area in enumerate(self.areas) if not area['is_exterior']],
+                geodesic.parse_wall_segments(self.walls_data))
+            sensor_ids = list(sources)
+            fields = geodesic.distance_fields(grid_x, grid_y, passable,
+                                              np.array([sources[sensor_id] for sensor_id in sensor_ids]).reshape(-1, 2))
+            self.logger.debug("측지 거리장 계산 완료: 센서 %s개, 통과 가능 격자 %s칸",
+                              self.logger._colorize(len(sensor_ids), "green"),
+                              self.logger._colorize(int(passable.sum()), "blue"))
+            return self.geodesic_cache.put(directory, key, sensor_ids, fields)
+        except Exception as e:
+            self.logger.error(f"측지 거리장 계산 중 오류 발생: {str(e)}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            return None
+
+    def _area_geodesic_args(self, area_idx: int, area: Dict[str, Any], area_mask: Optional[np.ndarray],
+                            fields: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """area 처리 작업에 넘길 측지 거리 인자 (area 격자점의 거리만 잘라서 전달)
+
+        센서가 있는 area는 area 센서 순서대로, 센서가 없는 실내 area는 모든 센서의 거리를 넘깁니다.
+        """
+        if fields is None or area_mask is None or area['is_exterior']:
+            return None
+        if area_idx in self.area_sensors:
+            sensors = self.area_sensors[area_idx]
+        else:
+            sensors = [sensor for sensors in self.area_sensors.values() for sensor in sensors]
+        rows = {sensor_id: row for row, sensor_id in enumerate(fields['sensor_ids'])}
+        if not sensors or any(sensor_id not in rows for _, _, sensor_id in sensors):
+            return None
+        geodesic_config = self.parameters.get('geodesic', {})
+        return {
+            'distances': fields['fields'][[rows[sensor_id] for _, _, sensor_id in sensors]][:, area_mask],
+            'temps': np.array([temp for _, temp, _ in sensors], dtype=float),
+            'kernel': geodesic_config.get('kernel', 'gaussian'),
+            'power': float(geodesic_config.get('power', 2.0))
+        }
+
+    grid_key = staticmethod(grid_payload.grid_key)
+
+    def drop_grids(self, map_id: str):
+        """맵의 모든 레이어 격자를 캐시에서 제거합니다."""
+        grid_payload.drop_map_grids(self.grid_cache, map_id)
+
+    def _append_history(self, map_id: str, version: int, grid: Dict[str, Any],
+                        bounds: Tuple[float, float, float, float]):
+        """격자와 센서 값을 맵의 격자 기록(grid_history)에 추가합니다. 실패해도 생성은 계속됩니다."""
+        history_config = self.gen_config.get('history', {})
+        if not map_id or not history_config.get('enabled', True):
+            return
+        try:
+            capacity = int(history_config.get('capacity', DEFAULT_HISTORY_CAPACITY))
+            with GridHistory.open_or_create(self.config_manager.get_history_path(map_id), capacity,
+                                            grid['grid_z'].shape, bounds,
+                                            max_sensors=sensor_capacity(len(grid['sensor_values']))) as history:
+                dropped = history.append(version, grid['grid_z'], grid['sensor_values'])
+            if dropped:
+                self.logger.warning(f"격자 기록의 센서 목록이 가득 차 센서 {len(dropped)}개의 값을 기록하지 않았습니다: "
+                                    f"{', '.join(dropped[:5])}{' 등' if len(dropped) > 5 else ''}")
+        except Exception as e:
+            self.logger.error(f"격자 기록 저장 중 오류 발생: {str(e)}")
+
+    def save_generation_time(self, map_id: str, generation_time: str, generation_duration: str,
+                             timings: Optional[Dict[str, float]] = None,
+                             area_timings: Optional[List[Dict[str, Any]]] = None,
+                             layers: Optional[Dict[str, Dict[str, Any]]] = None,
+                             output: Optional[Dict[str, Any]] = None,
+                             memory: Optional[Dict[str, Any]] = None):
+        """생성 시간 및 단계별 소요시간 저장 (추가 레이어가 있으면 레이어별 결과, 출력 이미지/메모리 사용량 정보 포함)"""
         if not map_id:
             return
-        map_data = self.config_manager.db.get_map(map_id)
-        map_data['last_generation'] = {
-            'timestamp': generation_time,
-            'duration': generation_duration
-        }
-        # 이미지 URL 업데이트
-        output_filename = self.config_manager.get_output_filename(map_id)
-        timestamp = datetime.now().timestamp()
-        map_data['img_url'] = f'/local/HeatMapBuilder/{map_id}/{output_filename}?{timestamp}'
+        # 읽기-수정-쓰기 사이에 다른 프로세스의 맵 설정 저장이 끼어들지 않도록 DB 락 유지 (재진입 가능)
+        with self.config_manager.db.lock:
+            map_data = self.config_manager.db.get_map(map_id)
+            map_data['last_generation'] = {
+                'timestamp': generation_time,
+                'duration': generation_duration,
+                'timings': timings or {},
+                'area_timings': area_timings or []
+            }
+            if layers:
+                map_data['last_generation']['layers'] = layers
+            if output:
+                map_data['last_generation']['output'] = output
+            if memory:
+                map_data['last_generation']['memory'] = memory
+            map_data['derived_urls'] = self.config_manager.get_derived_urls(map_id)
+            # 이미지 URL 업데이트 (내용 해시 기반이므로 이미지가 바뀔 때만 URL이 바뀜)
+            output_filename = self.config_manager.get_output_filename(map_id)
+            map_data['img_url'] = self.config_manager.get_versioned_url(map_id, output_filename)
         
-        self.config_manager.db.save(map_id, map_data)
+            self.config_manager.db.save(map_id, map_data)
 
-    def _create_sensor_marker(self, point, temperature, sensor_id, state):
-        """센서 마커를 생성합니다."""
-        try:
-            # 센서 표시 설정 가져오기
-            sensor_display = self.gen_config.get('visualization', {}).get('sensor_display', 'position_temp')
-            sensor_info_bg = self.gen_config.get('visualization', {}).get('sensor_info_bg', {})
-            sensor_marker = self.gen_config.get('visualization', {}).get('sensor_marker', {})
-            sensor_name = self.gen_config.get('visualization', {}).get('sensor_name', {})
-            sensor_temp = self.gen_config.get('visualization', {}).get('sensor_temp', {})
-
-            # 마커 스타일 설정
-            marker_style = sensor_marker.get('style', 'circle')
-            marker_size = sensor_marker.get('size', 10)
-            marker_color = sensor_marker.get('color', '#FF0000')
-
-            # 마커 생성
-            if marker_style == 'circle':
-                marker = Circle((point[0], point[1]), marker_size/2)
-                marker.set_facecolor(marker_color)
-                marker.set_zorder(5)
-            elif marker_style == 'square':
-                marker = Rectangle((point[0]-marker_size/2, point[1]-marker_size/2), marker_size, marker_size)
-                marker.set_facecolor(marker_color)
-                marker.set_zorder(5)
-            elif marker_style == 'triangle':
-                vertices = np.array([
-                    [point[0], point[1]-marker_size/2],
-                    [point[0]+marker_size/2, point[1]+marker_size/2],
-                    [point[0]-marker_size/2, point[1]+marker_size/2]
-                ])
-                marker = patches.Polygon(vertices, fc=marker_color)
-                marker.set_zorder(5)
-            elif marker_style == 'star':
-                vertices = []
-                for i in range(5):
-                    angle = (i * 72 - 90) * np.pi / 180
-                    vertices.append([point[0] + marker_size * np.cos(angle),
-                                   point[1] + marker_size * np.sin(angle)])
-                    inner_angle = ((i * 72 + 36) - 90) * np.pi / 180
-                    vertices.append([point[0] + marker_size * 0.4 * np.cos(inner_angle),
-                                   point[1] + marker_size * 0.4 * np.sin(inner_angle)])
-                marker = patches.Polygon(np.array(vertices), fc=marker_color)
-                marker.set_zorder(5)
-            elif marker_style == 'cross':
-                marker = Line2D([point[0]-marker_size/2, point[0]+marker_size/2],
-                              [point[1], point[1]], color=marker_color)
-                marker.set_zorder(5)
-                marker2 = Line2D([point[0], point[0]],
-                               [point[1]-marker_size/2, point[1]+marker_size/2],
-                               color=marker_color)
-                marker2.set_zorder(5)
-                plt.gca().add_artist(marker2)
-            else:
-                marker = Circle((point[0], point[1]), marker_size/2)
-                marker.set_facecolor(marker_color)
-                marker.set_zorder(5)
+    def _resolve_sensor_style(self) -> Dict[str, Any]:
+        """센서 마커/레이블 스타일을 맵 설정에서 한 번에 읽어 반환합니다."""
+        visualization = self.gen_config.get('visualization', {})
+        sensor_display = visualization.get('sensor_display', 'position_temp')
+        sensor_info_bg = visualization.get('sensor_info_bg', {})
+        sensor_marker = visualization.get('sensor_marker', {})
+        sensor_font = visualization.get('sensor_font', {})
 
-            plt.gca().add_artist(marker)
+        marker_size = sensor_marker.get('size', 10)
+        style: Dict[str, Any] = {
+            'display': sensor_display,
+            'marker_style': sensor_marker.get('style', 'circle'),
+            'marker_size': marker_size,
+            'marker_color': sensor_marker.get('color', '#FF0000'),
+            'show_name': 'name' in sensor_display,
+            'show_temp': 'temp' in sensor_display,
+        }
+        style['show_label'] = sensor_display not in ('none', 'position') and (style['show_name'] or style['show_temp'])
+        if not style['show_label']:
+            return style
 
-            # 텍스트 표시 설정
-            if sensor_display != 'none' and sensor_display != 'position':
-                name = state.get('attributes', {}).get('friendly_name', sensor_id.split('.')[-1])
-                text = ''
-                
-                # 폰트 설정
-                font_size = self.gen_config.get('visualization', {}).get('sensor_font', {}).get('font_size', 12)
-                font_color = self.gen_config.get('visualization', {}).get('sensor_font', {}).get('color', '#000000')
-                
-                if 'name' in sensor_display:
-                    text = name
-                
-                if 'temp' in sensor_display:
-                    if text:
-                        text += '\n'
-                    text += f'{temperature:.1f}{self.unit}'
-
-                # 텍스트 줄 수 계산 (줄바꿈 기준)
-                line_count = text.count('\n') + 1
-
-                # 배경 설정
-                bg_color = sensor_info_bg.get('color', '#FFFFFF')
-                bg_opacity = sensor_info_bg.get('opacity', 70) / 100
-                bg_padding = sensor_info_bg.get('padding', 5)
-                bg_border_radius = sensor_info_bg.get('border_radius', 4)
-                bg_border_width = sensor_info_bg.get('border_width', 1)
-                bg_border_color = sensor_info_bg.get('border_color', '#000000')
-                bg_position = sensor_info_bg.get('position', 'right')
-                bg_distance = sensor_info_bg.get('distance', 10)
-
-                # 텍스트 위치 계산
-                text_x, text_y = point[0], point[1]
-                if bg_position == 'right':
-                    text_x = point[0] + marker_size/2 + bg_distance
-                    text_y = point[1]
-                elif bg_position == 'left':
-                    text_x = point[0] - marker_size/2 - bg_distance
-                    text_y = point[1]
-                elif bg_position == 'top':
-                    text_x = point[0]
-                    text_y = point[1] - marker_size/2 - bg_distance
-                elif bg_position == 'bottom':
-                    text_x = point[0]
-                    text_y = point[1] + marker_size/2 + bg_distance
-                elif bg_position == 'top-right':
-                    text_x = point[0] + marker_size/2 + bg_distance/1.4
-                    text_y = point[1] - marker_size/2 - bg_distance/1.4
-                elif bg_position == 'top-left':
-                    text_x = point[0] - marker_size/2 - bg_distance/1.4
-                    text_y = point[1] - marker_size/2 - bg_distance/1.4
-                elif bg_position == 'bottom-right':
-                    text_x = point[0] + marker_size/2 + bg_distance/1.4
-                    text_y = point[1] + marker_size/2 + bg_distance/1.4
-                elif bg_position == 'bottom-left':
-                    text_x = point[0] - marker_size/2 - bg_distance/1.4
-                    text_y = point[1] + marker_size/2 + bg_distance/1.4
-
-                # 텍스트 정렬 설정
-                halign = 'center'
-                valign = 'center'
-                if 'right' in bg_position:
-                    halign = 'left'
-                elif 'left' in bg_position:
-                    halign = 'right'
-                if 'top' in bg_position:
-                    valign = 'bottom'
-                elif 'bottom' in bg_position:
-                    valign = 'top'
-                
-                # 박스 높이 계산 (줄 수 기준)
-                # 한 줄당 높이는 약 font_size의 1.2배로 계산
-                box_height = (font_size * 1.2 * line_count) + (bg_padding * 2)
-                
-                # 텍스트 추가
-                plt.text(text_x, text_y, text,
-                        horizontalalignment=halign,
-                        verticalalignment=valign,
-                        fontsize=font_size,
-                        color=font_color,
-                        bbox=dict(
-                            facecolor=bg_color,
-                            alpha=bg_opacity,
-                            edgecolor=bg_border_color if bg_border_width > 0 else 'none',
-                            linewidth=bg_border_width,
-                            pad=bg_padding,
-                            # 둥글기 최대값: 박스 높이의 1/2로 제한
-                            # 줄 수에 따라 박스 높이 계산: (폰트 크기 * 1.2 * 줄 수) + 패딩*2
-                            # 둥글기 최대값 = 박스 높이의 1/2
-                            # boxstyle의 rounding_size는 상대적 비율이므로 10으로 나눠서 적용
-                            boxstyle='square,pad={:.1f}'.format(bg_padding/10) if bg_border_radius == 0 else 'round,pad={:.1f},rounding_size={:.1f}'.format(bg_padding/10, min(bg_border_radius/10, box_height/20))
-                        ),
-                        zorder=6)
+        # 배경 설정
+        bg_color = sensor_info_bg.get('color', '#FFFFFF')
+        bg_opacity = sensor_info_bg.get('opacity', 70) / 100
+        bg_padding = sensor_info_bg.get('padding', 5)
+        bg_border_radius = sensor_info_bg.get('border_radius', 4)
+        bg_border_width = sensor_info_bg.get('border_width', 1)
+        bg_border_color = sensor_info_bg.get('border_color', '#000000')
+        bg_position = sensor_info_bg.get('position', 'right')
+        bg_distance = sensor_info_bg.get('distance', 10)
 
-        except Exception as e:
-            self.logger.error(f"센서 마커 생성 중 오류 발생: {str(e)}")
+        # 마커 중심에서 텍스트 위치까지의 거리
+        half = marker_size / 2
+        diagonal = bg_distance / 1.4
+        style['label_offset'] = {
+            'right': (half + bg_distance, 0),
+            'left': (-half - bg_distance, 0),
+            'top': (0, -half - bg_distance),
+            'bottom': (0, half + bg_distance),
+            'top-right': (half + diagonal, -half - diagonal),
+            'top-left': (-half - diagonal, -half - diagonal),
+            'bottom-right': (half + diagonal, half + diagonal),
+            'bottom-left': (-half - diagonal, half + diagonal),
+        }.get(bg_position, (0, 0))
+
+        # 텍스트 정렬 설정
+        halign = 'center'
+        valign = 'center'
+        if 'right' in bg_position:
+            halign = 'left'
+        elif 'left' in bg_position:
+            halign = 'right'
+        if 'top' in bg_position:
+            valign = 'bottom'
+        elif 'bottom' in bg_position:
+            valign = 'top'
+
+        # 박스 높이 계산 (줄 수 기준)
+        # 한 줄당 높이는 약 font_size의 1.2배로 계산
+        font_size = sensor_font.get('font_size', 12)
+        line_count = 2 if style['show_name'] and style['show_temp'] else 1
+        box_height = (font_size * 1.2 * line_count) + (bg_padding * 2)
+
+        style['text'] = {
+            'horizontalalignment': halign,
+            'verticalalignment': valign,
+            'fontsize': font_size,
+            'color': sensor_font.get('color', '#000000'),
+            'bbox': dict(
+                facecolor=bg_color,
+                alpha=bg_opacity,
+                edgecolor=bg_border_color if bg_border_width > 0 else 'none',
+                linewidth=bg_border_width,
+                pad=bg_padding,
+                # 둥글기 최대값: 박스 높이의 1/2로 제한
+                # boxstyle의 rounding_size는 상대적 비율이므로 10으로 나눠서 적용
+                boxstyle='square,pad={:.1f}'.format(bg_padding/10) if bg_border_radius == 0 else 'round,pad={:.1f},rounding_size={:.1f}'.format(bg_padding/10, min(bg_border_radius/10, box_height/20))
+            )
+        }
+        return style
+
+    def _draw_sensors(self, ax, sensor_points, raw_temps, sensor_ids, states_dict):
+        """센서 마커와 레이블을 일괄로 그립니다. (마커 전체 = 아티스트 1개, 레이블 전체 = 아티스트 1개)"""
+        style = self._resolve_sensor_style()
+        if style['display'] == 'none' or len(sensor_points) == 0:
+            return
+
+        draw_markers(ax, sensor_points, style['marker_style'], style['marker_size'], style['marker_color'])
+
+        if not style['show_label']:
+            return
+        dx, dy = style['label_offset']
+        labels = []
+        for point, temperature, sensor_id in zip(sensor_points, raw_temps, sensor_ids):
+            lines = []
+            if style['show_name']:
+                state = states_dict.get(sensor_id, {})
+                lines.append(state.get('attributes', {}).get('friendly_name', sensor_id.split('.')[-1]))
+            if style['show_temp']:
+                lines.append(f'{temperature:.1f}{self.unit}')
+            labels.append((point[0] + dx, point[1] + dy, '\n'.join(lines)))
+        ax.add_artist(SensorLabels(labels, **style['text']))
 
     def _calculate_temperature_range(self,temperatures, colorbar_config):
         """자동 범위 설정이 활성화된 경우 센서 데이터를 기반으로 온도 범위를 계산합니다."""
@@ -621,7 +908,8 @@ class MapGenerator:
         min_temp = min(temperatures)
         max_temp = max(temperatures)
         temp_range = max_temp - min_temp
-        padding = temp_range * 0.1
+        # 센서가 하나이거나 값이 모두 같으면 범위가 0이 되어 등고선 레벨을 만들 수 없으므로 최소 여백 적용
+        padding = temp_range * 0.1 if temp_range > 0 else 0.5
         
         return min_temp - padding, max_temp + padding
 
@@ -707,21 +995,111 @@ class MapGenerator:
 
         cbar.ax.xaxis.set_major_locator(MaxNLocator(integer=True))
 
-    def _add_timestamp(self, ax, timestamp_config):
-        """타임스탬프를 추가합니다."""
+    def render_overlay(self, size: int, value_range: Optional[Tuple[float, float]] = None,
+                       grid_z: Optional[np.ndarray] = None) -> np.ndarray:
+        """격자 기록 애니메이션용 정적 오버레이를 (size, size, 4) RGBA 배열로 렌더링합니다.
+
+        빈 area, area 경계, 센서 위치와 (value_range가 주어지면) 컬러바를 그립니다.
+        측지 거리로 센서 없는 실내 area를 채우는 경우 grid_z(격자 기록 프레임)에서 값이 없는
+        격자점만 빈 area 스타일로 칠합니다. (grid_z가 없으면 채워졌는지 알 수 없어 칠하지 않음)
+        load_map_config()와 _parse_areas()를 먼저 호출해야 하며, 격자 프레임과 맞추기 위해
+        SVG 좌표 0~1000 전체를 여백 없이 size x size 픽셀에 대응시킵니다.
+        선 두께, 글자 크기 등 픽셀 단위 설정은 1000px 기준에서 비율대로 줄입니다.
+        """
+        scale = size / 1000
+        visualization = self.gen_config.get('visualization', {})
+        # pyplot 상태(plt.close('all') 등)와 분리되도록 Figure를 직접 생성 (스레드에서 호출 가능)
+        fig = Figure(figsize=(size / 100, size / 100), dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        fig.patch.set_alpha(0)
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.patch.set_alpha(0)
+        ax.set_xlim(0, 1000)
+        ax.set_ylim(1000, 0)
+        ax.axis('off')
+
+        sensor_points = [(sensor['position']['x'], sensor['position']['y'])
+                         for sensor in self.sensors_data if 'position' in sensor]
+
+        # 센서가 없는 area 표시 (생성 시와 같은 스타일)
+        empty_area_style = visualization.get('empty_area', 'white')
+        geodesic_fill = self.parameters.get('geodesic', {}).get('enabled', False)
+        grid_x = grid_y = empty_cells = None
+        if geodesic_fill and grid_z is not None:
+            grid_x, grid_y, grid_points, _ = self._build_grid(grid_z.dtype.name)
+            empty_cells = np.zeros(grid_x.shape, dtype=bool)
+        for area in self.areas:
+            if empty_area_style == 'transparent':
+                break
+            if any(area['polygon'].contains(Point(x, y)) for x, y in sensor_points):
+                continue
+            if geodesic_fill and not area['is_exterior']:
+                # 문으로 이어진 센서값으로 채워졌을 수 있으므로 값이 없는 격자점만 표시
+                if empty_cells is None:
+                    continue
+                area_mask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1])).reshape(grid_x.shape)
+                unfilled = area_mask & np.isnan(grid_z)
+                if unfilled.sum() < area_mask.sum():
+                    empty_cells |= unfilled
+                    continue
+            for x, y in self._get_polygon_coords(area['polygon']):
+                ax.fill(x, y, facecolor='white', alpha=1.0, edgecolor='none',
+                        hatch='///' if empty_area_style == 'hatched' else None)
+        self._fill_empty_cells(ax, grid_x, grid_y, empty_cells, empty_area_style)
+
+        area_border_width = visualization.get('area_border_width', 2)
+        area_border_color = visualization.get('area_border_color', '#000000')
+        if area_border_width > 0:
+            for area in self.areas:
+                if not area['is_exterior']:
+                    for x, y in self._get_polygon_coords(area['polygon']):
+                        ax.plot(x, y, color=area_border_color, linewidth=area_border_width * scale)
+
+        colorbar_config = self.gen_config.get('colorbar', {})
+        if value_range is not None and colorbar_config.get('show_colorbar', True):
+            mappable = matplotlib.cm.ScalarMappable(
+                norm=matplotlib.colors.Normalize(*value_range),
+                cmap=colorbar_config.get('cmap', 'RdYlBu_r'))
+            scaled_config = {**colorbar_config, **{
+                key: colorbar_config.get(key, default) * scale
+                for key, default in (('width', 50), ('height', 300), ('borderpad', 10),
+                                     ('font_size', 10), ('tick_size', 10))
+            }}
+            self._create_colorbar(fig, mappable, scaled_config)
+
+        canvas.draw()
+        rgba = np.asarray(canvas.buffer_rgba()).copy()
+
+        # 센서 마커는 스프라이트 하나를 그려 위치마다 찍음
+        style = self._resolve_sensor_style()
+        if style['display'] != 'none' and sensor_points:
+            sprite = marker_sprite(style['marker_style'], style['marker_size'] * scale, style['marker_color'],
+                                   max(1.0, CROSS_LINE_WIDTH * fig.dpi / 72))
+            stamp_sprite(rgba, sprite, [(x * scale, y * scale) for x, y in sensor_points])
+        return rgba
+
+    @staticmethod
+    def _format_timestamp(timestamp_config: Dict[str, Any]) -> Optional[str]:
+        """이미지에 표시할 현재 시각 문자열 (타임스탬프를 표시하지 않으면 None)"""
+        if not timestamp_config.get('enabled', False):
+            return None
+        format_map = {
+            'YYYY-MM-DD HH:mm:ss': '%Y-%m-%d %H:%M:%S',
+            'YYYY-MM-DD HH:mm': '%Y-%m-%d %H:%M',
+            'YYYY/MM/DD HH:mm:ss': '%Y/%m/%d %H:%M:%S',
+            'YYYY/MM/DD HH:mm': '%Y/%m/%d %H:%M',
+            'MM-DD HH:mm': '%m-%d %H:%M',
+            'HH:mm:ss': '%H:%M:%S',
+            'HH:mm': '%H:%M'
+        }
+        time_format = format_map.get(timestamp_config.get('format', 'YYYY-MM-DD HH:mm:ss'), '%Y-%m-%d %H:%M:%S')
+        return datetime.now().strftime(time_format)
+
+    def _add_timestamp(self, ax, timestamp_config, timestamp_text: Optional[str] = None):
+        """타임스탬프를 추가합니다. (timestamp_text가 없으면 현재 시각)"""
         try:
-            # 현재 시간을 설정된 형식으로 포맷팅
-            format_map = {
-                'YYYY-MM-DD HH:mm:ss': '%Y-%m-%d %H:%M:%S',
-                'YYYY-MM-DD HH:mm': '%Y-%m-%d %H:%M',
-                'YYYY/MM/DD HH:mm:ss': '%Y/%m/%d %H:%M:%S',
-                'YYYY/MM/DD HH:mm': '%Y/%m/%d %H:%M',
-                'MM-DD HH:mm': '%m-%d %H:%M',
-                'HH:mm:ss': '%H:%M:%S',
-                'HH:mm': '%H:%M'
-            }
-            time_format = format_map.get(timestamp_config.get('format', 'YYYY-MM-DD HH:mm:ss'), '%Y-%m-%d %H:%M:%S')
-            timestamp_text = datetime.now().strftime(time_format)
+            if timestamp_text is None:
+                timestamp_text = self._format_timestamp({**timestamp_config, 'enabled': True})
 
             # 위치 설정
             position = timestamp_config.get('position', 'bottom-right')
@@ -778,17 +1156,101 @@ class MapGenerator:
         except Exception as e:
             self.logger.error(f"타임스탬프 추가 중 오류 발생: {str(e)}")
 
-    async def generate(self, map_id: str, output_path: str) -> Dict[str, Any]:
+    async def generate(self, map_id: str, output_path: str, states: Optional[List[Dict]] = None,
+                       processes: Optional[int] = None, timings: Optional[Dict[str, float]] = None,
+                       profile: bool = False, profile_top: int = 30, rotate: bool = False) -> Dict[str, Any]:
         """온도맵을 생성하고 이미지 파일로 저장합니다.
         
+        Args:
+            map_id: 맵 ID
+            output_path: 출력 이미지 경로
+            states: 미리 조회한 센서 상태 목록 (None이면 직접 조회)
+            processes: area 처리에 사용할 프로세스 수 (None이면 CPU 수 기준, 1이면 풀 없이 순차 처리)
+            timings: 생성 전에 측정된 단계별 소요시간 (예: 이미지 로테이션, GIF)
+            profile: True이면 메인 프로세스와 area 워커를 cProfile로 측정하여 결과를 저장
+            profile_top: 프로파일 요약에 포함할 상위 함수 수
+            rotate: True이면 이미지가 바뀐 경우에만 이전 이미지 로테이션 및 GIF 생성 수행
+
         Returns:
             Dict[str, Any]: {
-                'success': bool,  # 성공 여부
-                'error': str,     # 에러 메시지
-                'time': str,      # 생성 시간
-                'duration': str   # 생성 소요 시간
+                'success': bool,       # 성공 여부
+                'busy': bool,          # 다른 곳에서 같은 맵을 생성 중이라 건너뜀 (이 경우에만 포함)
+                'error': str,          # 에러 메시지
+                'time': str,           # 생성 시간
+                'duration': str,       # 생성 소요 시간
+                'changed': bool,       # 이미지 내용 변경 여부 (같으면 저장/로테이션 생략, 성공 시)
+                'output': dict,        # 출력 이미지 포맷/크기/바이트 수와 해시 (성공 시)
+                'timings': dict,       # 단계별 소요시간 (초, 성공 시)
+                'area_timings': list,  # area별 마스크/보간 소요시간과 보간 방법 (성공 시)
+                'memory': dict,        # 격자 dtype, 메모리 예산, 메인/area 워커 최대 RSS (바이트, 성공 시)
+                'profile': dict        # 프로파일 결과 (profile=True이고 성공 시)
             }
         """
+        # 같은 맵을 웹서버 요청, 백그라운드 작업, 배치 생성 워커가 동시에 생성하지 않도록 맵별 파일 락 사용
+        lock = self.config_manager.get_generation_lock(map_id)
+        try:
+            lock.acquire(timeout=0)
+        except Timeout:
+            self.logger.debug(f"다른 프로세스가 맵을 생성 중입니다. 이번 생성은 건너뜁니다: {map_id}")
+            return {'success': False, 'busy': True, 'time': '', 'duration': '',
+                    'error': '다른 프로세스가 지도를 생성 중입니다. 잠시 후 다시 시도해주세요.'}
+        try:
+            if not profile:
+                result = await self._generate(map_id, output_path, states, processes, dict(timings or {}),
+                                              rotate=rotate)
+                self.metrics.observe_generation(map_id, result)
+                return result
+
+            # 프로파일링 모드: 이벤트 루프 스레드 전체가 측정되므로 수동 요청에서만 사용
+            worker_profile_dir = tempfile.mkdtemp(prefix='heatmap_profile_')
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                try:
+                    result = await self._generate(map_id, output_path, states, processes, dict(timings or {}),
+                                                  worker_profile_dir, rotate)
+                finally:
+                    profiler.disable()
+                self.metrics.observe_generation(map_id, result)
+
+                if result['success']:
+                    try:
+                        result['profile'] = self._save_profile(map_id, output_path, profiler, worker_profile_dir, profile_top)
+                    except Exception as e:
+                        self.logger.error(f"프로파일 저장 중 오류 발생: {str(e)}")
+                return result
+            finally:
+                shutil.rmtree(worker_profile_dir, ignore_errors=True)
+        finally:
+            lock.release()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=len(GRID_DTYPES))
+    def _build_grid(dtype: str = DEFAULT_GRID_DTYPE) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[float, float, float, float]]:
+        """SVG 전체 크기(1000x1000)의 150x150 보간 격자를 dtype으로 만듭니다.
+
+        격자는 dtype별로 한 번만 만들어 프로세스 안에서 공유하므로 (포크된 area 워커 포함)
+        읽기 전용 배열로 반환합니다.
+
+        Returns:
+            (grid_x, grid_y, grid_points, bounds(min_x, min_y, max_x, max_y))
+        """
+        # SVG 전체 크기 사용
+        min_x, min_y, max_x, max_y = 0, 0, 1000, 1000
+        resolution = complex(GRID_RESOLUTION)
+        grid_x, grid_y = np.mgrid[
+            min_x:max_x:resolution,
+            min_y:max_y:resolution
+        ].astype(dtype)
+        grid_points = np.column_stack((grid_x.ravel(), grid_y.ravel()))
+        for array in (grid_x, grid_y, grid_points):
+            array.flags.writeable = False
+        return grid_x, grid_y, grid_points, (min_x, min_y, max_x, max_y)
+
+    async def _generate(self, map_id: str, output_path: str, states: Optional[List[Dict]],
+                        processes: Optional[int], timings: Dict[str, float],
+                        worker_profile_dir: Optional[str] = None, rotate: bool = False) -> Dict[str, Any]:
+        """generate()의 실제 구현. 단계별 소요시간을 timings에 기록합니다."""
         try:
             # 출력 디렉토리 확인 및 생성
             output_dir = os.path.dirname(output_path)
@@ -813,16 +1275,26 @@ class MapGenerator:
                 return {'success': False, 'error': error_msg, 'time': '', 'duration': ''}
             
             timestamp_start = time.time_ns()
+            # 이 생성 동안의 최대 RSS 측정 시작
+            process_memory.reset_peak()
+            self._worker_peak_rss = 0
 
             try:
                 # 센서 상태 조회를 현재 이벤트 루프에서 실행
                 self.logger.trace("센서 상태 조회 시작")
                 start_time = time.time()
                 
-                # 센서 상태 조회 실행
-                self.logger.trace("센서 상태 조회 실행 시작...")
-                all_states = await self.sensor_manager.get_all_states()
+                # 센서 상태 조회 실행 (배치 생성 시 공유 스냅샷 사용)
+                if states is not None:
+                    self.logger.trace("공유된 센서 상태 스냅샷 사용")
+                    all_states = states
+                else:
+                    self.logger.trace("센서 상태 조회 실행 시작...")
+                    all_states = await self.sensor_manager.get_all_states()
                 elapsed_time = time.time() - start_time
+                if states is None:
+                    # 공유 스냅샷을 사용하는 경우 조회 시간은 호출자가 전달
+                    timings['state_fetch'] = elapsed_time
                 
                 if all_states:
                     self.logger.trace(f"센서 상태 조회 완료: {len(all_states)}개 센서, 소요시간: {elapsed_time:.3f}초")
@@ -839,314 +1311,840 @@ class MapGenerator:
             
             
             # area 데이터 파싱
+            stage_start = time.time()
             areas, root = self._parse_areas()
+            timings['area_parse'] = time.time() - stage_start
             if not areas:
                 error_msg = "유효한 area를 찾을 수 없습니다"
                 self.logger.error(error_msg)
                 return {'success': False, 'error': error_msg, 'time': '', 'duration': ''}
 
-            # 센서 데이터 수집 (states_dict 전달)
-            sensor_points, raw_temps, sensor_ids = await self._collect_sensor_data(states_dict)
-            if not sensor_points:
-                error_msg = "유효한 센서 데이터가 없습니다"
-                self.logger.error(error_msg)
-                return {'success': False, 'error': error_msg, 'time': '', 'duration': ''}
-            temperatures = raw_temps
-            
-            # 설정된 온도 범위 가져오기
-            min_temp, max_temp = self._calculate_temperature_range(temperatures,self.gen_config.get('colorbar', {}))
-            # 온도값 범위 제한 적용
-            if min_temp is not None:
-                temperatures = [max(t, min_temp) for t in raw_temps]
-            if max_temp is not None:
-                temperatures = [min(t, max_temp) for t in raw_temps]
-                
-            # 센서를 area에 할당
-            self._assign_sensors_to_areas(sensor_points, temperatures, sensor_ids)
+            # 격자 생성 (모든 레이어가 공유)
+            grid_x, grid_y, grid_points, bounds = self._build_grid(self.grid_dtype)
 
-            # SVG 전체 크기 사용
-            min_x, min_y, max_x, max_y = 0, 0, 1000, 1000
-            
-            # 격자 생성
-            grid_x, grid_y = np.mgrid[
-                min_x:max_x:150j,
-                min_y:max_y:150j
+            # 기본 레이어 (맵의 sensors/unit/컬러바 설정)
+            area_masks: Dict[int, np.ndarray] = {}  # 첫 레이어에서 생성하여 이후 레이어가 재사용
+            last_generation = self.config_manager.db.get_map(map_id).get('last_generation', {})
+            layer_result = await self._render_layer(map_id, output_path, states_dict, grid_x, grid_y, grid_points,
+                                                    bounds, area_masks, processes, timings, worker_profile_dir,
+                                                    rotate, self.config_manager.get_derived_sizes(map_id),
+                                                    previous_output=last_generation.get('output'))
+            if not layer_result['success']:
+                return {'success': False, 'error': layer_result['error'], 'time': '', 'duration': ''}
+            area_timings = layer_result['area_timings']
+            changed = layer_result['changed']
+            output_info = layer_result['output']
+            grids: Dict[Optional[str], Dict[str, Any]] = {None: layer_result['grid']}
+
+            # 추가 레이어 (상태 스냅샷, area 파싱, 격자, area 마스크 재사용)
+            layer_results: Dict[str, Dict[str, Any]] = {}
+            if self.layers:
+                stage_start = time.time()
+                for layer in self.layers:
+                    layer_result = await self._render_extra_layer(
+                        map_id, layer, states_dict, grid_x, grid_y, grid_points, bounds,
+                        area_masks, processes, worker_profile_dir,
+                        previous_output=last_generation.get('layers', {}).get(layer['id'], {}).get('output'))
+                    grid = layer_result.pop('grid', None)
+                    if grid is not None:
+                        grids[layer['id']] = grid
+                    layer_results[layer['id']] = layer_result
+                timings['layers'] = time.time() - stage_start
+
+            # 기본 레이어 격자를 기록 저장소에 추가 (재생/분석용)
+            stage_start = time.time()
+            self._append_history(map_id, timestamp_start, grids[None], bounds)
+            timings['history'] = time.time() - stage_start
+
+            # 생성 시간 정보 업데이트
+            timestamp_end = time.time_ns()
+            generation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            generation_duration = f'{((timestamp_end - timestamp_start)/1000000000):.3f}s'
+            timings['total'] = (timestamp_end - timestamp_start) / 1000000000
+            timings = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+            area_timings = [
+                {key: round(value, 4) if isinstance(value, float) else value for key, value in area_timing.items()}
+                for area_timing in area_timings
             ]
+            for layer_result in layer_results.values():
+                layer_result['timings'] = {stage: round(seconds, 4) for stage, seconds in layer_result['timings'].items()}
+            memory = {
+                'grid_dtype': grid_x.dtype.name,
+                'budget_bytes': self.memory_budget,
+                'peak_rss': process_memory.peak_rss_bytes()
+            }
+            if self._worker_peak_rss:
+                memory['worker_peak_rss'] = self._worker_peak_rss
+            
+            self.save_generation_time(map_id, generation_time, generation_duration, timings, area_timings,
+                                      layer_results, output_info, memory)
 
-            # 전체 마스크와 온도 배열 초기화
-            grid_z = np.full_like(grid_x, np.nan)
-            grid_points = np.column_stack((grid_x.flatten(), grid_y.flatten()))
+            # 마지막 보간 격자 보관 (격자 데이터/값 조회 API용)
+            self.drop_grids(map_id)
+            for layer_id, grid in grids.items():
+                self.grid_cache[self.grid_key(map_id, layer_id)] = {
+                    'version': timestamp_start,
+                    'time': generation_time,
+                    'bounds': bounds,
+                    'area_cells': build_area_cells(grid['area_index'], len(self.areas)),
+                    'area_ids': [area.get('id') for area in self.areas],
+                    **grid
+                }
             
-            # 멀티프로세싱 설정
-            num_processes = min(cpu_count(), len(self.areas))
-            self.logger.trace(f"멀티프로세싱 시작: {num_processes}개의 프로세스 사용")
+            result = {
+                'success': True,
+                'error': '',
+                'time': generation_time,
+                'duration': generation_duration,
+                'changed': changed,
+                'output': output_info,
+                'timings': timings,
+                'area_timings': area_timings,
+                'memory': memory
+            }
+            if layer_results:
+                result['layers'] = layer_results
+            return result
+
+        except Exception as e:
+            error_msg = f"온도맵 생성 중 오류 발생: {str(e)}"
+            self.logger.error(error_msg)
+            import traceback
+            self.logger.error(traceback.format_exc())
+            return {
+                'success': False,
+                'error': error_msg,
+                'time': '',
+                'duration': ''
+            }
+
+    async def _render_layer(self, map_id: str, output_path: str, states_dict: Dict[str, Dict[str, Any]],
+                            grid_x: np.ndarray, grid_y: np.ndarray, grid_points: np.ndarray,
+                            bounds: Tuple[float, float, float, float], area_masks: Dict[int, np.ndarray],
+                            processes: Optional[int], timings: Dict[str, float],
+                            worker_profile_dir: Optional[str] = None, rotate: bool = False,
+                            derived_sizes: Optional[Dict[str, int]] = None,
+                            previous_output: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """레이어 하나의 센서 수집, 보간, 플롯 생성 및 이미지 저장을 수행합니다.
+
+        현재 설정된 self.sensors_data / self.unit / self.gen_config를 사용합니다.
+        area_masks에 없는 area의 마스크는 새로 생성하여 area_masks에 채워 넣으므로,
+        같은 딕셔너리를 넘기면 다음 레이어는 마스크를 다시 만들지 않습니다.
+        derived_sizes가 있으면 같은 렌더링 버퍼에서 축소 이미지도 함께 저장합니다.
+
+        렌더링 입력(격자, 센서값, 설정, 표시할 타임스탬프 문자열)의 해시가 previous_output(지난 생성의
+        output 정보)과 같고 게시된 파일이 그대로이면 렌더링과 저장을 모두 생략합니다.
+
+        Returns:
+            Dict[str, Any]: {
+                'success': bool,
+                'error': str,
+                'changed': bool,       # 이미지 내용 변경 여부 (같으면 저장 생략)
+                'output': dict,        # {'format', 'width', 'height', 'bytes', 'derived'(축소 이미지별 크기),
+                                       #  'hash'(게시된 파일 내용 해시), 'input_hash'(렌더링 입력 해시)}
+                'timings': dict,       # 단계별 소요시간 (초)
+                'area_timings': list,  # area별 마스크/보간 소요시간과 보간 방법
+                'grid': dict           # 격자 캐시 항목 중 레이어별 값 (grid_z, area_index 등)
+            }
+        """
+        min_x, min_y, max_x, max_y = bounds
+        # 센서 데이터 수집 (states_dict 전달)
+        stage_start = time.time()
+        sensor_points, raw_temps, sensor_ids = await self._collect_sensor_data(states_dict, self.sensor_attribute)
+        timings['sensor_collect'] = time.time() - stage_start
+        if not sensor_points:
+            error_msg = "유효한 센서 데이터가 없습니다"
+            self.logger.error(error_msg)
+            return {'success': False, 'error': error_msg, 'time': '', 'duration': ''}
+        temperatures = raw_temps
+        
+        # 설정된 온도 범위 가져오기
+        min_temp, max_temp = self._calculate_temperature_range(temperatures,self.gen_config.get('colorbar', {}))
+        # 온도값 범위 제한 적용
+        if min_temp is not None:
+            temperatures = [max(t, min_temp) for t in raw_temps]
+        if max_temp is not None:
+            temperatures = [min(t, max_temp) for t in raw_temps]
             
-            # 프로세스 풀 생성 및 작업 실행
-            try:
+        # 센서를 area에 할당
+        stage_start = time.time()
+        self._assign_sensors_to_areas(sensor_points, temperatures, sensor_ids)
+        timings['sensor_assign'] = time.time() - stage_start
+
+
+        # 전체 마스크와 온도 배열 초기화
+        grid_z = np.full_like(grid_x, np.nan)
+        grid_stddev = np.full_like(grid_x, np.nan)  # 크리깅 표준편차 (신뢰도 레이어, 크리깅 area만)
+        area_index = np.full(grid_x.shape, -1, dtype=np.int16)  # 격자점별 area 인덱스 (값 조회용)
+        
+        # 멀티프로세싱 설정
+        num_processes = processes if processes is not None else min(cpu_count(), len(self.areas))
+        self.logger.trace(f"멀티프로세싱 시작: {num_processes}개의 프로세스 사용")
+        
+        # 측지 거리장 (기본 레이어에서 한 번 만들면 캐시 사용)
+        stage_start = time.time()
+        fields = self._geodesic_fields(map_id, grid_x, grid_y, grid_points, area_masks)
+        if fields is not None:
+            timings['geodesic'] = time.time() - stage_start
+
+        # 작업 인자 준비
+        self.logger.trace("작업 인자 준비 시작")
+        grid_options = {
+            'dtype': grid_x.dtype.name,
+            'memory_budget': self.memory_budget // max(1, num_processes),  # 동시에 실행되는 워커가 나눠 씀
+            'pooled': num_processes > 1
+        }
+        process_args = [
+            (area_idx, area, grid_options, min_x, max_x, min_y, max_y,
+             self.area_sensors, self._area_parameters(area_idx, area), area_masks.get(area_idx),
+             self._area_geodesic_args(area_idx, area, area_masks.get(area_idx), fields))
+            for area_idx, area in enumerate(self.areas)
+        ]
+        self.logger.trace(f"작업 인자 준비 완료: {len(process_args)}개의 작업")
+
+        # 프로세스 풀 생성 및 작업 실행
+        area_timings = []
+        stage_start = time.time()
+        try:
+            results = []
+            if num_processes <= 1:
+                # 순차 처리 (배치 생성 워커 등 풀을 만들 수 없는 환경)
+                self.logger.trace("순차 처리 시작")
+                for i, args in enumerate(process_args):
+                    results.append(self._process_area_static(args))
+                    self.logger.trace(f"Area 처리 완료 ({i+1}/{len(process_args)})")
+            else:
                 self.logger.trace("프로세스 풀 생성 시작")
                 with Pool(processes=num_processes) as pool:
-                    # 작업 인자 준비
-                    self.logger.trace("작업 인자 준비 시작")
-                    process_args = [
-                        (area_idx, area, grid_points, grid_x, grid_y, min_x, max_x, min_y, max_y, 
-                         self.area_sensors, self.parameters)
-                        for area_idx, area in enumerate(self.areas)
-                    ]
-                    self.logger.trace(f"작업 인자 준비 완료: {len(process_args)}개의 작업")
-                    
-                    # 병렬 처리 실행
+                    # 병렬 처리 실행 (프로파일링 모드에서는 워커도 측정)
                     self.logger.trace("병렬 처리 시작")
-                    results = []
-                    for i, result in enumerate(pool.imap_unordered(self._process_area_static, process_args)):
+                    if worker_profile_dir:
+                        area_iter = pool.imap_unordered(self._process_area_profiled_static,
+                                                        [(worker_profile_dir, args) for args in process_args])
+                    else:
+                        area_iter = pool.imap_unordered(self._process_area_static, process_args)
+                    for i, result in enumerate(area_iter):
                         self.logger.trace(f"Area 처리 완료 ({i+1}/{len(process_args)})")
                         results.append(result)
                     
-                    # 결과 처리
-                    self.logger.trace("결과 처리 시작")
-                    for area_idx, area_temps, area_mask in results:
-                        self.logger.trace(f"Area {area_idx} 결과 적용 중")
-                        grid_z[area_mask] = area_temps
-                        self.logger.trace(f"Area {area_idx} 결과 적용 완료")
-                    
-                    self.logger.trace("모든 area 처리 완료")
-                    
                     pool.close()
                     pool.join()  # 명시적 종료 대기 추가
                     self.logger.trace("프로세스 풀 완전 종료 확인")
-                    
-            except Exception as e:
-                self.logger.error(f"멀티프로세싱 처리 중 오류 발생: {str(e)}")
-                import traceback
-                self.logger.error(traceback.format_exc())
-                raise
 
-            # 플롯 생성 전 추가 로깅
-            self.logger.trace("현재 열려 있는 Figure 수: %d", len(plt.get_fignums()))
+            # 결과 처리 (완료 순서와 무관하게 area 순서대로 적용: 겹치는 area는 순차 처리와 같이 뒤 area가 덮어씀)
+            self.logger.trace("결과 처리 시작")
+            results.sort(key=lambda result: result[0])
+            for area_idx, area_temps, area_mask, area_timing, area_variance in results:
+                self.logger.trace(f"Area {area_idx} 결과 적용 중")
+                grid_z[area_mask] = area_temps
+                if area_variance is not None:
+                    grid_stddev[area_mask] = np.sqrt(area_variance)
+                area_index[area_mask] = area_idx
+                area_masks[area_idx] = area_mask
+                area_timings.append(area_timing)
+                self._worker_peak_rss = max(self._worker_peak_rss, area_timing.get('peak_rss') or 0)
+                self.logger.trace(f"Area {area_idx} 결과 적용 완료 (보간 방법: {area_timing.get('method')})")
+            
+            area_timings.sort(key=lambda t: t['area'])
+            # 측지 거리로 채운 센서 없는 area에서 문으로 닿지 않은 격자점 (빈 area 스타일로 표시)
+            empty_cells = None
+            for area_timing in area_timings:
+                if str(area_timing.get('method', '')).startswith('geodesic_') and area_timing['area'] not in self.area_sensors:
+                    if empty_cells is None:
+                        empty_cells = np.zeros(grid_x.shape, dtype=bool)
+                    empty_cells |= area_masks[area_timing['area']] & np.isnan(grid_z)
+            timings['area_processing'] = time.time() - stage_start
+            timings['mask_build'] = sum(t.get('mask_build', 0) for t in area_timings)
+            timings['interpolation'] = sum(t.get('interpolation', 0) for t in area_timings)
+            self.logger.trace("모든 area 처리 완료")
+                
+        except Exception as e:
+            self.logger.error(f"멀티프로세싱 처리 중 오류 발생: {str(e)}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            raise
+
+        grid_result = {
+            'unit': self.unit,
+            'grid_z': grid_z,
+            'grid_stddev': grid_stddev,
+            'area_index': area_index,
+            'sensor_values': dict(zip(sensor_ids, raw_temps)),
+            'sensor_areas': {sensor_id: area_idx
+                             for area_idx, sensors in self.area_sensors.items()
+                             for _, _, sensor_id in sensors}
+        }
+
+        output_format = self.config_manager.get_output_format(map_id)
+        if str(self.gen_config.get('format', 'png')).lower() != output_format:
+            self.logger.warning("%s 인코딩을 지원하지 않는 Pillow입니다. %s로 저장합니다. "
+                                "(AVIF는 Pillow 11.2 이상 또는 pillow-avif-plugin 필요)",
+                                str(self.gen_config.get('format')).upper(), output_format.upper())
 
-            # 플롯 생성
-            self.logger.trace("플롯 생성 시작")
+        # 플롯 생성 (렌더링 프로세스 또는 현재 프로세스)
+        self.logger.trace("플롯 생성 시작")
+        try:
+            request = {
+                'grid_dtype': grid_x.dtype.name,
+                'grid_z': grid_z,
+                'min_temp': min_temp,
+                'max_temp': max_temp,
+                'empty_areas': sorted(t['area'] for t in area_timings if t.get('method') == 'none'),
+                'empty_cells': empty_cells,
+                'sensor_points': sensor_points,
+                'raw_temps': raw_temps,
+                'sensor_ids': sensor_ids,
+                'states': {sensor_id: states_dict[sensor_id] for sensor_id in sensor_ids if sensor_id in states_dict},
+                'format': output_format,
+                'encoder_options': self.gen_config.get('encoder', {}),
+                # 입력 해시에 포함되므로 표시 시각이 바뀌면 다시 그림 (같은 분/초 안에서만 생략)
+                'timestamp_text': self._format_timestamp(self.gen_config.get('timestamp', {}))
+            }
+            input_hash = self._render_input_hash(request, derived_sizes)
+            if self._is_published(output_path, input_hash, previous_output, derived_sizes):
+                self.logger.trace("렌더링 입력이 지난 생성과 같음, 렌더링/저장 생략")
+                return {
+                    'success': True,
+                    'error': '',
+                    'changed': False,
+                    'output': dict(previous_output),
+                    'timings': timings,
+                    'area_timings': area_timings,
+                    'grid': grid_result
+                }
+
+            rendered = await self._render(request)
+            rgba = rendered['rgba']
+            timings.update(rendered['timings'])
+            self.logger.trace("플롯 생성 완료")
+
+            # 인코딩 후 내용이 같으면 쓰기/로테이션/GIF 생성 생략, 다르면 원자적으로 교체
             try:
-                plt.close('all')  # 기존 플롯 정리
-                self.logger.trace("figure 생성 시작")
-                fig = plt.figure(figsize=(10, 10))  # 전체 figure 크기
-                self.logger.trace("figure 생성 완료")
-
-                # 메인 플롯 (열지도)
-                self.logger.trace("메인 플롯 axes 생성 시작")
-                main_ax = plt.subplot2grid((1, 20), (0, 0), colspan=20)  # 열지도용 axes
-                main_ax.invert_yaxis()
-                
-                # 축 테두리 기본 설정
-                for spine in ['top', 'bottom', 'left', 'right']:
-                    main_ax.spines[spine].set_visible(True)
-                
-                self.logger.trace("메인 플롯 axes 생성 완료")
-
-                # 온도 범위 설정
-                self.logger.trace("온도 범위 설정 시작")
-                temp_range = min_temp - max_temp
-                steps = self.gen_config.get('colorbar', {}).get('temp_steps', 100)
-                levels = np.linspace(min_temp - 0.1 * temp_range, max_temp + 0.1 * temp_range, steps)
-                self.logger.trace("온도 범위 설정 완료")
-
-                # 온도 데이터가 없는 area 표시
-                self.logger.trace("빈 area 처리 시작")
-                for i, area in enumerate(self.areas):
-                    if i not in self.area_sensors:
-                        empty_area_style = self.gen_config.get('visualization', {}).get('empty_area', 'white')
-                        if empty_area_style == 'white':
-                            for x, y in self._get_polygon_coords(area['polygon']):
-                                main_ax.fill(x, y, facecolor='white', alpha=1.0, edgecolor='none')
-                        elif empty_area_style == 'transparent':
-                            # transparent 스타일인 경우 해당 영역을 건너뜀
-                            continue
-                        elif empty_area_style == 'hatched':
-                            for x, y in self._get_polygon_coords(area['polygon']):
-                                main_ax.fill(x, y, facecolor='white', hatch='///', alpha=1.0, edgecolor='none')
-                self.logger.trace("빈 area 처리 완료")
-
-                # 온도 분포 그리기
-                self.logger.trace("온도 분포 그리기 시작")
-                contour = main_ax.contourf(grid_x, grid_y, grid_z,
-                                       levels=levels,
-                                       cmap=self.gen_config.get('colorbar', {}).get('cmap', 'RdYlBu_r'),
-                                       extend='both',
-                                       alpha=0.9)
-                self.logger.trace("온도 분포 그리기 완료")
-
-                # area 경계 그리기
-                self.logger.trace("area 경계 그리기 시작")
-                area_border_width = self.gen_config.get('visualization', {}).get('area_border_width', 2)
-                area_border_color = self.gen_config.get('visualization', {}).get('area_border_color', '#000000')
-                if area_border_width > 0:
-                    for area in self.areas:
-                        if not area['is_exterior']:
-                            for x, y in self._get_polygon_coords(area['polygon']):
-                                main_ax.plot(x, y, color=area_border_color, linewidth=area_border_width)
-                self.logger.trace("area 경계 그리기 완료")
-
-                # plot 외곽선 그리기
-                self.logger.trace("plot 외곽선 그리기 시작")
-                
-                # float으로 명시적 변환
-                try:
-                    plot_border_width = float(self.gen_config.get('visualization', {}).get('plot_border_width', 0))
-                except (ValueError, TypeError):
-                    plot_border_width = 0
-                
-                plot_border_color = self.gen_config.get('visualization', {}).get('plot_border_color', '#000000')
-                
-                # 경계선 설정 적용
-                self.logger.trace(f"Plot 경계선 설정: 두께={plot_border_width}, 색상={plot_border_color}")
-                
-                # 축 경계선(spines) 설정
-                for spine in ['top', 'bottom', 'left', 'right']:
-                    if plot_border_width > 0:
-                        self.logger.trace(f"spine {spine}에 경계선 적용")
-                        main_ax.spines[spine].set_linewidth(plot_border_width)
-                        main_ax.spines[spine].set_color(plot_border_color)
-                        main_ax.spines[spine].set_visible(True)
-                    else:
-                        main_ax.spines[spine].set_visible(False)
-                
-                # 축 눈금 제거
-                main_ax.set_xticks([])
-                main_ax.set_yticks([])
-                
-                # 경계선을 위한 패딩 설정
-                if plot_border_width > 0:
-                    # 여백 추가
-                    plt.tight_layout(pad=max(1.0, plot_border_width/30))
-                    # bbox_inches='tight' 옵션을 사용할 수 있도록 저장 파라미터에 저장
-                    self.use_tight_bbox = True
-                else:
-                    plt.tight_layout(pad=1.0)
-                    self.use_tight_bbox = False
-                
-                self.logger.trace("plot 외곽선 그리기 완료")
-
-                # 센서 표시 설정
-                self.logger.trace("센서 표시 시작")
-                sensor_display = self.gen_config.get('visualization', {}).get('sensor_display', 'position_name_temp')
-                if sensor_display != 'none':
-                    for point, temperature, sensor_id in zip(sensor_points, raw_temps, sensor_ids):
-                        try:
-                            state = states_dict.get(sensor_id, {'state': '0', 'entity_id': sensor_id})
-                            self._create_sensor_marker([point[0], point[1]], temperature, sensor_id, state)
-                        except Exception as e:
-                            self.logger.error(f"센서 {sensor_id} 표시 실패: {str(e)}")
-                            continue
-                self.logger.trace("센서 표시 완료")
-
-                # 컬러바 설정 적용
-                self.logger.trace("컬러바 설정 시작")
-                colorbar_config = self.gen_config.get('colorbar', {})
-                if colorbar_config and colorbar_config.get('show_colorbar', True):
-                    self._create_colorbar(fig, contour, colorbar_config)
-                self.logger.trace("컬러바 설정 완료")
-
-                # 타임스탬프 설정 적용
-                self.logger.trace("타임스탬프 설정 시작")
-                timestamp_config = self.gen_config.get('timestamp', {})
-                if timestamp_config.get('enabled', False):
-                    self._add_timestamp(main_ax, timestamp_config)
-                self.logger.trace("타임스탬프 설정 완료")
-
-                # 축 설정
-                self.logger.trace("축 설정 시작")
-                main_ax.set_aspect('equal')
-                
-                # 테두리 설정 확인
-                plot_border_width = self.gen_config.get('visualization', {}).get('plot_border_width', 0)
-                try:
-                    plot_border_width = float(plot_border_width)
-                except (ValueError, TypeError):
-                    plot_border_width = 0
-                    
+                current_hash = self.config_manager.get_content_hash(output_path)
+            except OSError:
+                current_hash = None
+            encoder_options = request['encoder_options']
+            format = request['format']
+            output_info = rendered['output']
+            gen_config = self.gen_config
+
+            def publish_output():
+                publish = publish_image(output_path, rendered['data'], self.logger, current_hash=current_hash,
+                                        gen_config=gen_config, rotate=rotate)
+                if derived_sizes:
+                    # 원본이 바뀐 경우에만 다시 만들고, 원본과 함께 로테이션
+                    derived_start = time.time()
+                    output_info['derived'] = publish_derived_images(
+                        output_path, rgba, format, derived_sizes, self.logger, encoder_options,
+                        rotate=rotate and publish['changed'] and current_hash is not None,
+                        rotation_count=gen_config.get('rotation_count', 20),
+                        missing_only=not publish['changed'])
+                    publish['timings']['derived'] = time.time() - derived_start
+                return publish
+
+            publish = await asyncio.get_running_loop().run_in_executor(get_encoder_pool(), publish_output)
+            timings.update(publish['timings'])
+            output_info['hash'] = publish['hash']
+            output_info['input_hash'] = input_hash
+            self.logger.trace(f"이미지 인코딩 완료 ({output_info['format']}, {output_info['bytes']} bytes)")
+            self.logger.trace("이미지 저장 완료" if publish['changed'] else "이미지 변경 없음, 저장 생략")
+            
+            return {
+                'success': True,
+                'error': '',
+                'changed': publish['changed'],
+                'output': output_info,
+                'timings': timings,
+                'area_timings': area_timings,
+                'grid': grid_result
+            }
+
+        except Exception as e:
+            self.logger.error(f"플롯 생성 중 오류 발생: {str(e)}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            raise
+
+
+    @staticmethod
+    def _fill_empty_cells(ax, grid_x: Optional[np.ndarray], grid_y: Optional[np.ndarray],
+                          empty_cells: Optional[np.ndarray], empty_area_style: str):
+        """측지 거리로 채운 area 중 센서에서 닿지 않아 값이 없는 격자점을 빈 area 스타일로 칠합니다."""
+        if empty_area_style == 'transparent' or empty_cells is None or not empty_cells.any():
+            return
+        ax.contourf(grid_x, grid_y, empty_cells.astype(float), levels=[0.5, 1.5], colors=['white'],
+                    hatches=['///' if empty_area_style == 'hatched' else None])
+
+    def _render_input_hash(self, request: Dict[str, Any], derived_sizes: Optional[Dict[str, int]] = None) -> str:
+        """렌더링 결과를 결정하는 입력(격자, 센서, 맵 설정, area, 표시할 타임스탬프 문자열)의 해시를 반환합니다."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(request['grid_z']).tobytes())
+        if request.get('empty_cells') is not None:
+            digest.update(np.packbits(request['empty_cells']).tobytes())
+        meta = {key: request[key] for key in ('grid_dtype', 'min_temp', 'max_temp', 'empty_areas', 'sensor_points',
+                                              'raw_temps', 'sensor_ids', 'format', 'encoder_options',
+                                              'timestamp_text')}
+        # 센서 상태 중 이미지에 그려지는 것은 이름뿐 (값은 raw_temps)
+        meta['names'] = {sensor_id: state.get('attributes', {}).get('friendly_name')
+                         for sensor_id, state in request['states'].items()}
+        meta['gen_config'] = self.gen_config
+        meta['unit'] = self.unit
+        meta['areas'] = [(area['polygon'].wkb_hex, area['is_exterior']) for area in self.areas]
+        meta['derived_sizes'] = derived_sizes or {}
+        digest.update(json.dumps(meta, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _is_published(self, output_path: str, input_hash: str, previous_output: Optional[Dict[str, Any]],
+                      derived_sizes: Optional[Dict[str, int]] = None) -> bool:
+        """지난 생성과 입력이 같고 그때 게시한 파일(축소 이미지 포함)이 그대로 있는지 확인합니다."""
+        if not previous_output or previous_output.get('input_hash') != input_hash:
+            return False
+        try:
+            if self.config_manager.get_content_hash(output_path) != previous_output.get('hash'):
+                return False
+        except OSError:
+            return False
+        long_side = max(previous_output.get('width', 0), previous_output.get('height', 0))
+        return all(os.path.exists(derived_image_path(output_path, size_name))
+                   for size_name, max_side in (derived_sizes or {}).items() if int(max_side) < long_side)
+
+    def render_image(self, request: Dict[str, Any], encode: bool = True) -> Dict[str, Any]:
+        """보간 격자와 센서로 figure를 구성하여 RGBA 배열로 렌더링하고 인코딩합니다.
+
+        렌더링 프로세스(render_process)와 현재 프로세스가 같이 사용하며, 현재 설정된
+        self.gen_config / self.areas / self.unit을 사용합니다.
+
+        Args:
+            request: {'grid_dtype', 'grid_z', 'min_temp', 'max_temp', 'empty_areas',
+                      'empty_cells'(측지 거리로 채운 area에서 값이 없는 격자점, 없으면 None), 'sensor_points',
+                      'raw_temps', 'sensor_ids', 'states'(센서 ID별 상태), 'format', 'encoder_options',
+                      'timestamp_text'(표시할 시각, 없으면 렌더링 시각)}
+            encode: False이면 인코딩하지 않음 (호출하는 쪽에서 인코딩)
+
+        Returns:
+            {'rgba', 'data'(인코딩된 바이트, encode=True), 'output'(포맷/크기, encode=True),
+             'timings'({'figure_build', 'savefig', 'encode'})}
+        """
+        grid_x, grid_y, _, _ = self._build_grid(request['grid_dtype'])
+        grid_z = request['grid_z']
+        min_temp, max_temp = request['min_temp'], request['max_temp']
+        sensor_points, raw_temps, sensor_ids = request['sensor_points'], request['raw_temps'], request['sensor_ids']
+        states_dict = request['states']
+        timings: Dict[str, float] = {}
+
+        self.logger.trace("현재 열려 있는 Figure 수: %d", len(plt.get_fignums()))
+        stage_start = time.time()
+        try:
+            plt.close('all')  # 기존 플롯 정리
+            self.logger.trace("figure 생성 시작")
+            fig = plt.figure(figsize=(10, 10))  # 전체 figure 크기
+            self.logger.trace("figure 생성 완료")
+
+            # 메인 플롯 (열지도)
+            self.logger.trace("메인 플롯 axes 생성 시작")
+            main_ax = plt.subplot2grid((1, 20), (0, 0), colspan=20)  # 열지도용 axes
+            main_ax.invert_yaxis()
+            
+            # 축 테두리 기본 설정
+            for spine in ['top', 'bottom', 'left', 'right']:
+                main_ax.spines[spine].set_visible(True)
+            
+            self.logger.trace("메인 플롯 axes 생성 완료")
+
+            # 온도 범위 설정
+            self.logger.trace("온도 범위 설정 시작")
+            temp_range = min_temp - max_temp
+            steps = self.gen_config.get('colorbar', {}).get('temp_steps', 100)
+            levels = np.linspace(min_temp - 0.1 * temp_range, max_temp + 0.1 * temp_range, steps)
+            self.logger.trace("온도 범위 설정 완료")
+
+            # 온도 데이터가 없는 area 표시
+            self.logger.trace("빈 area 처리 시작")
+            empty_areas = set(request['empty_areas'])
+            for i, area in enumerate(self.areas):
+                if i in empty_areas:
+                    empty_area_style = self.gen_config.get('visualization', {}).get('empty_area', 'white')
+                    if empty_area_style == 'white':
+                        for x, y in self._get_polygon_coords(area['polygon']):
+                            main_ax.fill(x, y, facecolor='white', alpha=1.0, edgecolor='none')
+                    elif empty_area_style == 'transparent':
+                        # transparent 스타일인 경우 해당 영역을 건너뜀
+                        continue
+                    elif empty_area_style == 'hatched':
+                        for x, y in self._get_polygon_coords(area['polygon']):
+                            main_ax.fill(x, y, facecolor='white', hatch='///', alpha=1.0, edgecolor='none')
+            self._fill_empty_cells(main_ax, grid_x, grid_y, request.get('empty_cells'),
+                                   self.gen_config.get('visualization', {}).get('empty_area', 'white'))
+            self.logger.trace("빈 area 처리 완료")
+
+            # 온도 분포 그리기
+            self.logger.trace("온도 분포 그리기 시작")
+            contour = main_ax.contourf(grid_x, grid_y, grid_z,
+                                   levels=levels,
+                                   cmap=self.gen_config.get('colorbar', {}).get('cmap', 'RdYlBu_r'),
+                                   extend='both',
+                                   alpha=0.9)
+            self.logger.trace("온도 분포 그리기 완료")
+
+            # area 경계 그리기
+            self.logger.trace("area 경계 그리기 시작")
+            area_border_width = self.gen_config.get('visualization', {}).get('area_border_width', 2)
+            area_border_color = self.gen_config.get('visualization', {}).get('area_border_color', '#000000')
+            if area_border_width > 0:
+                for area in self.areas:
+                    if not area['is_exterior']:
+                        for x, y in self._get_polygon_coords(area['polygon']):
+                            main_ax.plot(x, y, color=area_border_color, linewidth=area_border_width)
+            self.logger.trace("area 경계 그리기 완료")
+
+            # plot 외곽선 그리기
+            self.logger.trace("plot 외곽선 그리기 시작")
+            
+            # float으로 명시적 변환
+            try:
+                plot_border_width = float(self.gen_config.get('visualization', {}).get('plot_border_width', 0))
+            except (ValueError, TypeError):
+                plot_border_width = 0
+            
+            plot_border_color = self.gen_config.get('visualization', {}).get('plot_border_color', '#000000')
+            
+            # 경계선 설정 적용
+            self.logger.trace(f"Plot 경계선 설정: 두께={plot_border_width}, 색상={plot_border_color}")
+            
+            # 축 경계선(spines) 설정
+            for spine in ['top', 'bottom', 'left', 'right']:
                 if plot_border_width > 0:
-                    # 테두리가 있을 경우 axis off를 적용하지 않고 대신 눈금만 제거
-                    main_ax.set_xticklabels([])
-                    main_ax.set_yticklabels([])
-                    main_ax.tick_params(length=0)  # 눈금 표시자 제거
+                    self.logger.trace(f"spine {spine}에 경계선 적용")
+                    main_ax.spines[spine].set_linewidth(plot_border_width)
+                    main_ax.spines[spine].set_color(plot_border_color)
+                    main_ax.spines[spine].set_visible(True)
                 else:
-                    # 테두리가 없을 경우 axis off 적용
-                    main_ax.axis('off')
-                    
-                self.logger.trace("축 설정 완료")
+                    main_ax.spines[spine].set_visible(False)
+            
+            # 축 눈금 제거
+            main_ax.set_xticks([])
+            main_ax.set_yticks([])
+            
+            # 경계선을 위한 패딩 설정
+            if plot_border_width > 0:
+                # 여백 추가
+                plt.tight_layout(pad=max(1.0, plot_border_width/30))
+                # bbox_inches='tight' 옵션을 사용할 수 있도록 저장 파라미터에 저장
+                self.use_tight_bbox = True
+            else:
+                plt.tight_layout(pad=1.0)
+                self.use_tight_bbox = False
+            
+            self.logger.trace("plot 외곽선 그리기 완료")
 
-                # 저장 (dpi 조정으로 1000x1000 크기 맞추기)
-                self.logger.trace("이미지 저장 시작")
-                width_inches = fig.get_size_inches()[0]
-                dpi = 1000 / width_inches
-                
-                format = self.config_manager.get_output_format(map_id)
-                
-                # use_tight_bbox 속성이 없으면 기본값으로 True 설정
-                use_tight_bbox = getattr(self, 'use_tight_bbox', True)
-                
-                # 경계선 설정에 따라 저장 파라미터 조정
-                plot_border_width = self.gen_config.get('visualization', {}).get('plot_border_width', 0)
-                try:
-                    plot_border_width = float(plot_border_width)
-                except (ValueError, TypeError):
-                    plot_border_width = 0
-                
-                if use_tight_bbox and plot_border_width > 0:
-                    self.logger.trace("경계선이 있는 이미지 저장 설정 적용")
-                    # 경계선이 표시되도록 여백 설정
-                    pad_inches = plot_border_width / dpi
-                    plt.savefig(output_path,
+            # 센서 표시 설정
+            self.logger.trace("센서 표시 시작")
+            try:
+                self._draw_sensors(main_ax, sensor_points, raw_temps, sensor_ids, states_dict)
+            except Exception as e:
+                self.logger.error(f"센서 표시 실패: {str(e)}")
+            self.logger.trace("센서 표시 완료")
+
+            # 컬러바 설정 적용
+            self.logger.trace("컬러바 설정 시작")
+            colorbar_config = self.gen_config.get('colorbar', {})
+            if colorbar_config and colorbar_config.get('show_colorbar', True):
+                self._create_colorbar(fig, contour, colorbar_config)
+            self.logger.trace("컬러바 설정 완료")
+
+            # 타임스탬프 설정 적용
+            self.logger.trace("타임스탬프 설정 시작")
+            timestamp_config = self.gen_config.get('timestamp', {})
+            if timestamp_config.get('enabled', False):
+                self._add_timestamp(main_ax, timestamp_config, request.get('timestamp_text'))
+            self.logger.trace("타임스탬프 설정 완료")
+
+            # 축 설정
+            self.logger.trace("축 설정 시작")
+            main_ax.set_aspect('equal')
+            
+            # 테두리 설정 확인
+            plot_border_width = self.gen_config.get('visualization', {}).get('plot_border_width', 0)
+            try:
+                plot_border_width = float(plot_border_width)
+            except (ValueError, TypeError):
+                plot_border_width = 0
+            
+            if plot_border_width > 0:
+                # 테두리가 있을 경우 axis off를 적용하지 않고 대신 눈금만 제거
+                main_ax.set_xticklabels([])
+                main_ax.set_yticklabels([])
+                main_ax.tick_params(length=0)  # 눈금 표시자 제거
+            else:
+                # 테두리가 없을 경우 axis off 적용
+                main_ax.axis('off')
+            
+            self.logger.trace("축 설정 완료")
+
+            timings['figure_build'] = time.time() - stage_start
+
+            # 저장 (dpi 조정으로 1000x1000 크기 맞추기)
+            self.logger.trace("이미지 저장 시작")
+            stage_start = time.time()
+            width_inches = fig.get_size_inches()[0]
+            dpi = 1000 / width_inches
+            
+            # use_tight_bbox 속성이 없으면 기본값으로 True 설정
+            use_tight_bbox = getattr(self, 'use_tight_bbox', True)
+
+            # 경계선 설정에 따라 저장 파라미터 조정
+            plot_border_width = self.gen_config.get('visualization', {}).get('plot_border_width', 0)
+            try:
+                plot_border_width = float(plot_border_width)
+            except (ValueError, TypeError):
+                plot_border_width = 0
+            
+            if use_tight_bbox and plot_border_width > 0:
+                self.logger.trace("경계선이 있는 이미지 저장 설정 적용")
+                # 경계선이 표시되도록 여백 설정
+                pad_inches = plot_border_width / dpi
+            else:
+                self.logger.trace("기본 이미지 저장 설정 적용")
+                # 기존 저장 방식
+                pad_inches = 0
+
+            # 파일 포맷 인코딩 없이 RGBA 버퍼로 렌더링 (인코딩은 아래에서 또는 호출하는 쪽의 스레드 풀에서 수행)
+            rgba = render_rgba(fig,
                                bbox_inches='tight',
                                pad_inches=pad_inches,
                                dpi=dpi,
                                facecolor='none',
-                               transparent=True,
-                               format=format)
-                else:
-                    self.logger.trace("기본 이미지 저장 설정 적용")
-                    # 기존 저장 방식
-                    plt.savefig(output_path,
-                               bbox_inches='tight',
-                               pad_inches=0,
-                               dpi=dpi,
-                               facecolor='none',
-                               transparent=True,
-                               format=format)
-                
-                self.logger.trace("이미지 저장 완료")
-                
-                plt.close(fig)  # 메모리 정리
-                self.logger.trace("플롯 생성 완료")
-                
-                # 생성 시간 정보 업데이트
-                timestamp_end = time.time_ns()
-                generation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                generation_duration = f'{((timestamp_end - timestamp_start)/1000000000):.3f}s'
-                
-                self.save_generation_time(map_id, generation_time, generation_duration)
-                
-                return {
-                    'success': True,
-                    'error': '',
-                    'time': generation_time,
-                    'duration': generation_duration
-                }
+                               transparent=True)
+            
+            timings['savefig'] = time.time() - stage_start
+            
+            plt.close(fig)  # 메모리 정리
+        except Exception:
+            plt.close('all')  # 오류 발생 시에도 메모리 정리
+            raise
 
-            except Exception as e:
-                self.logger.error(f"플롯 생성 중 오류 발생: {str(e)}")
-                import traceback
-                self.logger.error(traceback.format_exc())
-                plt.close('all')  # 오류 발생 시에도 메모리 정리
-                raise
+        result: Dict[str, Any] = {'rgba': rgba, 'timings': timings}
+        if encode:
+            result['data'], result['output'] = encode_image(rgba, request['format'], request['encoder_options'])
+            timings['encode'] = result['output'].pop('encode_time')
+        return result
+
+    def start_render_process(self):
+        """렌더링 프로세스를 미리 시작합니다. (옵션이 꺼져 있으면 아무것도 하지 않음)"""
+        renderer = render_process.get_render_process(self.config_manager, self.logger)
+        if renderer is None:
+            return
+        try:
+            renderer.start()
+        except render_process.RenderProcessUnavailable as e:
+            self.logger.warning(f"{str(e)}, 현재 프로세스에서 렌더링합니다")
+
+    async def _render(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """렌더링 프로세스에서(옵션이 꺼져 있거나 시작할 수 없으면 현재 프로세스에서) 이미지를 렌더링합니다.
+
+        Returns:
+            render_image() 결과 (항상 인코딩됨)
+        """
+        renderer = render_process.get_render_process(self.config_manager, self.logger)
+        if renderer is not None:
+            try:
+                rendered = await asyncio.to_thread(
+                    renderer.render, {**request, 'gen_config': self.gen_config, 'areas': self.areas, 'unit': self.unit})
+                if rendered.get('rss'):
+                    self.metrics.render_process_rss.set(rendered['rss'])
+                if rendered.get('restart'):
+                    self.metrics.render_process_restarts.inc(labels={'reason': rendered['restart']})
+                return rendered
+            except render_process.RenderProcessUnavailable as e:
+                self.logger.warning(f"{str(e)}, 현재 프로세스에서 렌더링합니다")
+
+        rendered = self.render_image(request, encode=False)
+        # 인코딩은 스레드 풀에서 수행 (Pillow 인코더는 GIL을 해제)
+        rendered['data'], rendered['output'] = await asyncio.get_running_loop().run_in_executor(
+            get_encoder_pool(), encode_image, rendered['rgba'], request['format'], request['encoder_options'])
+        rendered['timings']['encode'] = rendered['output'].pop('encode_time')
+        return rendered
+
+    async def _render_extra_layer(self, map_id: str, layer: Dict[str, Any], states_dict: Dict[str, Dict[str, Any]],
+                                  grid_x: np.ndarray, grid_y: np.ndarray, grid_points: np.ndarray,
+                                  bounds: Tuple[float, float, float, float], area_masks: Dict[int, np.ndarray],
+                                  processes: Optional[int], worker_profile_dir: Optional[str] = None,
+                                  previous_output: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """추가 레이어를 생성합니다. 실패해도 기본 레이어 결과에는 영향을 주지 않습니다.
 
+        Returns:
+            Dict[str, Any]: {'success', 'error', 'img_url', 'timings', 'changed', 'output', 'grid'(성공 시)}
+        """
+        output_filename = self.config_manager.get_layer_output_filename(map_id, layer['id'])
+        output_path = os.path.join(os.path.dirname(self.config_manager.get_output_path(map_id)), output_filename)
+        base_state = (self.sensors_data, self.unit, self.gen_config, self.sensor_attribute)
+        timings: Dict[str, float] = {}
+        try:
+            self.sensors_data = layer.get('sensors') or self.sensors_data
+            self.unit = layer.get('unit', '')
+            self.sensor_attribute = layer.get('attribute') or None
+            # 값의 범위와 단위가 기본 레이어와 다르므로 자동 범위와 레이어 단위를 기본값으로 사용
+            self.gen_config = {
+                **self.gen_config,
+                'colorbar': {**self.gen_config.get('colorbar', {}), 'auto_range': True, 'label': self.unit,
+                             **layer.get('colorbar', {})}
+            }
+
+            stage_start = time.time()
+            result = await self._render_layer(map_id, output_path, states_dict, grid_x, grid_y, grid_points,
+                                              bounds, area_masks, processes, timings, worker_profile_dir,
+                                              previous_output=previous_output)
+            timings['total'] = time.time() - stage_start
+            if not result['success']:
+                self.logger.error("레이어 %s 생성 실패: %s",
+                                  self.logger._colorize(layer['id'], "red"), result['error'])
+                return {'success': False, 'error': result['error'], 'img_url': '', 'timings': timings}
+
+            return {
+                'success': True,
+                'error': '',
+                'changed': result['changed'],
+                'output': result['output'],
+                'img_url': self.config_manager.get_versioned_url(map_id, output_filename),
+                'timings': timings,
+                'grid': result['grid']
+            }
         except Exception as e:
-            error_msg = f"온도맵 생성 중 오류 발생: {str(e)}"
+            self.logger.error(f"레이어 {layer['id']} 생성 중 오류 발생: {str(e)}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            return {'success': False, 'error': str(e), 'img_url': '', 'timings': timings}
+        finally:
+            self.sensors_data, self.unit, self.gen_config, self.sensor_attribute = base_state
+
+    async def tune_interpolation(self, map_id: str) -> Dict[str, Any]:
+        """현재 센서값으로 area별 보간 방법을 교차 검증하여 고르고 맵 설정에 저장합니다.
+
+        저장된 결과(interpolation_tuning)는 이후 생성에서 area 모양과 센서 구성이 같을 때만
+        사용되며, 그 area는 선택된 방법 하나만 실행합니다. (interpolation_tuner 참고)
+
+        Returns:
+            Dict[str, Any]: {'success', 'error', 'tuning'(저장된 결과), 'duration'}
+        """
+        try:
+            start_time = time.time()
+            self.load_map_config(map_id)
+            if not self.walls_data or len(self.sensors_data) == 0:
+                return {'success': False, 'error': "벽 데이터 또는 센서 데이터가 없습니다"}
+
+            all_states = await self.sensor_manager.get_all_states()
+            states_dict = {state['entity_id']: state for state in all_states or []}
+            areas, _ = await asyncio.to_thread(self._parse_areas)
+            if not areas:
+                return {'success': False, 'error': "유효한 area를 찾을 수 없습니다"}
+
+            sensor_points, temperatures, sensor_ids = await self._collect_sensor_data(states_dict)
+            if not sensor_points:
+                return {'success': False, 'error': "유효한 센서 데이터가 없습니다"}
+            self._assign_sensors_to_areas(sensor_points, temperatures, sensor_ids)
+
+            grid_x, _, grid_points, (min_x, min_y, max_x, max_y) = self._build_grid(self.grid_dtype)
+            size = min(max_x - min_x, max_y - min_y)
+            tuned_areas: Dict[str, Dict[str, Any]] = {}
+
+            def tune(area_idx: int, area: Dict[str, Any]) -> Dict[str, Any]:
+                area_mask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
+                return interpolation_tuner.tune_area(area, self.area_sensors[area_idx], grid_points[area_mask],
+                                                     self.parameters, size)
+
+            for area_idx, area in enumerate(self.areas):
+                if area_idx not in self.area_sensors:
+                    continue
+                # 마스크 계산과 교차 검증 모두 이벤트 루프를 막지 않도록 스레드에서 실행
+                tuned = await asyncio.to_thread(tune, area_idx, area)
+                tuned['id'] = area.get('id')
+                tuned_areas[str(area_idx)] = tuned
+                self.logger.debug("Area %s 보간 방법 선택: %s (RMSE %s, %s)",
+                                  self.logger._colorize(area_idx, "green"),
+                                  self.logger._colorize(tuned.get('method'), "blue"),
+                                  f"{tuned['rmse']:.3f}" if 'rmse' in tuned else '-',
+                                  f"{tuned['runtime'] * 1000:.1f}ms" if 'runtime' in tuned else tuned.get('reason', ''))
+
+            tuning = {'tuned_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'areas': tuned_areas}
+            # 교차 검증 중에 바뀌었을 수 있는 다른 설정을 덮어쓰지 않도록 이 항목만 병합
+            self.config_manager.db.update_map(map_id, {'interpolation_tuning': tuning})
+            self.interpolation_tuning = tuning
+            return {'success': True, 'error': '', 'tuning': tuning,
+                    'duration': f'{time.time() - start_time:.3f}s'}
+        except Exception as e:
+            error_msg = f"보간 방법 자동 선택 중 오류 발생: {str(e)}"
             self.logger.error(error_msg)
             import traceback
             self.logger.error(traceback.format_exc())
-            return {
-                'success': False,
-                'error': error_msg,
-                'time': '',
-                'duration': ''
-            } 
\ No newline at end of file
+            return {'success': False, 'error': error_msg}
+
+    async def generate_batch(self, jobs: List[Tuple[str, str]],
+                             timings: Optional[Dict[str, Dict[str, float]]] = None,
+                             rotate: bool = False) -> Dict[str, Dict[str, Any]]:
+        """여러 맵을 하나의 센서 상태 스냅샷으로 병렬 생성합니다.
+
+        센서 상태는 한 번만 조회하여 모든 맵이 공유하고, 맵 단위 작업은
+        CPU 수로 제한된 프로세스 풀(forkserver)에서 동시에 실행됩니다. 남는 CPU는 맵별
+        area 프로세스로 나눠 쓰며, 웹서버/백그라운드 생성과 같은 맵별 생성 락을 사용합니다.
+
+        Args:
+            jobs: (맵 ID, 출력 이미지 경로) 목록
+            timings: 맵 ID별로 생성 전에 측정된 단계별 소요시간
+            rotate: True이면 이미지가 바뀐 맵만 이전 이미지 로테이션 및 GIF 생성 수행
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 맵 ID별 generate() 결과 (+ 'elapsed': 워커 소요시간(초))
+            워커에서 계산된 보간 격자는 grid_cache에 반영됩니다.
+        """
+        if not jobs:
+            return {}
+
+        # 센서 상태 스냅샷 1회 조회
+        start_time = time.time()
+        try:
+            states = await self.sensor_manager.get_all_states() or []
+        except Exception as e:
+            self.logger.error(f"배치 생성용 센서 상태 조회 중 오류 발생: {str(e)}")
+            states = []
+        state_fetch_time = time.time() - start_time
+        timings = timings or {}
+        self.logger.trace(f"배치 생성용 센서 상태 스냅샷 조회 완료: {len(states)}개 센서, 소요시간: {time.time() - start_time:.3f}초")
+
+        num_processes = min(cpu_count(), len(jobs))
+        # 큰 맵 하나가 area 병렬 처리를 잃지 않도록 남는 CPU를 맵별 area 프로세스로 나눔
+        area_processes = max(1, cpu_count() // len(jobs))
+        process_args = [
+            (map_id, output_path, states, {**timings.get(map_id, {}), 'state_fetch': state_fetch_time}, rotate,
+             area_processes)
+            for map_id, output_path in jobs
+        ]
+        context = multiprocessing.get_context(BATCH_START_METHOD)
+        context.set_forkserver_preload(['map_generator'])  # forkserver가 한 번 불러온 모듈을 워커가 물려받음
+
+        def run_pool() -> Dict[str, Dict[str, Any]]:
+            results = {}
+            with ProcessPoolExecutor(max_workers=num_processes, mp_context=context, initializer=_init_batch_worker,
+                                     initargs=(self.config_manager.is_local, self.config_manager.CONFIG)) as executor:
+                futures = [executor.submit(self._generate_map_static, args) for args in process_args]
+                for future in as_completed(futures):
+                    result = future.result()
+                    self.logger.trace(f"배치 맵 생성 완료 ({len(results)+1}/{len(process_args)}): {result['map_id']}")
+                    results[result['map_id']] = result
+            return results
+
+        self.logger.trace(f"배치 맵 생성 시작: {len(jobs)}개 맵, {num_processes}개의 프로세스 사용 "
+                          f"(맵별 area 프로세스 {area_processes}개)")
+        # 풀 대기가 이벤트 루프를 막지 않도록 별도 스레드에서 실행
+        results = await asyncio.get_running_loop().run_in_executor(None, run_pool)
+        # 워커 프로세스에서 기록된 메트릭은 전달되지 않으므로 결과를 기준으로 기록
+        for map_id, result in results.items():
+            self.metrics.observe_generation(map_id, result)
+            grids = result.pop('grids', None)
+            if grids:
+                self.drop_grids(map_id)
+                self.grid_cache.update(grids)
+        self.logger.debug("배치 맵 생성 종료: %s개 맵, 총 소요시간: %s (맵별 합계: %s)",
+                          self.logger._colorize(len(results), "blue"),
+                          self.logger._colorize(f"{time.time() - start_time:.3f}s", "green"),
+                          self.logger._colorize(f"{sum(r.get('elapsed', 0) for r in results.values()):.3f}s", "yellow"))
+        return results
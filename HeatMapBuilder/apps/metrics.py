@@ -0,0 +1,203 @@
+import threading
+from typing import Dict, List, Tuple, Any, Optional
+
+# 히스토그램 기본 버킷 (초 단위)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 이벤트 루프 지연 버킷 (초 단위, 정상 상태는 수 ms 이내)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    """레이블 딕셔너리를 정렬된 튜플 키로 변환합니다."""
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Prometheus 텍스트 형식의 레이블 문자열을 반환합니다."""
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = []
+    for k, v in items:
+        v = v.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{k}="{v}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """레이블별 누적 버킷 히스토그램"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, lock=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = lock or threading.RLock()
+        self._series: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def observe(self, value: float, labels: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            series = self._series.setdefault(_label_key(labels), {
+                'counts': [0] * len(self.buckets),
+                'sum': 0.0,
+                'count': 0
+            })
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for key, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series['counts']):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Counter:
+    """레이블별 누적 카운터"""
+
+    def __init__(self, name: str, help_text: str, lock=None):
+        self.name = name
+        self.help_text = help_text
+        self._lock = lock or threading.RLock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, labels: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            key = _label_key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for key, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class Gauge:
+    """레이블별 현재값 게이지"""
+
+    def __init__(self, name: str, help_text: str, lock=None):
+        self.name = name
+        self.help_text = help_text
+        self._lock = lock or threading.RLock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, labels: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge']
+        for key, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    """맵 생성 관련 메트릭을 수집하고 Prometheus 텍스트 형식으로 제공하는 클래스"""
+
+    def __init__(self):
+        self._lock = threading.RLock()  # 모든 메트릭이 공유 (렌더링 중 변경 방지)
+        self._metrics: Dict[str, Any] = {}
+
+        self.generation_duration = self.histogram(
+            'heatmap_generation_duration_seconds', '맵 생성 전체 소요시간')
+        self.stage_duration = self.histogram(
+            'heatmap_generation_stage_duration_seconds', '맵 생성 단계별 소요시간')
+        self.area_duration = self.histogram(
+            'heatmap_area_stage_duration_seconds', 'area별 마스크 생성/보간 소요시간 (보간 방법별)')
+        self.generations_total = self.counter(
+            'heatmap_generations_total', '맵 생성 시도 횟수')
+        self.output_bytes = self.gauge(
+            'heatmap_output_bytes', '마지막으로 인코딩된 출력 이미지 크기 (바이트)')
+        self.peak_rss_bytes = self.gauge(
+            'heatmap_generation_peak_rss_bytes', '마지막 맵 생성 중 최대 RSS (process=main|worker, 바이트)')
+        self.render_process_rss = self.gauge(
+            'heatmap_render_process_rss_bytes', '마지막 렌더링 후 렌더링 프로세스의 RSS (바이트)')
+        self.render_process_restarts = self.counter(
+            'heatmap_render_process_restarts_total', '렌더링 프로세스 재시작 횟수 (reason=renders|memory|error)')
+        self.event_loop_lag = self.histogram(
+            'heatmap_event_loop_lag_seconds', '이벤트 루프 지연 (예정보다 늦게 깨어난 시간)', LOOP_LAG_BUCKETS)
+        self.event_loop_lag_max = self.gauge(
+            'heatmap_event_loop_lag_max_seconds', '최근 측정 구간의 최대 이벤트 루프 지연')
+        self.event_loop_stalls = self.counter(
+            'heatmap_event_loop_stalls_total', '이벤트 루프 지연이 정체 기준을 넘은 횟수')
+        self.background_iteration_duration = self.histogram(
+            'heatmap_background_iteration_seconds', '백그라운드 작업 루프 1회 실행 시간 (대기 제외)')
+        self.background_last_iteration = self.gauge(
+            'heatmap_background_last_iteration_timestamp_seconds', '백그라운드 작업 루프가 마지막으로 끝난 시각 (유닉스 시간)')
+        self.maps_overdue = self.gauge(
+            'heatmap_maps_overdue', '생성 주기가 지났는데 생성되지 않은 자동 생성 맵 수')
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """히스토그램을 등록하고 반환합니다. 같은 이름이면 기존 항목을 반환합니다."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets, self._lock)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """카운터를 등록하고 반환합니다. 같은 이름이면 기존 항목을 반환합니다."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text, self._lock)
+            return self._metrics[name]
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        """게이지를 등록하고 반환합니다. 같은 이름이면 기존 항목을 반환합니다."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Gauge(name, help_text, self._lock)
+            return self._metrics[name]
+
+    def observe_generation(self, map_id: str, result: Dict[str, Any]):
+        """generate() 결과에 포함된 단계별 소요시간과 최대 RSS를 기록합니다."""
+        with self._lock:
+            success = bool(result.get('success'))
+            self.generations_total.inc(labels={'map_id': map_id, 'result': 'success' if success else 'failure'})
+            if not success:
+                return
+
+            timings = result.get('timings', {})
+            for stage, seconds in timings.items():
+                if stage == 'total':
+                    self.generation_duration.observe(seconds, {'map_id': map_id})
+                else:
+                    self.stage_duration.observe(seconds, {'stage': stage})
+
+            output = result.get('output')
+            if output:
+                self.output_bytes.set(output['bytes'], {'map_id': map_id, 'format': output['format']})
+
+            memory = result.get('memory') or {}
+            for process, key in (('main', 'peak_rss'), ('worker', 'worker_peak_rss')):
+                if memory.get(key):
+                    self.peak_rss_bytes.set(memory[key], {'map_id': map_id, 'process': process})
+
+            for area_timing in result.get('area_timings', []):
+                method = area_timing.get('method', 'none')
+                for stage in ('mask_build', 'interpolation'):
+                    if stage in area_timing:
+                        self.area_duration.observe(area_timing[stage], {'stage': stage, 'method': method})
+
+    def render(self) -> str:
+        """등록된 모든 메트릭을 Prometheus 텍스트 형식으로 반환합니다."""
+        with self._lock:
+            lines = []
+            for metric in self._metrics.values():
+                lines.extend(metric.render())
+            return '\n'.join(lines) + '\n'
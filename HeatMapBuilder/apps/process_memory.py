@@ -0,0 +1,56 @@
+"""프로세스 메모리 사용량 측정 (생성 단위 최대 RSS)
+
+리눅스에서는 /proc/self/clear_refs에 5를 쓰면 최대 RSS(VmHWM)가 현재 RSS로 초기화되므로,
+생성을 시작할 때 초기화하고 끝날 때 /proc/self/status의 VmHWM을 읽으면 그 생성 동안의
+최대 RSS를 구할 수 있습니다. 초기화할 수 없는 환경(다른 OS, 권한 없음)에서는 프로세스 시작
+이후의 최대값(getrusage)을 사용합니다.
+
+최대 RSS는 프로세스 전체 값이므로 같은 프로세스에서 동시에 실행된 다른 작업(웹 요청,
+다른 맵 생성)의 메모리도 포함될 수 있습니다.
+"""
+import sys
+from typing import Optional
+
+_STATUS_PATH = '/proc/self/status'
+_CLEAR_REFS_PATH = '/proc/self/clear_refs'
+
+
+def _read_status_kb(field: str) -> Optional[int]:
+    try:
+        with open(_STATUS_PATH) as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def reset_peak() -> bool:
+    """최대 RSS를 현재 RSS로 초기화합니다. 초기화하지 못하면 False"""
+    try:
+        with open(_CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """마지막 reset_peak() 이후(초기화하지 못했으면 프로세스 시작 이후)의 최대 RSS (바이트)"""
+    peak_kb = _read_status_kb('VmHWM')
+    if peak_kb is not None:
+        return peak_kb * 1024
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (ImportError, OSError):
+        return None
+    # macOS는 바이트, 리눅스는 KB 단위
+    return int(max_rss) if sys.platform == 'darwin' else int(max_rss) * 1024
+
+
+def current_rss_bytes() -> Optional[int]:
+    """현재 RSS (바이트, /proc이 없으면 None)"""
+    rss_kb = _read_status_kb('VmRSS')
+    return rss_kb * 1024 if rss_kb is not None else None
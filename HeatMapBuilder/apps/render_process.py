@@ -0,0 +1,250 @@
+"""matplotlib 렌더링 전용 하위 프로세스
+
+맵 생성의 figure 구성, 래스터화, 이미지 인코딩을 웹/API 프로세스가 아닌 오래 실행되는
+하위 프로세스 하나에서 수행합니다. matplotlib 전역 상태(figure, 폰트 캐시, rcParams)와
+렌더링으로 커지는 힙이 웹서버 프로세스에 쌓이지 않도록 하며, 하위 프로세스는 max_renders번
+렌더링했거나 RSS가 memory_limit을 넘으면 종료하고 백그라운드에서 새로 시작합니다.
+
+요청(격자, 센서, 맵 설정)과 응답(인코딩된 이미지 바이트, 축소 이미지용 RGBA 배열)은 소켓 쌍
+위의 multiprocessing Connection으로 주고받습니다. 하위 프로세스는 이 파일을 새 인터프리터로
+실행하므로 (multiprocessing spawn과 달리 부모의 __main__인 웹서버 모듈을 가져오지 않음)
+부모의 힙, 스레드, 웹서버 모듈을 물려받지 않고 렌더링에 필요한 모듈만 불러옵니다.
+
+애드온 옵션:
+    render_process: 하위 프로세스 사용 여부 (기본 true, false이면 웹서버 프로세스에서 렌더링)
+    render_process_max_renders: 하위 프로세스를 다시 시작하기 전 최대 렌더링 횟수
+    render_process_memory_mb: 렌더링 후 RSS가 이 값을 넘으면 하위 프로세스를 다시 시작
+"""
+import os
+import sys
+import socket
+import threading
+import traceback
+import subprocess
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Optional
+
+import process_memory
+
+DEFAULT_MAX_RENDERS = 200
+DEFAULT_MEMORY_LIMIT_MB = 512
+START_TIMEOUT = 120  # 하위 프로세스의 모듈 가져오기(matplotlib, scipy 등) 대기 시간 (초)
+RENDER_TIMEOUT = 120  # 렌더링 하나의 응답 대기 시간 (초)
+
+
+class RenderProcessUnavailable(RuntimeError):
+    """하위 프로세스를 시작할 수 없음 (호출하는 쪽은 현재 프로세스에서 렌더링)"""
+
+
+def _serve(connection: Connection, is_local: bool, config: Dict[str, Any]):
+    """하위 프로세스 본체: 요청을 받아 렌더링하고 결과를 돌려줍니다. (None을 받거나 부모가 종료되면 종료)"""
+    from config_manager import ConfigManager
+    from custom_logger import CustomLogger
+    from map_generator import MapGenerator
+
+    config_manager = ConfigManager(is_local, config)
+    logger = CustomLogger(log_file=config_manager.paths['log'],
+                          log_level=str(config.get('log_level', 'debug')).upper())
+    generator = MapGenerator(config_manager, None, logger)
+    connection.send({'ready': True})
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            # 부모 프로세스 종료
+            break
+        if request is None:
+            break
+        generator.gen_config = request['gen_config']
+        generator.areas = request['areas']
+        generator.unit = request['unit']
+        try:
+            result = generator.render_image(request)
+        except MemoryError:
+            # 메모리 부족 후에는 상태를 믿을 수 없으므로 오류를 알리고 종료
+            connection.send({'error': '렌더링 프로세스 메모리 부족', 'traceback': traceback.format_exc(),
+                             'rss': process_memory.current_rss_bytes(), 'exiting': True})
+            break
+        except Exception as e:
+            result = {'error': str(e), 'traceback': traceback.format_exc()}
+        result['rss'] = process_memory.current_rss_bytes()
+        try:
+            connection.send(result)
+        except OSError:
+            break
+    connection.close()
+
+
+class RenderProcess:
+    """렌더링 하위 프로세스 하나를 관리합니다. (요청은 한 번에 하나씩, 스레드에서 호출)"""
+
+    def __init__(self, is_local: bool, config: Dict[str, Any], logger,
+                 max_renders: int = DEFAULT_MAX_RENDERS, memory_limit: int = DEFAULT_MEMORY_LIMIT_MB * 1024 * 1024):
+        self.is_local = is_local
+        self.config = config
+        self.logger = logger
+        self.max_renders = max_renders
+        self.memory_limit = memory_limit
+        self.renders = 0  # 현재 하위 프로세스의 렌더링 횟수
+        self._lock = threading.Lock()
+        self._process = None
+        self._connection = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        parent_socket, child_socket = socket.socketpair()
+        try:
+            process = subprocess.Popen([sys.executable, os.path.abspath(__file__), str(child_socket.fileno())],
+                                       pass_fds=(child_socket.fileno(),))
+        except Exception as e:
+            parent_socket.close()
+            raise RenderProcessUnavailable(f"렌더링 프로세스 시작 실패: {str(e)}") from e
+        finally:
+            child_socket.close()
+        connection = Connection(parent_socket.detach())
+        try:
+            connection.send({'is_local': self.is_local, 'config': self.config})
+            if not connection.poll(START_TIMEOUT):
+                raise RenderProcessUnavailable("렌더링 프로세스 준비 시간 초과")
+            connection.recv()
+        except (EOFError, OSError, RenderProcessUnavailable) as e:
+            connection.close()
+            process.kill()
+            process.wait()
+            if isinstance(e, RenderProcessUnavailable):
+                raise
+            raise RenderProcessUnavailable(f"렌더링 프로세스가 시작 중 종료됨 (exitcode={process.returncode})") from e
+        self._process, self._connection = process, connection
+        self.renders = 0
+        self.logger.debug("렌더링 프로세스 시작 (pid=%s)", process.pid)
+
+    def _stop(self, timeout: float = 5):
+        process, connection = self._process, self._connection
+        self._process = self._connection = None
+        if process is None:
+            return
+        try:
+            connection.send(None)
+        except (OSError, ValueError):
+            pass
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        connection.close()
+
+    def start(self):
+        """하위 프로세스가 없으면 미리 시작합니다. (첫 렌더링에서 모듈 가져오기를 기다리지 않도록)"""
+        with self._lock:
+            if not self.alive:
+                self._stop()
+                self._start()
+
+    def _start_in_background(self):
+        def run():
+            try:
+                self.start()
+            except RenderProcessUnavailable as e:
+                self.logger.warning(str(e))
+
+        threading.Thread(target=run, name='render-process-start', daemon=True).start()
+
+    def stop(self):
+        """하위 프로세스를 종료합니다. (다음 render()에서 다시 시작)"""
+        with self._lock:
+            self._stop()
+
+    def render(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """요청 하나를 렌더링합니다. 하위 프로세스가 도중에 종료되면 새로 시작하여 한 번 더 시도합니다.
+
+        Returns:
+            MapGenerator.render_image() 결과와 'rss'(렌더링 후 하위 프로세스 RSS),
+            'restart'(이 렌더링 후 하위 프로세스를 다시 시작하게 된 이유, 없으면 None)
+
+        Raises:
+            RenderProcessUnavailable: 하위 프로세스를 시작할 수 없음
+            RuntimeError: 렌더링 실패 (하위 프로세스의 오류 메시지)
+        """
+        with self._lock:
+            for attempt in range(2):
+                if not self.alive:
+                    self._stop()
+                    self._start()
+                try:
+                    self._connection.send(request)
+                    if not self._connection.poll(RENDER_TIMEOUT):
+                        raise TimeoutError("렌더링 응답 시간 초과")
+                    result = self._connection.recv()
+                    break
+                except (EOFError, OSError, TimeoutError) as e:
+                    exitcode = self._process.poll() if self._process is not None else None
+                    self._stop(timeout=1)
+                    self.logger.warning("렌더링 프로세스 응답 없음 (%s, exitcode=%s)", str(e) or type(e).__name__,
+                                        exitcode)
+                    if attempt:
+                        raise RuntimeError(f"렌더링 프로세스 오류: {str(e) or type(e).__name__}") from e
+
+            self.renders += 1
+            restart = None
+            if result.pop('exiting', False):
+                restart = 'error'
+            elif result.get('rss') and result['rss'] > self.memory_limit:
+                restart = 'memory'
+            elif self.renders >= self.max_renders:
+                restart = 'renders'
+            if restart:
+                self.logger.debug("렌더링 프로세스 재시작 예정 (%s, 렌더링 %d회, RSS %s bytes)",
+                                  restart, self.renders, result.get('rss'))
+                self._stop()
+                self._start_in_background()
+            result['restart'] = restart
+
+        if 'error' in result:
+            self.logger.error(result.get('traceback', ''))
+            raise RuntimeError(result['error'])
+        return result
+
+
+_render_process: Optional[RenderProcess] = None
+_render_process_lock = threading.Lock()
+
+
+def get_render_process(config_manager, logger) -> Optional[RenderProcess]:
+    """옵션이 켜져 있으면 렌더링 하위 프로세스 관리자를 반환합니다. (프로세스당 하나)
+
+    일괄 생성 워커(render_process 옵션을 끈 설정)와 데몬 프로세스는 워커마다 렌더링 프로세스를 두지 않도록
+    None을 반환합니다. (워커에서 렌더링)
+    """
+    global _render_process
+    options = getattr(config_manager, 'CONFIG', None) or {}
+    if not options.get('render_process', True) or multiprocessing.current_process().daemon:
+        return None
+    with _render_process_lock:
+        if _render_process is None:
+            _render_process = RenderProcess(
+                config_manager.is_local, options, logger,
+                max_renders=int(options.get('render_process_max_renders') or DEFAULT_MAX_RENDERS),
+                memory_limit=int(options.get('render_process_memory_mb') or DEFAULT_MEMORY_LIMIT_MB) * 1024 * 1024)
+        return _render_process
+
+
+def _reset_render_process():
+    # fork된 자식 프로세스는 부모의 파이프/하위 프로세스를 쓰지 않도록 초기화
+    global _render_process
+    _render_process = None
+
+
+os.register_at_fork(after_in_child=_reset_render_process)
+
+
+if __name__ == '__main__':
+    # 하위 프로세스: 인자는 부모와 연결된 소켓의 파일 디스크립터, 첫 메시지는 시작 설정
+    _connection = Connection(int(sys.argv[1]))
+    _settings = _connection.recv()
+    _serve(_connection, _settings['is_local'], _settings['config'])
@@ -0,0 +1,180 @@
+"""센서 마커/레이블 일괄 그리기
+
+센서마다 patch와 Text 아티스트를 따로 만들면 센서 수에 비례해 figure 구성과 savefig
+비용이 커지므로, 맵 하나의 마커 전체를 경로 하나(아티스트 하나)로 합치고 레이블은
+같은 스타일의 Text 하나를 위치/문자열만 바꿔 가며 한 번에 그립니다.
+
+래스터 경로(격자 기록 애니메이션 오버레이)는 마커 모양을 한 번 스프라이트로 그린 뒤
+센서 위치마다 찍습니다.
+
+마커 모양은 marker_size를 1로 둔 단위 좌표로 정의합니다. (y축은 SVG처럼 아래 방향)
+"""
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+from matplotlib.artist import Artist  # type: ignore
+from matplotlib.colors import to_rgba  # type: ignore
+from matplotlib.path import Path  # type: ignore
+from matplotlib.patches import PathPatch  # type: ignore
+from matplotlib.text import Text  # type: ignore
+from matplotlib.transforms import Bbox  # type: ignore
+from PIL import Image, ImageDraw  # type: ignore
+
+MARKER_STYLES = ('circle', 'square', 'triangle', 'star', 'cross')
+MARKER_ZORDER = 5
+LABEL_ZORDER = 6
+CROSS_LINE_WIDTH = 1.5  # Line2D 기본 두께 (pt)
+_SPRITE_SUPERSAMPLE = 4
+
+
+def _star_vertices() -> np.ndarray:
+    vertices = []
+    for i in range(5):
+        angle = np.deg2rad(i * 72 - 90)
+        vertices.append([np.cos(angle), np.sin(angle)])
+        inner_angle = np.deg2rad(i * 72 + 36 - 90)
+        vertices.append([0.4 * np.cos(inner_angle), 0.4 * np.sin(inner_angle)])
+    return np.array(vertices)
+
+
+@lru_cache(maxsize=None)
+def unit_marker_path(style: str) -> Path:
+    """marker_size = 1 기준 마커 경로 (알 수 없는 스타일은 원)"""
+    if style == 'square':
+        return Path([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5], [-0.5, -0.5]], closed=True)
+    if style == 'triangle':
+        return Path([[0, -0.5], [0.5, 0.5], [-0.5, 0.5], [0, -0.5]], closed=True)
+    if style == 'star':
+        vertices = _star_vertices()
+        return Path(np.vstack([vertices, vertices[:1]]), closed=True)
+    if style == 'cross':
+        return Path([[-0.5, 0], [0.5, 0], [0, -0.5], [0, 0.5]],
+                    [Path.MOVETO, Path.LINETO, Path.MOVETO, Path.LINETO])
+    circle = Path.unit_circle()
+    return Path(circle.vertices * 0.5, circle.codes)
+
+
+def marker_extent(style: str) -> float:
+    """marker_size = 1 기준 마커 외곽 크기 (별은 바깥 반지름이 marker_size)"""
+    return 2.0 if style == 'star' else 1.0
+
+
+def build_marker_path(points: Sequence[Sequence[float]], style: str, size: float) -> Path:
+    """모든 센서 위치의 마커를 하나의 복합 경로로 만듭니다."""
+    unit = unit_marker_path(style)
+    offsets = np.asarray(points, dtype=float).reshape(-1, 1, 2)
+    vertices = (offsets + unit.vertices[np.newaxis] * size).reshape(-1, 2)
+    codes = np.tile(unit.codes, len(offsets)) if unit.codes is not None else None
+    return Path(vertices, codes)
+
+
+def draw_markers(ax, points: Sequence[Sequence[float]], style: str, size: float, color: str) -> Optional[PathPatch]:
+    """마커 전체를 아티스트 하나로 ax에 추가합니다."""
+    if len(points) == 0:
+        return None
+    path = build_marker_path(points, style, size)
+    if style == 'cross':
+        patch = PathPatch(path, fill=False, edgecolor=color, linewidth=CROSS_LINE_WIDTH, capstyle='projecting')
+    else:
+        patch = PathPatch(path, facecolor=color, edgecolor='none')
+    patch.set_zorder(MARKER_ZORDER)
+    ax.add_artist(patch)
+    return patch
+
+
+class SensorLabels(Artist):
+    """같은 스타일의 센서 레이블들을 Text 하나로 돌려 가며 그리는 아티스트
+
+    폰트, 정렬, 배경 상자 설정은 생성 시 한 번만 적용하고, 그릴 때는 레이블마다
+    위치와 문자열만 바꿉니다.
+    """
+
+    def __init__(self, labels: List[Tuple[float, float, str]], **text_kwargs):
+        super().__init__()
+        self.labels = labels
+        self._text = Text(0, 0, '', **text_kwargs)
+        self.set_zorder(LABEL_ZORDER)
+        self.set_clip_on(False)  # ax.text() 기본값과 같이 축 밖으로 나가도 자르지 않음
+
+    def _iter_texts(self):
+        # ax.text()로 만든 Text와 같은 변환/클리핑 설정을 적용
+        self._text.set_figure(self.figure)
+        self._text.set_transform(self.get_transform())
+        self._text.set_clip_on(self.get_clip_on())
+        self._text.set_clip_box(self.get_clip_box())
+        self._text.set_clip_path(self.get_clip_path())
+        for x, y, text in self.labels:
+            self._text.set_position((x, y))
+            self._text.set_text(text)
+            yield self._text
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        for text in self._iter_texts():
+            text.draw(renderer)
+        self.stale = False
+
+    def get_window_extent(self, renderer=None):
+        extents = [text.get_window_extent(renderer) for text in self._iter_texts()]
+        return Bbox.union(extents) if extents else Bbox.null()
+
+    def get_tightbbox(self, renderer=None):
+        """레이블별 Text.get_tightbbox()의 합 (bbox_inches='tight' 계산이 개별 Text와 같도록)"""
+        extents = [bbox for bbox in (text.get_tightbbox(renderer) for text in self._iter_texts())
+                   if bbox is not None]
+        return Bbox.union(extents) if extents else None
+
+
+def _hex_to_rgba(color: str) -> Tuple[int, int, int, int]:
+    return tuple(int(round(c * 255)) for c in to_rgba(color))  # type: ignore
+
+
+@lru_cache(maxsize=32)
+def marker_sprite(style: str, size_px: float, color: str, line_width_px: float = 2.0) -> np.ndarray:
+    """마커 하나를 (h, w, 4) uint8 RGBA 스프라이트로 그립니다. (중심 = 배열 중앙)
+
+    안티앨리어싱을 위해 크게 그린 뒤 줄입니다.
+    """
+    ss = _SPRITE_SUPERSAMPLE
+    extent = marker_extent(style) * size_px
+    side = int(np.ceil(extent + line_width_px)) + 2
+    side += (side + 1) % 2  # 홀수 크기로 중심을 픽셀 중앙에 맞춤
+    image = Image.new('RGBA', (side * ss, side * ss), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    fill = _hex_to_rgba(color)
+    center = side * ss / 2
+
+    def scaled(vertices):
+        return [(center + x * size_px * ss, center + y * size_px * ss) for x, y in vertices]
+
+    if style not in MARKER_STYLES or style == 'circle':
+        radius = size_px * ss / 2
+        draw.ellipse([center - radius, center - radius, center + radius, center + radius], fill=fill)
+    elif style == 'cross':
+        width = max(1, int(round(line_width_px * ss)))
+        draw.line(scaled([[-0.5, 0], [0.5, 0]]), fill=fill, width=width)
+        draw.line(scaled([[0, -0.5], [0, 0.5]]), fill=fill, width=width)
+    else:
+        draw.polygon(scaled(unit_marker_path(style).vertices[:-1]), fill=fill)
+    return np.asarray(image.resize((side, side), Image.LANCZOS))
+
+
+def stamp_sprite(rgba: np.ndarray, sprite: np.ndarray, points_px: Sequence[Sequence[float]]):
+    """sprite를 points_px(픽셀 좌표) 위치마다 rgba 위에 알파 합성합니다. (rgba를 직접 수정)"""
+    height, width = rgba.shape[:2]
+    sh, sw = sprite.shape[:2]
+    sprite_f = sprite.astype(np.float32) / 255
+    for x, y in points_px:
+        left, top = int(np.floor(x)) - sw // 2, int(np.floor(y)) - sh // 2
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + sw, width), min(top + sh, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        src = sprite_f[y0 - top:y1 - top, x0 - left:x1 - left]
+        dst = rgba[y0:y1, x0:x1].astype(np.float32) / 255
+        src_a, dst_a = src[..., 3:], dst[..., 3:]
+        out_a = src_a + dst_a * (1 - src_a)
+        out_rgb = (src[..., :3] * src_a + dst[..., :3] * dst_a * (1 - src_a)) / np.maximum(out_a, 1e-6)
+        rgba[y0:y1, x0:x1] = np.rint(np.concatenate([out_rgb, out_a], axis=-1) * 255).astype(np.uint8)
@@ -5,6 +5,7 @@ export class SettingsManager {
         this.mapId = new URLSearchParams(window.location.search).get('id');
         this.svg = null;
         this.sensorManager = null;
+        this.loadedEncoderConfig = {};
         this.drawingTool = null;
         this.initializeColorSync();
         this.initializeVariogramModel();
@@ -23,6 +24,14 @@ export class SettingsManager {
             });
         }
 
+        // 보간 방법 자동 선택 버튼 이벤트
+        document.getElementById('interpolation-tune')?.addEventListener('click', () => {
+            this.tuneInterpolation();
+        });
+        document.getElementById('interpolation-tune-reset')?.addEventListener('click', () => {
+            this.resetInterpolationTuning();
+        });
+
         // 벽과 센서 저장 버튼 이벤트 리스너
         document.getElementById('save-walls-sensors')?.addEventListener('click', () => {
             const svg = document.getElementById('svg-overlay');
@@ -146,7 +155,14 @@ export class SettingsManager {
                 nlags: parseInt(/** @type {HTMLInputElement} */(document.getElementById('kriging-nlags')).value),
                 weight: /** @type {HTMLInputElement} */ (document.getElementById('kriging-weight')).checked,
                 anisotropy_scaling: parseFloat(/** @type {HTMLInputElement} */(document.getElementById('kriging-anisotropy-scaling')).value),
-                anisotropy_angle: parseFloat(/** @type {HTMLInputElement} */(document.getElementById('kriging-anisotropy-angle')).value)
+                anisotropy_angle: parseFloat(/** @type {HTMLInputElement} */(document.getElementById('kriging-anisotropy-angle')).value),
+                n_closest_points: parseInt(/** @type {HTMLInputElement} */(document.getElementById('kriging-n-closest-points')).value) || 0,
+                neighborhood_backend: /** @type {HTMLSelectElement} */ (document.getElementById('kriging-neighborhood-backend')).value
+            },
+            geodesic: {
+                enabled: /** @type {HTMLInputElement} */ (document.getElementById('geodesic-enabled')).checked,
+                kernel: /** @type {HTMLSelectElement} */ (document.getElementById('geodesic-kernel')).value,
+                power: parseFloat(/** @type {HTMLInputElement} */(document.getElementById('geodesic-power')).value) || 2
             }
         };
 
@@ -182,6 +198,7 @@ export class SettingsManager {
             rotation_count: parseInt(/** @type {HTMLInputElement} */(document.getElementById('rotation-count')).value),
             gif_enabled: /** @type {HTMLInputElement} */ (document.getElementById('gif-enabled')).checked ?? false,
             gif_frame_duration: parseInt(/** @type {HTMLInputElement} */(document.getElementById('gif-frame-duration')).value) ?? 1000,
+            encoder: this.collectEncoderConfig(),
             timestamp: this.collectTimestampConfig(),
             visualization: this.collectVisualizationConfig(),
             colorbar: {
@@ -191,6 +208,17 @@ export class SettingsManager {
         };
     }
 
+    collectEncoderConfig() {
+        const pngCompressLevel = parseInt(/** @type {HTMLInputElement} */(document.getElementById('encoder-png-compress-level')).value);
+        // 화면에 없는 항목(webp_method, avif_speed, derived_png_colors 등)은 불러온 값을 유지
+        return {
+            ...this.loadedEncoderConfig,
+            png_compress_level: Number.isNaN(pngCompressLevel) ? 6 : pngCompressLevel,
+            quality: parseInt(/** @type {HTMLInputElement} */(document.getElementById('encoder-quality')).value) || 85,
+            webp_lossless: /** @type {HTMLInputElement} */ (document.getElementById('encoder-webp-lossless')).checked
+        };
+    }
+
     collectTimestampConfig() {
         return {
             enabled: /** @type {HTMLInputElement} */ (document.getElementById('timestamp-enabled')).checked,
@@ -529,6 +557,7 @@ export class SettingsManager {
                 if (config.gen_config) {
                     this.loadGenConfig(config.gen_config);
                 }
+                this.renderInterpolationTuning(config.interpolation_tuning);
             }
             drawingTool.resetState();
             this.uiManager.saveCurrentSettings();
@@ -545,6 +574,77 @@ export class SettingsManager {
         }
     }
 
+    async tuneInterpolation() {
+        if (!this.mapId) {
+            this.uiManager.showMessage('맵 ID가 없습니다.', 'error');
+            return;
+        }
+        const button = /** @type {HTMLButtonElement} */ (document.getElementById('interpolation-tune'));
+        button.disabled = true;
+        try {
+            this.uiManager.showMessage('보간 방법을 교차 검증하는 중입니다...', 'info');
+            const response = await fetch(`./api/maps/${this.mapId}/interpolation/tune`, { method: 'POST' });
+            const data = await response.json();
+            if (data.status === 'success') {
+                this.renderInterpolationTuning(data.tuning);
+                this.uiManager.showMessage(`보간 방법 자동 선택을 완료했습니다. (${data.duration})`, 'success');
+            } else {
+                this.uiManager.showMessage(data.error || '보간 방법 자동 선택에 실패했습니다.', 'error');
+            }
+        } catch (error) {
+            this.uiManager.showMessage('보간 방법 자동 선택 중 오류가 발생했습니다.', 'error');
+        } finally {
+            button.disabled = false;
+        }
+    }
+
+    async resetInterpolationTuning() {
+        if (!this.mapId) {
+            this.uiManager.showMessage('맵 ID가 없습니다.', 'error');
+            return;
+        }
+        try {
+            const response = await fetch(`./api/maps/${this.mapId}/interpolation/tune`, { method: 'DELETE' });
+            const data = await response.json();
+            if (data.status === 'success') {
+                this.renderInterpolationTuning(null);
+                this.uiManager.showMessage('보간 방법 자동 선택을 해제했습니다.', 'success');
+            } else {
+                this.uiManager.showMessage(data.error || '자동 선택 해제에 실패했습니다.', 'error');
+            }
+        } catch (error) {
+            this.uiManager.showMessage('자동 선택 해제 중 오류가 발생했습니다.', 'error');
+        }
+    }
+
+    renderInterpolationTuning(tuning) {
+        const container = document.getElementById('interpolation-tune-result');
+        if (!container) return;
+        if (!tuning || !tuning.areas) {
+            container.textContent = '자동 선택 결과가 없습니다. (센서 수 기준으로 방법 선택)';
+            return;
+        }
+        const describe = (method, parameters) => {
+            if (method === 'gaussian') return `가우시안 (sigma ${parameters.sigma_factor})`;
+            if (method === 'rbf') return `RBF ${parameters.function} (epsilon ${parameters.epsilon_factor})`;
+            if (method === 'kriging') {
+                const neighbors = parameters.n_closest_points ? `, 이웃 ${parameters.n_closest_points}` : '';
+                return `크리깅 ${parameters.variogram_model}${neighbors}`;
+            }
+            return method;
+        };
+        const rows = Object.entries(tuning.areas).map(([index, area]) => {
+            const name = area.id || `area ${index}`;
+            const result = area.method
+                ? `${describe(area.method, area.parameters)} · RMSE ${area.rmse.toFixed(3)} · ${(area.runtime * 1000).toFixed(1)}ms`
+                : `센서 수 기준 (${area.reason || '-'})`;
+            return `<tr><td class="pr-3 py-0.5">${name}</td><td class="pr-3">${area.sensors}</td><td>${result}</td></tr>`;
+        }).join('');
+        container.innerHTML = `<div class="mb-1 text-gray-500">${tuning.tuned_at} 기준</div>
+            <table><thead><tr class="text-gray-500"><th class="pr-3 text-left">area</th><th class="pr-3 text-left">센서</th><th class="text-left">선택</th></tr></thead>
+            <tbody>${rows}</tbody></table>`;
+    }
+
     async loadInterpolationParameters(params) {
         try {
             /** @type {HTMLInputElement} */ (document.getElementById('gaussian-sigma-factor')).value = params?.gaussian?.sigma_factor ?? 8.0;
@@ -572,6 +672,11 @@ export class SettingsManager {
             /** @type {HTMLInputElement} */ (document.getElementById('kriging-weight')).checked = params?.kriging?.weight ?? true;
             /** @type {HTMLInputElement} */ (document.getElementById('kriging-anisotropy-scaling')).value = params?.kriging?.anisotropy_scaling ?? 1.0;
             /** @type {HTMLInputElement} */ (document.getElementById('kriging-anisotropy-angle')).value = params?.kriging?.anisotropy_angle ?? 0;
+            /** @type {HTMLInputElement} */ (document.getElementById('kriging-n-closest-points')).value = params?.kriging?.n_closest_points ?? 0;
+            /** @type {HTMLSelectElement} */ (document.getElementById('kriging-neighborhood-backend')).value = params?.kriging?.neighborhood_backend ?? 'kdtree';
+            /** @type {HTMLInputElement} */ (document.getElementById('geodesic-enabled')).checked = params?.geodesic?.enabled ?? false;
+            /** @type {HTMLSelectElement} */ (document.getElementById('geodesic-kernel')).value = params?.geodesic?.kernel ?? 'gaussian';
+            /** @type {HTMLInputElement} */ (document.getElementById('geodesic-power')).value = params?.geodesic?.power ?? 2;
 
             // 모델에 따른 파라미터 UI 표시/숨김 처리
             this.updateVariogramParametersVisibility(model);
@@ -606,12 +711,22 @@ export class SettingsManager {
         // 기본 설정
         this.safeSetElementValue('auto-generation-enabled', config.auto_generation ?? true, 'checked');
         this.safeSetElementValue('generation-interval', config.gen_interval ?? 5);
-        this.safeSetElementValue('format', config.format ?? 'png');
+        // AVIF를 지원하지 않는 환경에서는 선택지가 없으므로 실제 저장 포맷(WebP)을 선택
+        const format = config.format ?? 'png';
+        const formatAvailable = document.querySelector(`#format option[value="${format}"]`) !== null;
+        this.safeSetElementValue('format', formatAvailable ? format : 'webp');
         this.safeSetElementValue('file-name', config.file_name ?? 'map');
         this.safeSetElementValue('rotation-count', config.rotation_count ?? 20);
         this.safeSetElementValue('gif-enabled', config.gif_enabled ?? false, 'checked');
         this.safeSetElementValue('gif-frame-duration', config.gif_frame_duration ?? 1000);
 
+        // 인코딩 설정
+        const encoder = config.encoder || {};
+        this.loadedEncoderConfig = { ...encoder };
+        this.safeSetElementValue('encoder-png-compress-level', encoder.png_compress_level ?? 6);
+        this.safeSetElementValue('encoder-quality', encoder.quality ?? 85);
+        this.safeSetElementValue('encoder-webp-lossless', encoder.webp_lossless ?? false, 'checked');
+
         // GIF 설정 토글 초기화
         this.setupToggleControl('gif-enabled', 'gif-settings');
 
@@ -224,8 +224,8 @@ export class ThermalMapManager {
             const data = await response.json();
 
             if (data.status === 'success') {
-                const timestamp = new Date().getTime();
-                this.thermalMapImage.setAttribute('src', `${data.img_url}?t=${timestamp}`);
+                // img_url은 이미지 내용 해시를 포함하므로 내용이 바뀔 때만 새로 받음
+                this.thermalMapImage.setAttribute('src', data.img_url);
                 
                 if (this.mapGenerationTime) {
                     this.mapGenerationTime.textContent = data.time;
@@ -437,7 +437,10 @@ export class ThermalMapManager {
         
         const current = this.previousMaps[this.currentIndex];
         
-        // 이미지 표시
+        // 이미지 표시 (표시 크기에 맞는 축소 이미지가 있으면 브라우저가 선택)
+        const medium = current.derived_urls?.medium;
+        this.previousMapImage.srcset = medium ? `${medium} 500w, ${current.url} 1000w` : '';
+        this.previousMapImage.sizes = medium ? '(min-width: 1024px) 600px, 100vw' : '';
         this.previousMapImage.src = current.url;
         this.previousMapImage.classList.remove('hidden');
         
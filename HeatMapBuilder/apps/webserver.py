@@ -1,40 +1,81 @@
 import os
+import io
 import logging
 import time
 from datetime import datetime
 import threading
 import uuid
-import io
 import asyncio
 import json
-from quart import Quart, jsonify, request, render_template, Response, send_from_directory # type: ignore
+import mimetypes
+from quart import Quart, jsonify, request, render_template, Response, send_file # type: ignore
+from werkzeug.utils import safe_join # type: ignore
 import hypercorn.asyncio # type: ignore
 import hypercorn.config # type: ignore
-import matplotlib.pyplot as plt # type: ignore
-import matplotlib.cm as cm # type: ignore
 import numpy as np # type: ignore
+from grid_payload import encode_grid, GRID_DTYPES, GRID_FIELDS
+from grid_query import run_query, DEFAULT_PERCENTILES
+from grid_history import GridHistory
+from loop_monitor import LoopLagMonitor
 import shutil
 
+# 내용 기반 URL(쿼리가 현재 내용 해시와 일치)로 요청된 미디어의 캐시 유지 시간 (1년)
+IMMUTABLE_MAX_AGE = 31536000
+
+# 파이썬 버전에 따라 등록되지 않은 출력 이미지 MIME 타입
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
 class WebServer:
     """지도 웹 서버 클래스"""
     
-    def __init__(self, ConfigManager, SensorManager, MapGenerator, Logger):
+    def __init__(self, ConfigManager, SensorManager, MapGenerator, Logger, started_at=None):
         self.app = Quart(__name__,
                          template_folder=os.path.join('webapps', 'templates'),
                          static_folder=os.path.join('webapps', 'static'))
         self.logger = Logger
-        self.map_lock = threading.Lock()  # 락 메커니즘 추가
 
         self.config_manager = ConfigManager
         self.sensor_manager = SensorManager
         self.map_generator = MapGenerator
+        self._overlay_cache = {}  # 격자 기록 애니메이션 오버레이 (맵 설정/크기/값 범위별)
+        self.started_at = started_at or time.time()  # 프로세스 시작 시각 (첫 응답까지 소요시간 측정용)
+        self._first_response_logged = False
+        self.loop_monitor = LoopLagMonitor(self.map_generator.metrics, self.logger)
+        self.background_task_manager = None  # run()에서 설정 (상태 API용)
         
         # 기본 설정 로드
         self.default_config = self._load_default_config()
         
         self._init_app()
         self._setup_routes()
+
+        # 컬러맵 스프라이트 시트를 미리 생성 (옵션)
+        if self.config_manager.CONFIG.get('precompute_colormap_sprite', False):
+            threading.Thread(target=self._precompute_colormap_sprite, daemon=True).start()
     
+    def _precompute_colormap_sprite(self):
+        """백그라운드에서 컬러맵 스프라이트 시트를 생성하여 캐시합니다."""
+        try:
+            from colormap_preview import build_sprite_sheet
+            start_time = time.time()
+            sprite = build_sprite_sheet()
+            self.logger.debug(f"컬러맵 스프라이트 시트 생성 완료: {len(sprite['names'])}개, "
+                              f"{len(sprite['png'])} bytes, {time.time() - start_time:.3f}초")
+        except Exception as e:
+            self.logger.error(f"컬러맵 스프라이트 시트 생성 실패: {str(e)}")
+
+    async def _record_first_response(self, response):
+        if not self._first_response_logged and response.status_code == 200:
+            self._first_response_logged = True
+            elapsed = time.time() - self.started_at
+            self._startup_gauge().set(elapsed, {'stage': 'first_response'})
+            self.logger.info(f"첫 HTTP 200 응답: 프로세스 시작 후 {elapsed:.3f}초")
+        return response
+
+    def _startup_gauge(self):
+        return self.map_generator.metrics.gauge('heatmap_startup_seconds', '프로세스 시작 후 단계별 소요시간')
+
     def _load_default_config(self):
         """기본 설정 JSON 파일을 로드합니다."""
         try:
@@ -75,6 +116,9 @@ class WebServer:
         
         # 404 에러 핸들러 등록
         self.app.register_error_handler(404, self.handle_404_error)
+
+        # 프로세스 시작부터 첫 HTTP 200 응답까지의 소요시간 기록
+        self.app.after_request(self._record_first_response)
     
     async def handle_404_error(self, error):
         """404 에러 처리"""
@@ -111,17 +155,25 @@ class WebServer:
     
         @self.app.route('/api/save-configuration/<map_id>', methods=['POST'])
         async def save_configuration(map_id):
-            """모든 설정 통합 저장 (보간 파라미터 및 생성 구성)"""
+            """모든 설정 통합 저장 (보간 파라미터, 생성 구성 및 추가 레이어)"""
             data = await request.get_json() or {}
             update_data = {}
             
             # 보간 파라미터가 있으면 업데이트 데이터에 추가
             if 'interpolation_params' in data:
+                from local_kriging import NEIGHBORHOOD_BACKENDS
                 update_data['parameters'] = data.get('interpolation_params', {})
+                backend = (update_data['parameters'].get('kriging') or {}).get('neighborhood_backend', 'kdtree')
+                if backend not in NEIGHBORHOOD_BACKENDS:
+                    return jsonify({'status': 'error', 'error': f'알 수 없는 크리깅 이웃 탐색 방식입니다: {backend}'})
                 
             # 생성 구성이 있으면 업데이트 데이터에 추가
             if 'gen_config' in data:
                 update_data['gen_config'] = data.get('gen_config', {})
+
+            # 추가 레이어 설정이 있으면 업데이트 데이터에 추가
+            if 'layers' in data:
+                update_data['layers'] = data.get('layers') or []
                 
             # 데이터베이스 업데이트
             if update_data:
@@ -149,17 +201,17 @@ class WebServer:
 
         @self.app.route('/api/generate-map/<map_id>', methods=['GET'])
         async def generate_map(map_id):
-            """지도 생성 API"""
-            if not self.map_lock.acquire(blocking=False):
-                return jsonify({
-                    'status': 'error',
-                    'error': '다른 프로세스가 지도를 생성 중입니다. 잠시 후 다시 시도해주세요.'
-                })
+            """지도 생성 API (?profile=1 이면 cProfile 측정 결과를 함께 저장)
 
+            같은 맵을 백그라운드 작업이 생성 중이면 맵별 생성 락으로 건너뛰고 오류를 반환합니다.
+            """
             try:
                 # 지도 생성
                 _, _, output_path = self.config_manager.get_output_info(map_id)
-                result = await self.map_generator.generate(map_id, output_path)
+                profile = request.args.get('profile', '0').lower() in ('1', 'true', 'yes')
+                profile_top = request.args.get('top', 30, type=int)
+                result = await self.map_generator.generate(map_id, output_path,
+                                                           profile=profile, profile_top=profile_top)
                 if result['success']:
                     map_name = self.config_manager.db.get_map(map_id).get('name', '')
                     last_generation = self.config_manager.db.get_map(map_id).get('last_generation', {})
@@ -168,12 +220,16 @@ class WebServer:
                                     map_id,
                                     self.logger._colorize(last_generation.get('duration', ''), "green"))
 
-                    return jsonify({
+                    response = {
                         'status': 'success',
                         'img_url': self.config_manager.get_image_url(map_id),
                         'time': result['time'],
-                        'duration': result['duration']
-                    })
+                        'duration': result['duration'],
+                        'timings': result.get('timings', {})
+                    }
+                    if 'profile' in result:
+                        response['profile'] = result['profile']
+                    return jsonify(response)
                 else:
                     return jsonify({
                         'status': 'error',
@@ -192,8 +248,6 @@ class WebServer:
                     await self.sensor_manager.websocket_client.close()
                 except Exception as close_error:
                     self.app.logger.error(f"웹소켓 연결 종료 중 오류 발생: {str(close_error)}")
-                finally:
-                    self.map_lock.release()  # 락 해제
 
         @self.app.route('/api/check-map-time/<map_id>', methods=['GET'])
         async def check_map_time(map_id):
@@ -251,6 +305,56 @@ class WebServer:
             """특정 맵의 이전 생성 이미지 삭제"""
             return await self.delete_previous_map(map_id, image_id)
 
+        @self.app.route('/api/maps/<map_id>/grid', methods=['GET'])
+        async def get_map_grid(map_id):
+            """마지막 보간 격자 바이너리 조회 (?dtype=float16|uint8, ?layer=레이어 ID, ?field=value|stddev)"""
+            return await self.get_map_grid(map_id)
+
+        @self.app.route('/api/maps/<map_id>/confidence', methods=['GET'])
+        async def get_map_confidence(map_id):
+            """마지막 보간의 크리깅 표준편차(신뢰도) 이미지 (PNG)"""
+            return await self.get_map_confidence(map_id)
+
+        @self.app.route('/api/maps/<map_id>/query', methods=['GET', 'POST'])
+        async def query_map_values(map_id):
+            """마지막 보간 격자에서 지점/영역 값 조회"""
+            return await self.query_map_values(map_id)
+
+        @self.app.route('/api/maps/<map_id>/history', methods=['GET'])
+        async def get_map_history(map_id):
+            """격자 기록 프레임 목록 조회"""
+            return await self.get_map_history(map_id)
+
+        @self.app.route('/api/maps/<map_id>/history/animation', methods=['GET'])
+        async def get_map_history_animation(map_id):
+            """격자 기록으로 애니메이션 렌더링 (GIF 스트리밍, WebP)"""
+            return await self.get_map_history_animation(map_id)
+
+        @self.app.route('/api/maps/<map_id>/history/<int:version>', methods=['GET'])
+        async def get_map_history_frame(map_id, version):
+            """격자 기록 프레임의 센서 값 조회"""
+            return await self.get_map_history_frame(map_id, version)
+
+        @self.app.route('/api/maps/<map_id>/history/<int:version>/grid', methods=['GET'])
+        async def get_map_history_grid(map_id, version):
+            """격자 기록 프레임의 격자 바이너리 조회 (?dtype=float16|uint8)"""
+            return await self.get_map_history_grid(map_id, version)
+
+        @self.app.route('/api/maps/<map_id>/interpolation/tune', methods=['GET'])
+        async def get_interpolation_tuning(map_id):
+            """area별 보간 방법 자동 선택 결과 조회"""
+            return await self.get_interpolation_tuning(map_id)
+
+        @self.app.route('/api/maps/<map_id>/interpolation/tune', methods=['POST'])
+        async def tune_interpolation(map_id):
+            """현재 센서값으로 area별 보간 방법 자동 선택 (교차 검증) 실행"""
+            return await self.tune_interpolation(map_id)
+
+        @self.app.route('/api/maps/<map_id>/interpolation/tune', methods=['DELETE'])
+        async def delete_interpolation_tuning(map_id):
+            """자동 선택 결과 삭제 (센서 수 기준 방법 선택으로 복귀)"""
+            return await self.delete_interpolation_tuning(map_id)
+
         @self.app.route('/api/maps/export', methods=['GET'])
         async def export_maps():
             return await self.export_maps()
@@ -259,6 +363,14 @@ class WebServer:
         async def import_maps():
             return await self.import_maps()
 
+        @self.app.route('/api/metrics', methods=['GET'])
+        async def get_metrics():
+            return await self.get_metrics()
+
+        @self.app.route('/api/status', methods=['GET'])
+        async def get_status():
+            return await self.get_status()
+
         @self.app.route('/api/debug-websocket', methods=['POST'])
         async def debug_websocket():
             """WebSocket 디버그 API"""
@@ -297,31 +409,17 @@ class WebServer:
                         'error': '컬러맵 이름이 필요합니다.'
                     }), 400
 
-                # matplotlib을 사용하여 컬러맵 미리보기 이미지 생성
-                
+                from colormap_preview import render_preview_png
                 try:
-                    # 컬러맵 유효성 검사
-                    cm.get_cmap(colormap_name)
+                    # 컬러맵 LUT로 생성한 PNG (이름별 LRU 캐시)
+                    png = render_preview_png(colormap_name)
                 except ValueError:
                     return jsonify({
                         'status': 'error',
                         'error': '잘못된 컬러맵 이름입니다.'
                     }), 400
 
-                # 컬러맵 미리보기 이미지 생성
-                fig, ax = plt.subplots(figsize=(6, 1))
-                gradient = np.linspace(0, 1, 256)
-                gradient = np.vstack((gradient, gradient))
-                ax.imshow(gradient, aspect='auto', cmap=colormap_name)
-                ax.set_axis_off()
-                
-                # 이미지를 바이트로 변환
-                buf = io.BytesIO()
-                plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0)
-                buf.seek(0)
-                plt.close()
-
-                return Response(buf.getvalue(), mimetype='image/png')
+                return Response(png, mimetype='image/png')
 
             except Exception as e:
                 self.logger.error(f"컬러맵 미리보기 생성 실패: {str(e)}")
@@ -330,6 +428,16 @@ class WebServer:
                     'error': str(e)
                 }), 500
 
+        @self.app.route('/api/colormaps')
+        async def get_colormaps():
+            """컬러맵 목록 및 스프라이트 시트 정보 API"""
+            return await self.get_colormaps()
+
+        @self.app.route('/api/colormaps/sprite.png')
+        async def get_colormap_sprite():
+            """모든 컬러맵의 스프라이트 시트 이미지"""
+            return await self.get_colormap_sprite()
+
     async def maps_page(self):
         """맵 선택 페이지"""
         return await render_template('maps.html')
@@ -361,6 +469,8 @@ class WebServer:
             full_gif_url = f"{host_url}{gif_url}"
             full_gif_url_without_timestamp = f"{host_url}{gif_url_without_timestamp}"
 
+            from image_output import avif_supported
+
             return await render_template('index.html', 
                             img_url=full_img_url,
                             img_url_without_timestamp=full_img_url_without_timestamp,
@@ -371,7 +481,8 @@ class WebServer:
                             map_generation_time=timestamp,
                             map_generation_duration=last_generation_info.get('duration', ''),
                             map_name=map_data.get('name', ''),
-                            map_id=map_id)
+                            map_id=map_id,
+                            avif_supported=avif_supported())
         except Exception as e:
             self.logger.error(f"맵 전환 실패: {str(e)}")
             return await render_template('404.html', error_message='맵 로딩 중 오류가 발생했습니다'), 404
@@ -388,19 +499,367 @@ class WebServer:
         return jsonify(label_registry)
 
     async def serve_media(self, filename):
-        """미디어 파일 제공"""
+        """미디어 파일 제공
+
+        내용 해시를 강한 ETag로 사용하고 Last-Modified, 조건부 요청(304),
+        Range 요청(206)을 처리합니다. 쿼리 문자열이 현재 내용 해시와 같은
+        내용 기반 URL은 오래 캐시되도록, 그 외에는 매번 재검증하도록 응답합니다.
+        """
         self.app.logger.debug(f"미디어 파일 요청: {filename}")
         media_path = self.config_manager.paths['media']
-        full_path = os.path.join(media_path, filename)
-        directory = os.path.dirname(full_path)
-        base_filename = os.path.basename(full_path)
+        full_path = safe_join(media_path, filename)
         
-        if os.path.exists(full_path):
-            return await send_from_directory(directory, base_filename)
-        else:
+        if full_path is None or not os.path.isfile(full_path):
             self.app.logger.error(f"파일을 찾을 수 없음: {filename}")
             return "File not found", 404
+
+        # 캐시에 없으면(다른 프로세스가 새로 쓴 파일 등) 파일 전체를 읽어야 하므로 스레드에서 해시 계산
+        content_hash = (self.config_manager.get_cached_content_hash(full_path)
+                        or await asyncio.to_thread(self.config_manager.get_content_hash, full_path))
+        immutable = content_hash in request.args
+        response = await send_file(full_path,
+                                   add_etags=False,
+                                   cache_timeout=IMMUTABLE_MAX_AGE if immutable else 0)
+        response.set_etag(content_hash)
+        if immutable:
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        await response.make_conditional(request, accept_ranges=True,
+                                        complete_length=os.path.getsize(full_path))
+        return response
     
+    async def get_metrics(self):
+        """맵 생성 단계별 소요시간 메트릭 (Prometheus 텍스트 형식)"""
+        return Response(self.map_generator.metrics.render(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    async def get_status(self):
+        """서버 상태: 이벤트 루프 지연, 백그라운드 작업 루프 실행 정보, 맵별 생성 지연
+
+        맵 생성 등이 이벤트 루프를 막으면 loop의 지연 값이, 백그라운드 작업이 멈추거나 생성이
+        밀리면 background의 since_last_iteration과 maps_overdue가 커집니다.
+        """
+        try:
+            background = self.background_task_manager.status() if self.background_task_manager else None
+            return jsonify({
+                'status': 'success',
+                'uptime': round(time.time() - self.started_at, 1),
+                'loop': self.loop_monitor.status(),
+                'background': background
+            })
+        except Exception as e:
+            self.logger.error(f"상태 조회 실패: {str(e)}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            return jsonify({'status': 'error', 'error': str(e)}), 500
+
+    async def get_map_grid(self, map_id):
+        """마지막으로 생성된 보간 격자를 바이너리 페이로드로 반환
+
+        페이로드 구조는 grid_payload 모듈 참고. 격자가 없으면(서버 시작 후
+        아직 생성되지 않은 경우) 404를 반환하며 새로 생성하지 않습니다.
+        추가 레이어의 격자는 ?layer=레이어 ID로 조회합니다.
+        ?field=stddev면 보간값 대신 크리깅 표준편차 격자를 반환합니다. (크리깅하지 않은 area는 값 없음)
+        """
+        layer_id = request.args.get('layer')
+        entry = self.map_generator.grid_cache.get(self.map_generator.grid_key(map_id, layer_id))
+        if entry is None:
+            return jsonify({
+                'status': 'error',
+                'error': '생성된 격자 데이터가 없습니다. 지도를 먼저 생성해주세요.'
+            }), 404
+
+        dtype = request.args.get('dtype', 'float16')
+        if dtype not in GRID_DTYPES:
+            return jsonify({
+                'status': 'error',
+                'error': f"지원하지 않는 dtype입니다: {dtype} (float16, uint8)"
+            }), 400
+        field = request.args.get('field', 'value')
+        if field not in GRID_FIELDS:
+            return jsonify({
+                'status': 'error',
+                'error': f"지원하지 않는 field입니다: {field} (value, stddev)"
+            }), 400
+
+        payload = await asyncio.to_thread(encode_grid, entry, dtype, field)
+        response = Response(payload, mimetype='application/octet-stream')
+        response.set_etag(f"{self.map_generator.grid_key(map_id, layer_id)}-{entry['version']}-{dtype}-{field}")
+        response.cache_control.no_cache = True
+        response.headers['X-Grid-Version'] = str(entry['version'])
+        await response.make_conditional(request)
+        return response
+
+    def _read_history(self, map_id, version=None):
+        """격자 기록을 읽습니다. version이 없으면 프레임 목록, 있으면 해당 프레임 (기록이 없으면 None)"""
+        try:
+            with GridHistory.open(self.config_manager.get_history_path(map_id)) as history:
+                if version is None:
+                    return {'capacity': history.capacity, 'frames': history.timestamps()}
+                return history.read(version)
+        except FileNotFoundError:
+            return None
+
+    async def get_map_history(self, map_id):
+        """격자 기록에 저장된 프레임 목록을 반환 (오래된 순, version = 생성 시작 시각 ns)"""
+        history = await asyncio.to_thread(self._read_history, map_id)
+        if history is None:
+            return jsonify({'status': 'error', 'error': '격자 기록이 없습니다.'}), 404
+        return jsonify({
+            'status': 'success',
+            'capacity': history['capacity'],
+            'frames': [{
+                'version': version,
+                'time': datetime.fromtimestamp(version / 1e9).strftime('%Y-%m-%d %H:%M:%S')
+            } for version in history['frames']]
+        })
+
+    async def get_map_history_frame(self, map_id, version):
+        """격자 기록 프레임의 생성 시각과 센서 값을 반환"""
+        frame = await asyncio.to_thread(self._read_history, map_id, version)
+        if frame is None:
+            return jsonify({'status': 'error', 'error': '해당 프레임이 없습니다.'}), 404
+        return jsonify({
+            'status': 'success',
+            'version': frame['version'],
+            'time': frame['time'],
+            'sensors': frame['sensors']
+        })
+
+    async def get_map_history_grid(self, map_id, version):
+        """격자 기록 프레임을 /grid와 같은 바이너리 페이로드로 반환
+
+        프레임 내용은 바뀌지 않으므로 오래 캐시할 수 있습니다.
+        """
+        dtype = request.args.get('dtype', 'uint8')
+        if dtype not in GRID_DTYPES:
+            return jsonify({
+                'status': 'error',
+                'error': f"지원하지 않는 dtype입니다: {dtype} (float16, uint8)"
+            }), 400
+
+        frame = await asyncio.to_thread(self._read_history, map_id, version)
+        if frame is None:
+            return jsonify({'status': 'error', 'error': '해당 프레임이 없습니다.'}), 404
+
+        payload = await asyncio.to_thread(encode_grid, frame, dtype)
+        response = Response(payload, mimetype='application/octet-stream')
+        response.set_etag(f"{map_id}-{version}-{dtype}")
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.headers['X-Grid-Version'] = str(version)
+        await response.make_conditional(request)
+        return response
+
+    def _read_history_frames(self, map_id, start=None, end=None, last=None):
+        """격자 기록에서 [start, end] 범위의 (최근 last개) 프레임을 읽습니다. (기록이 없으면 None)"""
+        try:
+            with GridHistory.open(self.config_manager.get_history_path(map_id)) as history:
+                versions = [version for version in history.timestamps()
+                            if (start is None or version >= start) and (end is None or version <= end)]
+                if last:
+                    versions = versions[-last:]
+                frames = [history.read(version) for version in versions]
+                return [frame for frame in frames if frame is not None]
+        except FileNotFoundError:
+            return None
+
+    def _history_overlay(self, map_id, map_data, size, vrange, grid_z=None):
+        """애니메이션 정적 오버레이를 반환합니다. (맵 설정이 바뀌지 않았으면 캐시 사용, vrange가 None이면 컬러바 없음)
+
+        grid_z(최근 격자)는 측지 거리로 채운 area에서 값이 없는 격자점을 찾는 데 사용합니다.
+        matplotlib으로 그리므로 이벤트 루프가 아닌 스레드에서 호출합니다.
+        """
+        key = (map_id, map_data.get('updated_at'), size, vrange and (round(vrange[0], 3), round(vrange[1], 3)),
+               None if grid_z is None else np.packbits(np.isnan(grid_z)).tobytes())
+        overlay = self._overlay_cache.get(key)
+        if overlay is None:
+            # 생성 중인 공유 생성기의 상태를 바꾸지 않도록 별도 인스턴스 사용 (스레드에서 호출됨)
+            generator = self.map_generator.create_instance()
+            generator.load_map_config(map_id)
+            generator._parse_areas()
+            overlay = generator.render_overlay(size, vrange, grid_z)
+            if len(self._overlay_cache) >= 16:
+                self._overlay_cache.clear()
+            self._overlay_cache[key] = overlay
+        return overlay
+
+    async def get_map_history_animation(self, map_id):
+        """격자 기록으로 애니메이션을 렌더링하여 인코딩되는 대로 전송 (WebP는 인코딩이 끝난 뒤 한 번에 전송)
+
+        보관된 이미지 대신 저장된 격자에서 현재 컬러맵/스타일로 프레임을 그립니다.
+        ?format=gif|webp, ?size=출력 크기(100~1000, 기본 500), ?last=최근 프레임 수,
+        ?start=&end=version 범위(ns), ?interpolate=프레임 사이 보간 프레임 수(0~10),
+        ?duration=프레임 간격(ms, 기본은 GIF 프레임 간격을 보간 수로 나눈 값), ?timestamp=0이면 시각 표시 안 함
+        """
+        from history_animation import (ANIMATION_FORMATS, MAX_ANIMATION_FRAMES, build_lut, value_range,
+                                       stream_animation)
+        map_data = self.config_manager.db.get_map(map_id)
+        if not map_data:
+            return jsonify({'status': 'error', 'error': '요청한 맵을 찾을 수 없습니다.'}), 404
+        gen_config = map_data.get('gen_config', {})
+
+        try:
+            format = request.args.get('format', 'gif').lower()
+            if format not in ANIMATION_FORMATS:
+                raise ValueError(f"지원하지 않는 형식입니다: {format} (gif, webp)")
+            size = int(request.args.get('size', 500))
+            interpolate = int(request.args.get('interpolate', 0))
+            if not (100 <= size <= 1000 and 0 <= interpolate <= 10):
+                raise ValueError("size는 100~1000, interpolate는 0~10이어야 합니다")
+            last = int(request.args['last']) if 'last' in request.args else None
+            start = int(request.args['start']) if 'start' in request.args else None
+            end = int(request.args['end']) if 'end' in request.args else None
+            default_duration = int(gen_config.get('gif_frame_duration', 1000)) // (interpolate + 1)
+            duration = max(20, int(request.args.get('duration', default_duration)))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': f"잘못된 요청입니다: {str(e)}"}), 400
+
+        frames = await asyncio.to_thread(self._read_history_frames, map_id, start, end, last)
+        if frames is None:
+            return jsonify({'status': 'error', 'error': '격자 기록이 없습니다.'}), 404
+        if not frames:
+            return jsonify({'status': 'error', 'error': '해당 범위에 프레임이 없습니다.'}), 404
+        frame_count = len(frames) + (len(frames) - 1) * interpolate
+        if frame_count > MAX_ANIMATION_FRAMES:
+            return jsonify({
+                'status': 'error',
+                'error': f"프레임 수가 너무 많습니다: {frame_count} (최대 {MAX_ANIMATION_FRAMES}, last/start/end로 범위를 줄여주세요)"
+            }), 400
+
+        colorbar_config = gen_config.get('colorbar', {})
+        try:
+            lut = build_lut(colorbar_config.get('cmap', 'RdYlBu_r'), colorbar_config.get('temp_steps', 100))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+        vrange = value_range([frame['grid_z'] for frame in frames], colorbar_config)
+        overlay = await asyncio.to_thread(self._history_overlay, map_id, map_data, size, vrange, frames[-1]['grid_z'])
+
+        def on_error(e):
+            self.logger.error(f"격자 기록 애니메이션 인코딩 중 오류 발생: {str(e)}")
+
+        label_format = '%Y-%m-%d %H:%M' if request.args.get('timestamp', '1') != '0' else None
+        body = stream_animation(frames, overlay, lut, vrange, format=format, duration=duration,
+                                interpolate=interpolate, label_format=label_format,
+                                label_style=gen_config.get('timestamp', {}), on_error=on_error)
+        response = Response(body, mimetype=ANIMATION_FORMATS[format][1])
+        response.headers['Content-Disposition'] = f'inline; filename="{map_id}_history.{format}"'
+        response.headers['X-Frame-Count'] = str(frame_count)
+        response.cache_control.no_cache = True
+        return response
+
+    async def get_map_confidence(self, map_id):
+        """마지막 보간의 크리깅 표준편차를 PNG 이미지로 반환
+
+        보간과 같은 크리깅 풀이에서 나온 분산만 사용하므로 추가 계산이 없습니다. 값이 클수록(밝을수록)
+        주변 센서로 설명되지 않는 곳이며, 크리깅하지 않은 area는 투명합니다.
+        ?size=출력 크기(100~1000, 기본 500), ?cmap=컬러맵(기본 magma), ?layer=레이어 ID
+        """
+        from history_animation import build_lut, render_frame
+        layer_id = request.args.get('layer')
+        entry = self.map_generator.grid_cache.get(self.map_generator.grid_key(map_id, layer_id))
+        map_data = self.config_manager.db.get_map(map_id)
+        if entry is None or not map_data:
+            return jsonify({
+                'status': 'error',
+                'error': '생성된 격자 데이터가 없습니다. 지도를 먼저 생성해주세요.'
+            }), 404
+        stddev = entry.get('grid_stddev')
+        if stddev is None or not np.any(np.isfinite(stddev)):
+            return jsonify({'status': 'error', 'error': '크리깅으로 보간된 area가 없습니다.'}), 404
+
+        try:
+            size = int(request.args.get('size', 500))
+            if not 100 <= size <= 1000:
+                raise ValueError("size는 100~1000이어야 합니다")
+            lut = build_lut(request.args.get('cmap', 'magma'), 256)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': f"잘못된 요청입니다: {str(e)}"}), 400
+
+        def render():
+            overlay = self._history_overlay(map_id, map_data, size, None, entry.get('grid_z'))
+            frame = render_frame(stddev, lut, 0.0, float(np.nanmax(stddev)), overlay)
+            buffer = io.BytesIO()
+            frame.save(buffer, format='PNG')
+            return buffer.getvalue()
+
+        payload = await asyncio.to_thread(render)
+        response = Response(payload, mimetype='image/png')
+        response.headers['X-Grid-Version'] = str(entry['version'])
+        response.headers['X-Stddev-Max'] = f"{float(np.nanmax(stddev)):.4f}"
+        response.cache_control.no_cache = True
+        return response
+
+    async def query_map_values(self, map_id):
+        """마지막으로 생성된 보간 격자에서 지점 값과 area 집계를 조회
+
+        POST(일괄 조회): {"points": [{"x": .., "y": ..}], "regions": [{"area": 0}, {"sensor": "sensor.x"}],
+                          "percentiles": [10, 50, 90]}
+        GET(단일 조회): ?x=..&y=.. 또는 ?area=.. 또는 ?sensor=..
+        추가 레이어는 ?layer=레이어 ID로 지정합니다.
+
+        캐시된 격자만 사용하며 새로 생성하지 않습니다.
+        """
+        entry = self.map_generator.grid_cache.get(self.map_generator.grid_key(map_id, request.args.get('layer')))
+        if entry is None:
+            return jsonify({
+                'status': 'error',
+                'error': '생성된 격자 데이터가 없습니다. 지도를 먼저 생성해주세요.'
+            }), 404
+
+        try:
+            if request.method == 'POST':
+                data = await request.get_json() or {}
+                points = data.get('points', [])
+                regions = data.get('regions', [])
+                percentiles = data.get('percentiles', DEFAULT_PERCENTILES)
+            else:
+                args = request.args
+                points = [{'x': args['x'], 'y': args['y']}] if 'x' in args and 'y' in args else []
+                regions = [{key: args[key]} for key in ('area', 'sensor') if key in args]
+                percentiles = [float(p) for p in args.getlist('percentile')] or DEFAULT_PERCENTILES
+
+            if not points and not regions:
+                return jsonify({
+                    'status': 'error',
+                    'error': '조회할 지점(points) 또는 영역(regions)이 필요합니다.'
+                }), 400
+
+            result = run_query(entry, points, regions, percentiles)
+            return jsonify({'status': 'success', **result})
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({
+                'status': 'error',
+                'error': f"잘못된 조회 요청입니다: {str(e)}"
+            }), 400
+
+    async def get_colormaps(self):
+        """컬러맵 이름 목록과 스프라이트 시트에서의 위치 정보를 반환"""
+        from colormap_preview import build_sprite_sheet
+        sprite = await asyncio.to_thread(build_sprite_sheet)
+        return jsonify({
+            'colormaps': sprite['names'],
+            'sprite_url': f"/api/colormaps/sprite.png?{sprite['etag']}",
+            'width': sprite['width'],
+            'row_height': sprite['row_height']
+        })
+
+    async def get_colormap_sprite(self):
+        """모든 컬러맵을 한 줄씩 쌓은 스프라이트 시트 PNG
+
+        내용이 matplotlib 버전에 따라서만 바뀌므로 ETag와 함께 오래 캐시되도록 응답합니다.
+        """
+        from colormap_preview import build_sprite_sheet
+        sprite = await asyncio.to_thread(build_sprite_sheet)
+        response = Response(sprite['png'], mimetype='image/png')
+        response.set_etag(sprite['etag'])
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        await response.make_conditional(request)
+        return response
+
     async def get_maps(self):
         """모든 맵 목록을 반환"""
         maps = self.config_manager.db.get_all_maps()
@@ -437,6 +896,34 @@ class WebServer:
         self.config_manager.db.save(map_id, map_config)
         return jsonify({'id': map_id})
 
+    async def get_interpolation_tuning(self, map_id):
+        """저장된 area별 보간 방법 자동 선택 결과를 반환"""
+        map_data = self.config_manager.db.get_map(map_id)
+        if not map_data:
+            return jsonify({'status': 'error', 'error': '요청한 맵을 찾을 수 없습니다.'}), 404
+        return jsonify({'status': 'success', 'tuning': map_data.get('interpolation_tuning')})
+
+    async def tune_interpolation(self, map_id):
+        """area별 보간 방법을 교차 검증으로 골라 저장
+
+        생성 중인 공유 생성기의 상태를 바꾸지 않도록 별도 인스턴스를 사용합니다.
+        """
+        if not self.config_manager.db.get_map(map_id):
+            return jsonify({'status': 'error', 'error': '요청한 맵을 찾을 수 없습니다.'}), 404
+        # 생성기 모듈 불러오기와 초기화가 이벤트 루프를 막지 않도록 스레드에서 생성
+        generator = await asyncio.to_thread(self.map_generator.create_instance, self.sensor_manager)
+        result = await generator.tune_interpolation(map_id)
+        if not result['success']:
+            return jsonify({'status': 'error', 'error': result['error']}), 500
+        return jsonify({'status': 'success', 'tuning': result['tuning'], 'duration': result['duration']})
+
+    async def delete_interpolation_tuning(self, map_id):
+        """저장된 자동 선택 결과를 삭제"""
+        if not self.config_manager.db.get_map(map_id):
+            return jsonify({'status': 'error', 'error': '요청한 맵을 찾을 수 없습니다.'}), 404
+        self.config_manager.db.update_map(map_id, {'interpolation_tuning': None})
+        return jsonify({'status': 'success'})
+
     async def get_map(self, map_id):
         """특정 맵의 상세 정보 조회"""
         try:
@@ -456,6 +943,11 @@ class WebServer:
             
             # DB에서 맵 삭제
             self.config_manager.db.delete_map(map_id)
+            self.map_generator.drop_grids(map_id)
+            history_path = self.config_manager.get_history_path(map_id)
+            if os.path.exists(history_path):
+                os.remove(history_path)
+            shutil.rmtree(self.config_manager.get_geodesic_dir(map_id), ignore_errors=True)
             
             # 맵 폴더가 존재하면 삭제
             if os.path.exists(map_dir):
@@ -553,7 +1045,7 @@ class WebServer:
                 
             gen_config = map_data.get('gen_config', {})
             file_name = gen_config.get('file_name', 'map')
-            file_format = gen_config.get('format', 'png')
+            file_format = self.config_manager.get_output_format(map_id)
                         
             dir = os.path.dirname(self.config_manager.get_output_path(map_id))
             # 패턴에 맞는 파일 목록 가져오기
@@ -571,6 +1063,7 @@ class WebServer:
                             'id': str(index),  # 사용할 ID 형식으로 변환
                             'index': index,
                             'url': img_url,
+                            'derived_urls': self.config_manager.get_derived_urls(map_id, index),
                             'timestamp': timestamp,
                             'date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
                         })
@@ -614,7 +1107,7 @@ class WebServer:
                 
             gen_config = map_data.get('gen_config', {})
             file_name = gen_config.get('file_name', 'map')
-            file_format = gen_config.get('format', 'png')
+            file_format = self.config_manager.get_output_format(map_id)
             
             # 이미지 파일 경로
             output_dir = os.path.dirname(self.config_manager.get_output_path(map_id))
@@ -627,8 +1120,13 @@ class WebServer:
                     'error': '이미지 파일을 찾을 수 없습니다.'
                 }), 404
                 
-            # 파일 삭제
+            # 파일 삭제 (같은 번호의 축소 이미지 포함)
             os.remove(image_file)
+            for size_name in self.config_manager.get_derived_sizes(map_id):
+                derived_file = os.path.join(output_dir, self.config_manager.get_derived_filename(
+                    map_id, size_name, int(image_id)))
+                if os.path.exists(derived_file):
+                    os.remove(derived_file)
             self.logger.info(f"이미지 파일 삭제 완료: {image_file}")
             
             return jsonify({
@@ -668,10 +1166,19 @@ class WebServer:
             asyncio.set_event_loop(loop)
             self.logger.debug(f"웹서버에서 새 이벤트 루프 생성 (ID: {id(loop)})")
         
-        # 이벤트 루프가 시작되면 백그라운드 작업 시작을 위한 함수
+        # 이벤트 루프가 시작되면 생성기 미리 로드 및 백그라운드 작업 시작을 위한 함수
+        self.background_task_manager = background_task_manager
+
         async def start_background_task_manager():
+            # 이벤트 루프 지연 측정 시작
+            self.loop_monitor.start()
+
             # 웹서버가 완전히 시작될 때까지 약간 대기
             await asyncio.sleep(1)
+
+            # 무거운 모듈(matplotlib, scipy 등)은 서버가 열린 뒤 백그라운드 스레드에서 로드
+            if hasattr(self.map_generator, 'prewarm'):
+                self.map_generator.prewarm()
             
             if background_task_manager:
                 try:
@@ -684,9 +1191,9 @@ class WebServer:
         # hypercorn 서버 생성
         server_coro = hypercorn.asyncio.serve(self.app, config)
         
+        # 백그라운드 태스크 시작 태스크 추가
+        asyncio.ensure_future(start_background_task_manager(), loop=loop)
         if background_task_manager:
-            # 백그라운드 태스크 시작 태스크 추가
-            asyncio.ensure_future(start_background_task_manager(), loop=loop)
             self.logger.info(f"웹서버와 백그라운드 작업 실행 시작 (포트: {port})")
         else:
             self.logger.info(f"웹서버 실행 시작 (포트: {port})")
@@ -1,14 +1,49 @@
 import websockets # type: ignore
 import json
-from typing import Optional, Dict, Any, List
+import re
+from typing import Optional, Dict, Any, List, Tuple
 import asyncio
 import time
 from custom_logger import CustomLogger
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # 휠이 없는 아키텍처(armhf, armv7, i386)는 표준 json 사용
+    orjson = None
+
+# Supervisor를 통한 Home Assistant 웹소켓 API 주소
+SUPERVISOR_WEBSOCKET_URI = "ws://supervisor/core/api/websocket"
+
+JSON_DECODER = 'orjson' if orjson is not None else 'json'
+# Home Assistant는 메시지를 id, type 순서로 직렬화하므로 프레임 앞부분만 보고 대상 여부를 판단
+_FRAME_HEADER = re.compile(r'\{\s*"id"\s*:\s*(-?\d+)\s*,\s*"type"\s*:\s*"([^"]*)"')
+FRAME_HEADER_SCAN = 64  # id/type을 찾을 프레임 앞부분 길이 (문자)
+
+
+def decode_message(data):
+    """수신한 JSON 메시지를 파싱합니다. (orjson이 설치되어 있으면 orjson 사용)
+
+    Raises:
+        json.JSONDecodeError: 올바른 JSON이 아님 (orjson.JSONDecodeError도 이 예외의 하위 클래스)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def peek_frame(frame: str) -> Tuple[Optional[int], Optional[str]]:
+    """전체를 파싱하지 않고 프레임 앞부분에서 (id, type)을 읽습니다. 형식이 다르면 (None, None)"""
+    match = _FRAME_HEADER.match(frame, 0, FRAME_HEADER_SCAN)
+    if match is None:
+        return None, None
+    return int(match.group(1)), match.group(2)
+
+
 class WebSocketClient:
-    def __init__(self, supervisor_token: str, logger: CustomLogger):
+    def __init__(self, supervisor_token: str, logger: CustomLogger, uri: str = SUPERVISOR_WEBSOCKET_URI):
         self.supervisor_token = supervisor_token
         self.logger = logger
+        self.uri = uri  # 부하 테스트에서는 로컬 모의 서버 주소 (benchmarks/fake_homeassistant.py)
         self.message_id = 1
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
         self.reconnect_attempt = 0
@@ -203,7 +238,7 @@ class WebSocketClient:
     async def _connect(self) -> Optional[websockets.WebSocketClientProtocol]:
         websocket = None
         try:
-            uri = "ws://supervisor/core/api/websocket"
+            uri = self.uri
             self.logger.trace(f"웹소켓 연결 시도: {uri}")
             connect_start = time.time()
             
@@ -232,7 +267,7 @@ class WebSocketClient:
             self.logger.trace("인증 요청 메시지 수신 대기 중...")
             try:
                 auth_required = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                auth_required_data = json.loads(auth_required)
+                auth_required_data = decode_message(auth_required)
                 self.logger.trace(f"수신 메시지: {self._truncate_log_message(auth_required)}")
                 
                 if auth_required_data.get('type') != 'auth_required':
@@ -271,7 +306,7 @@ class WebSocketClient:
                 self.logger.trace("인증 응답 대기 중...")
                 auth_response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
                 self.logger.trace(f"인증 응답 수신: {self._truncate_log_message(auth_response)}")
-                auth_response_data = json.loads(auth_response)
+                auth_response_data = decode_message(auth_response)
                 
                 if auth_response_data.get('type') == 'auth_ok':
                     self.logger.trace("웹소켓 인증 성공")
@@ -361,10 +396,20 @@ class WebSocketClient:
                     response = await asyncio.wait_for(self.websocket.recv(), 3.0)
                     wait_time = time.time() - wait_start_time
                     
-                    self.logger.trace(f"메시지 수신 (소요시간: {wait_time:.3f}초): {self._truncate_log_message(response)}")
+                    # 다른 요청의 응답이나 이벤트 프레임은 앞부분의 id만 확인하고 파싱하지 않음
+                    frame_id, frame_type = peek_frame(response)
+                    if frame_id is not None and frame_id != message['id']:
+                        self.logger.trace("다른 메시지 수신, 건너뜀 (요청 ID: %s, 수신 ID: %s, 타입: %s, 크기: %d)",
+                                          message['id'], frame_id, frame_type, len(response))
+                        continue
+
+                    self.logger.trace("메시지 수신 (소요시간: %.3f초, 크기: %d): %s",
+                                      wait_time, len(response), self._truncate_log_message(response))
                     
                     try:
-                        response_data = json.loads(response)
+                        decode_start_time = time.time()
+                        response_data = decode_message(response)
+                        decode_time = time.time() - decode_start_time
                     except json.JSONDecodeError as json_err:
                         self.logger.error(f"JSON 파싱 오류: {str(json_err)}, 원본: {self._truncate_log_message(response)}")
                         continue
@@ -379,7 +424,8 @@ class WebSocketClient:
                                 result = response_data.get('result')
                                 result_size = len(result) if isinstance(result, list) else "N/A"
                                 
-                                self.logger.trace(f"요청 성공 (ID: {message['id']}, 타입: {message_type}, 총 소요시간: {total_time:.3f}초, 결과 크기: {result_size})")
+                                self.logger.trace(f"요청 성공 (ID: {message['id']}, 타입: {message_type}, 총 소요시간: {total_time:.3f}초, "
+                                                  f"디코딩: {decode_time:.3f}초 ({JSON_DECODER}), 결과 크기: {result_size})")
                                 return result
                             else:
                                 error_msg = response_data.get('error', {}).get('message', '알 수 없는 오류')
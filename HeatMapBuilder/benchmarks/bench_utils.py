@@ -0,0 +1,168 @@
+"""벤치마크 공통 유틸리티
+
+합성 평면도/센서 생성, 시간 측정, 결과(JSON) 저장 등 벤치마크 스크립트들이
+공유하는 함수들을 모아둡니다. apps 디렉토리를 import 경로에 추가하므로
+벤치마크 스크립트에서 가장 먼저 import 해야 합니다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import statistics
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCH_DIR)
+APPS_DIR = os.path.join(ADDON_DIR, 'apps')
+if APPS_DIR not in sys.path:
+    sys.path.insert(0, APPS_DIR)
+
+# SVG 전체 크기 (MapGenerator와 동일한 1000x1000 좌표계)
+CANVAS_SIZE = 1000
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """func를 warmup 후 repeat회 실행하여 소요시간 통계(초)를 반환합니다."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """측정값 목록의 통계를 반환합니다."""
+    return {
+        'repeat': len(samples),
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples)
+    }
+
+
+def room_polygon(x0: float, y0: float, x1: float, y1: float, vertices: int) -> List[Tuple[float, float]]:
+    """사각형 방 외곽선을 vertices개의 꼭짓점으로 분할한 좌표 목록을 반환합니다."""
+    vertices = max(4, vertices)
+    corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    per_edge = [vertices // 4 + (1 if i < vertices % 4 else 0) for i in range(4)]
+    coords = []
+    for i, count in enumerate(per_edge):
+        (ax, ay), (bx, by) = corners[i], corners[(i + 1) % 4]
+        for step in range(count):
+            t = step / count
+            coords.append((ax + (bx - ax) * t, ay + (by - ay) * t))
+    return coords
+
+
+def build_floor_plan(rooms: int, sensors_per_room: int, vertices: int,
+                     seed: int = 0) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """격자 형태로 배치된 합성 평면도를 생성합니다.
+
+    Returns:
+        (walls SVG path 문자열, 맵 sensors 설정 목록, get_states 형식의 모의 상태 목록)
+    """
+    rng = random.Random(seed)
+    cols = max(1, int(round(rooms ** 0.5)))
+    rows = (rooms + cols - 1) // cols
+    cell_w, cell_h = CANVAS_SIZE / cols, CANVAS_SIZE / rows
+
+    paths, sensors, states = [], [], []
+    for room in range(rooms):
+        x0, y0 = (room % cols) * cell_w, (room // cols) * cell_h
+        x1, y1 = x0 + cell_w, y0 + cell_h
+        coords = room_polygon(x0, y0, x1, y1, vertices)
+        d = 'M ' + ' L '.join(f'{x:.2f} {y:.2f}' for x, y in coords) + ' Z'
+        paths.append(f'<path d="{d}"/>')
+
+        margin_x, margin_y = cell_w * 0.1, cell_h * 0.1
+        for s in range(sensors_per_room):
+            entity_id = f'sensor.bench_r{room}_s{s}'
+            sensors.append({
+                'entity_id': entity_id,
+                'position': {
+                    'x': rng.uniform(x0 + margin_x, x1 - margin_x),
+                    'y': rng.uniform(y0 + margin_y, y1 - margin_y)
+                }
+            })
+            states.append({
+                'entity_id': entity_id,
+                'state': f'{rng.uniform(18, 28):.1f}',
+                'attributes': {'friendly_name': f'R{room} S{s}', 'unit_of_measurement': '°C'}
+            })
+    return ''.join(paths), sensors, states
+
+
+def load_default_map_config() -> Dict[str, Any]:
+    """apps/default_config.json의 기본 맵 설정을 반환합니다."""
+    with open(os.path.join(APPS_DIR, 'default_config.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['default_map_config']
+
+
+def create_environment(workdir: str, log_level: str = 'WARNING'):
+    """workdir을 로컬(모의) 실행 환경으로 사용하는 구성요소들을 생성합니다.
+
+    Returns:
+        (config_manager, logger, sensor_manager)
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # ConfigManager의 로컬 경로(local/temp)는 현재 디렉토리 기준
+
+    from config_manager import ConfigManager
+    from custom_logger import CustomLogger
+    from sensor_manager import SensorManager
+
+    config_manager = ConfigManager(True, {'log_level': log_level.lower()})
+    logger = CustomLogger(log_file=config_manager.paths['log'], log_level=log_level)
+    sensor_manager = SensorManager(True, config_manager, logger, None)
+    return config_manager, logger, sensor_manager
+
+
+def set_mock_states(sensor_manager, states: List[Dict[str, Any]]):
+    """MockWebSocketClient가 반환할 모의 상태/엔티티 레지스트리를 설정합니다."""
+    sensor_manager.websocket_client._mock_data = {
+        'temperature_sensors': states,
+        'entity_registry': [{'entity_id': s['entity_id'], 'labels': [], 'area_id': None} for s in states],
+        'label_registry': []
+    }
+
+
+def environment_info(args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """결과 비교를 위한 실행 환경 정보를 반환합니다."""
+    info: Dict[str, Any] = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'args': args or {}
+    }
+    try:
+        with open(os.path.join(ADDON_DIR, 'config.json'), 'r', encoding='utf-8') as f:
+            info['addon_version'] = json.load(f).get('version', '')
+    except (OSError, json.JSONDecodeError):
+        info['addon_version'] = ''
+    for module_name in ('numpy', 'scipy', 'matplotlib', 'shapely', 'pykrige', 'PIL'):
+        try:
+            module = __import__(module_name)
+            info[f'{module_name}_version'] = getattr(module, '__version__', '')
+        except ImportError:
+            info[f'{module_name}_version'] = None
+    return info
+
+
+def write_results(results: Dict[str, Any], output: Optional[str]):
+    """결과를 JSON으로 저장하거나(output 지정 시) 표준 출력에 씁니다."""
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"벤치마크 결과 저장: {output}", file=sys.stderr)
+    else:
+        print(text)
@@ -0,0 +1,79 @@
+"""웹소켓 메시지 JSON 디코딩 벤치마크
+
+합성 get_states 응답(fake_homeassistant.synthetic_states, 기본 5000개 엔티티)과 state_changed
+이벤트 프레임을 Home Assistant와 같은 형식으로 직렬화한 뒤 WebSocketClient가 수신 프레임마다
+수행하는 작업의 소요시간을 측정하고 JSON으로 출력합니다.
+
+- get_states: 응답 프레임 전체 파싱 (json / orjson / decode_message)
+- event: 이벤트 프레임 하나 전체 파싱 (json / orjson) 대비 peek_frame으로 건너뛰기
+- skip_get_states: 다른 요청의 get_states 응답을 peek_frame으로 건너뛰기 (프레임 크기와 무관해야 함)
+
+사용 예:
+    python benchmarks/benchmark_json_decode.py --entities 5000 --attribute-bytes 200 -o decode.json
+"""
+import os
+import json
+import argparse
+from typing import Any, Dict
+
+import bench_utils
+from bench_utils import measure
+from fake_homeassistant import synthetic_states
+
+import websocket_client
+from websocket_client import decode_message, peek_frame
+
+
+def build_frames(entities: int, attribute_bytes: int, seed: int) -> Dict[str, str]:
+    states = synthetic_states(entities, attribute_bytes=attribute_bytes, seed=seed)
+    old_state = states[0]
+    new_state = dict(old_state, state='21.5')
+    event = {'event_type': 'state_changed',
+             'data': {'entity_id': old_state['entity_id'], 'old_state': old_state, 'new_state': new_state},
+             'origin': 'LOCAL', 'time_fired': old_state['last_updated'], 'context': old_state['context']}
+    # Home Assistant와 같이 구분자 공백 없이 id, type 순서로 직렬화
+    separators = (',', ':')
+    return {
+        'get_states': json.dumps({'id': 2, 'type': 'result', 'success': True, 'result': states},
+                                 separators=separators),
+        'event': json.dumps({'id': 1, 'type': 'event', 'event': event}, separators=separators)
+    }
+
+
+def bench_frame(frame: str, repeat: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {'bytes': len(frame.encode('utf-8')),
+                              'json': measure(lambda: json.loads(frame), repeat=repeat)}
+    if websocket_client.orjson is not None:
+        result['orjson'] = measure(lambda: websocket_client.orjson.loads(frame), repeat=repeat)
+    result['decode_message'] = measure(lambda: decode_message(frame), repeat=repeat)
+    result['peek_frame'] = measure(lambda: peek_frame(frame), repeat=repeat)
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='웹소켓 메시지 JSON 디코딩 벤치마크')
+    parser.add_argument('--entities', type=int, default=5000, help='get_states 응답의 엔티티 수')
+    parser.add_argument('--attribute-bytes', type=int, default=200, help='엔티티당 추가 속성 길이')
+    parser.add_argument('--repeat', type=int, default=20, help='항목별 반복 횟수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='결과 JSON 파일 (없으면 표준 출력)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    frames = build_frames(args.entities, args.attribute_bytes, args.seed)
+    results: Dict[str, Any] = {
+        'meta': {**bench_utils.environment_info(vars(args)), 'decoder': websocket_client.JSON_DECODER},
+        'get_states': bench_frame(frames['get_states'], args.repeat),
+        'event': bench_frame(frames['event'], args.repeat * 50)
+    }
+    # 다른 요청(id 1)을 기다리는 중 get_states 응답(id 2)을 받은 경우 건너뛰는 비용
+    frame_id, _ = peek_frame(frames['get_states'])
+    results['skip_get_states'] = {'skipped': frame_id != 1,
+                                  **measure(lambda: peek_frame(frames['get_states']), repeat=args.repeat * 50)}
+    bench_utils.write_results(results, os.path.abspath(args.output) if args.output else None)
+
+
+if __name__ == '__main__':
+    main()
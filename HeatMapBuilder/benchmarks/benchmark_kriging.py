@@ -0,0 +1,113 @@
+"""전역 크리깅과 지역(이웃 센서) 크리깅 비교 벤치마크
+
+area 하나(800x800, 150x150 격자)에 센서 수를 늘려 가며 크리깅 분기
+(MapGenerator._calculate_area_temperature_static)의 소요시간을 측정합니다.
+
+- global: parameters.kriging.n_closest_points = 0 (모든 센서 사용)
+- kdtree: 가장 가까운 N개 센서, KD-트리 일괄 계산 (local_kriging.execute_local)
+- pykrige: 가장 가까운 N개 센서, pykrige 이동 창 (backend='C')
+
+센서 수별 소요시간, 전역 결과와의 차이(RMSE/최대), 지역 방식이 전역보다 빨라지는
+최소 센서 수(crossover)를 JSON으로 출력합니다.
+
+사용 예:
+    python benchmarks/benchmark_kriging.py --sensors 4,8,16,32,64,128,256 --neighbors 12 -o kriging.json
+"""
+import os
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+import bench_utils
+from bench_utils import measure, room_polygon
+
+import numpy as np  # type: ignore
+from shapely.geometry import Point, Polygon  # type: ignore
+from shapely.vectorized import contains  # type: ignore
+
+from map_generator import MapGenerator
+
+GRID_RESOLUTION = 150  # MapGenerator.generate()와 동일한 격자 해상도
+BACKENDS = ('global', 'kdtree', 'pykrige')
+
+
+def run_branch(area, grid, area_sensors, parameters) -> Dict[str, Any]:
+    grid_x, grid_y, grid_points, area_mask = grid
+    info: Dict[str, Any] = {}
+    temps = MapGenerator._calculate_area_temperature_static(
+        0, area, grid_points, grid_x, grid_y, 0, bench_utils.CANVAS_SIZE, 0, bench_utils.CANVAS_SIZE,
+        area_sensors, parameters, area_mask=area_mask, info=info)
+    return {'temps': temps, 'method': info.get('method')}
+
+
+def bench_kriging(sensor_counts: List[int], neighbors: int, repeat: int, seed: int) -> Dict[str, Any]:
+    grid_x, grid_y = np.mgrid[0:bench_utils.CANVAS_SIZE:complex(GRID_RESOLUTION),
+                              0:bench_utils.CANVAS_SIZE:complex(GRID_RESOLUTION)]
+    grid_points = np.column_stack((grid_x.flatten(), grid_y.flatten()))
+    area = {'polygon': Polygon(room_polygon(100, 100, 900, 900, 4)), 'is_exterior': False}
+    area_mask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1])).reshape(grid_x.shape)
+    grid = (grid_x, grid_y, grid_points, area_mask)
+
+    base_parameters = bench_utils.load_default_map_config()['parameters']
+    rng = np.random.default_rng(seed)
+
+    rows = []
+    for count in sensor_counts:
+        locs = rng.uniform(110, 890, size=(count, 2))
+        # 완만한 기울기 + 잡음 (실내 온도 분포와 비슷한 형태)
+        temps = 20 + locs[:, 0] / 200 + rng.normal(0, 0.5, size=count)
+        area_sensors = {0: [(Point(x, y), float(t), f'sensor.bench_{i}')
+                            for i, ((x, y), t) in enumerate(zip(locs, temps))]}
+
+        reference: Optional[np.ndarray] = None
+        for backend in BACKENDS:
+            parameters = json.loads(json.dumps(base_parameters))
+            parameters['kriging']['n_closest_points'] = 0 if backend == 'global' else neighbors
+            parameters['kriging']['neighborhood_backend'] = backend if backend != 'global' else 'kdtree'
+
+            result = run_branch(area, grid, area_sensors, parameters)
+            stats = measure(lambda: run_branch(area, grid, area_sensors, parameters), repeat)
+            row: Dict[str, Any] = {'backend': backend, 'sensors': count, 'method': result['method'], **stats}
+            if backend == 'global':
+                reference = result['temps']
+            elif reference is not None:
+                diff = result['temps'] - reference
+                row['rmse_vs_global'] = float(np.sqrt(np.mean(diff ** 2)))
+                row['max_abs_vs_global'] = float(np.max(np.abs(diff)))
+            rows.append(row)
+
+    crossover = {}
+    for backend in BACKENDS[1:]:
+        crossover[backend] = next((
+            count for count in sensor_counts
+            if any(r['backend'] == backend and r['sensors'] == count and r['method'] == 'kriging_local' for r in rows)
+            and _median(rows, backend, count) < _median(rows, 'global', count)
+        ), None)
+    return {'points': int(area_mask.sum()), 'neighbors': neighbors, 'results': rows, 'crossover': crossover}
+
+
+def _median(rows: List[Dict[str, Any]], backend: str, count: int) -> float:
+    return next(r['median'] for r in rows if r['backend'] == backend and r['sensors'] == count)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='HeatMapBuilder 전역/지역 크리깅 벤치마크')
+    parser.add_argument('--sensors', type=lambda v: [int(x) for x in v.split(',')],
+                        default=[4, 8, 16, 32, 64, 128, 256], help='area 센서 수 목록 (쉼표 구분)')
+    parser.add_argument('--neighbors', type=int, default=12, help='지역 크리깅 이웃 센서 수 (n_closest_points)')
+    parser.add_argument('--repeat', type=int, default=3, help='항목별 반복 측정 횟수')
+    parser.add_argument('--seed', type=int, default=0, help='합성 데이터 난수 시드')
+    parser.add_argument('-o', '--output', default=None, help='결과 JSON 파일 경로 (기본값: 표준 출력)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    results: Dict[str, Any] = {'meta': bench_utils.environment_info(vars(args))}
+    results['kriging'] = bench_kriging(args.sensors, args.neighbors, args.repeat, args.seed)
+    bench_utils.write_results(results, output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""MapGenerator 생성 파이프라인 벤치마크
+
+MockWebSocketClient와 합성 평면도(N개 방, 방마다 S개 센서, 꼭짓점 수 가변)를
+사용하여 다음 항목의 소요시간을 측정하고 JSON으로 출력합니다.
+
+- interpolation: 보간 분기별 (single / rbf / gaussian / kriging)
+- mask: 꼭짓점 수별 area 마스크 생성 (shapely contains)
+- render: 출력 포맷별 전체 생성 (figure 생성, savefig 등 단계별 소요시간 포함)
+
+사용 예:
+    python benchmarks/benchmark_map_generator.py --rooms 6 --sensors 4 --vertices 4,32,128 -o result.json
+
+같은 --seed 값이면 같은 평면도와 센서값이 생성되므로, 버전 간 결과 파일을
+비교하여 보간/렌더링 비용의 회귀를 확인할 수 있습니다.
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+import bench_utils
+from bench_utils import measure, summarize, build_floor_plan, room_polygon
+
+import numpy as np  # type: ignore
+from shapely.geometry import Polygon  # type: ignore
+from shapely.vectorized import contains  # type: ignore
+
+from map_generator import MapGenerator
+
+GRID_RESOLUTION = 150  # MapGenerator.generate()와 동일한 격자 해상도
+
+
+def make_grid():
+    """MapGenerator.generate()와 같은 방식으로 격자를 생성합니다."""
+    grid_x, grid_y = np.mgrid[0:bench_utils.CANVAS_SIZE:complex(GRID_RESOLUTION),
+                              0:bench_utils.CANVAS_SIZE:complex(GRID_RESOLUTION)]
+    grid_points = np.column_stack((grid_x.flatten(), grid_y.flatten()))
+    return grid_x, grid_y, grid_points
+
+
+def bench_interpolation(parameters: Dict[str, Any], sensors: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """보간 분기별 소요시간을 측정합니다."""
+    from shapely.geometry import Point  # type: ignore
+
+    grid_x, grid_y, grid_points = make_grid()
+    area = {'polygon': Polygon(room_polygon(100, 100, 900, 900, 4)), 'is_exterior': False}
+    pmask = np.array(contains(area['polygon'], grid_points[:, 0], grid_points[:, 1]))
+    area_mask = pmask.reshape(grid_x.shape)
+    rng = np.random.default_rng(seed)
+
+    # Rbf 생성이 실패하도록 하여 가우시안 분기를 강제 (실패 비용은 생성자 호출 수준)
+    gaussian_parameters = json.loads(json.dumps(parameters))
+    gaussian_parameters['rbf']['function'] = '__force_gaussian__'
+
+    cases = [
+        ('single', 1, parameters),
+        ('rbf', 3, parameters),
+        ('gaussian', 3, gaussian_parameters),
+        ('kriging', max(4, sensors), parameters),
+    ]
+
+    results = []
+    for branch, count, params in cases:
+        locs = rng.uniform(150, 850, size=(count, 2))
+        temps = rng.uniform(18, 28, size=count)
+        area_sensors = {0: [(Point(x, y), float(t), f'sensor.bench_{i}') for i, ((x, y), t) in enumerate(zip(locs, temps))]}
+        info: Dict[str, Any] = {}
+
+        def run():
+            MapGenerator._calculate_area_temperature_static(
+                0, area, grid_points, grid_x, grid_y, 0, bench_utils.CANVAS_SIZE, 0, bench_utils.CANVAS_SIZE,
+                area_sensors, params, area_mask=area_mask, info=info)
+
+        stats = measure(run, repeat)
+        results.append({
+            'branch': branch,
+            'method': info.get('method'),  # 실제로 실행된 보간 방법 (폴백 확인용)
+            'sensors': count,
+            'points': int(area_mask.sum()),
+            **stats
+        })
+    return results
+
+
+def bench_mask(vertex_counts: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """꼭짓점 수별 area 마스크 생성 소요시간을 측정합니다."""
+    _, _, grid_points = make_grid()
+    results = []
+    for vertices in vertex_counts:
+        polygon = Polygon(room_polygon(100, 100, 900, 900, vertices))
+        stats = measure(lambda: contains(polygon, grid_points[:, 0], grid_points[:, 1]), repeat)
+        results.append({'vertices': len(polygon.exterior.coords) - 1, 'points': len(grid_points), **stats})
+    return results
+
+
+async def bench_render(args, config_manager, logger, sensor_manager) -> List[Dict[str, Any]]:
+    """출력 포맷/꼭짓점 수별 전체 생성 소요시간과 단계별 소요시간을 측정합니다."""
+    map_generator = MapGenerator(config_manager, sensor_manager, logger)
+    default_config = bench_utils.load_default_map_config()
+    results = []
+
+    for vertices in args.vertices:
+        walls, sensors, states = build_floor_plan(args.rooms, args.sensors, vertices, args.seed)
+        bench_utils.set_mock_states(sensor_manager, states)
+        # 상태 조회 지연(모의 네트워크 지연)은 제외하고 한 번 조회한 스냅샷을 재사용
+        snapshot = await sensor_manager.get_all_states()
+
+        for output_format in args.formats:
+            map_id = f'bench_{vertices}_{output_format}'
+            map_config = json.loads(json.dumps(default_config))
+            map_config.update({'name': map_id, 'walls': walls, 'sensors': sensors, 'unit': '°C'})
+            map_config['gen_config']['format'] = output_format
+            config_manager.db.save(map_id, map_config)
+            output_path = config_manager.get_output_path(map_id)
+
+            samples, stage_samples = [], {}
+            for i in range(args.repeat + 1):
+                result = await map_generator.generate(map_id, output_path, states=snapshot, processes=args.processes)
+                if not result['success']:
+                    raise RuntimeError(f"맵 생성 실패 ({map_id}): {result['error']}")
+                if i == 0:
+                    continue  # 워밍업
+                samples.append(result['timings']['total'])
+                for stage, seconds in result['timings'].items():
+                    stage_samples.setdefault(stage, []).append(seconds)
+
+            results.append({
+                'format': output_format,
+                'rooms': args.rooms,
+                'sensors_per_room': args.sensors,
+                'vertices': vertices,
+                'size_bytes': os.path.getsize(output_path),
+                **summarize(samples),
+                'stages': {stage: summarize(values) for stage, values in stage_samples.items()}
+            })
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='HeatMapBuilder 맵 생성 파이프라인 벤치마크')
+    parser.add_argument('--rooms', type=int, default=4, help='합성 평면도의 방 개수')
+    parser.add_argument('--sensors', type=int, default=4, help='방마다 배치할 센서 개수')
+    parser.add_argument('--vertices', type=lambda v: [int(x) for x in v.split(',')], default=[4, 32, 128],
+                        help='방 외곽선 꼭짓점 수 목록 (쉼표 구분)')
+    parser.add_argument('--formats', type=lambda v: v.split(','), default=['png', 'jpg'],
+                        help='출력 포맷 목록 (쉼표 구분)')
+    parser.add_argument('--repeat', type=int, default=5, help='항목별 반복 측정 횟수')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='area 처리 프로세스 수 (기본값: CPU 수 기준, 1이면 순차 처리)')
+    parser.add_argument('--seed', type=int, default=0, help='합성 데이터 난수 시드')
+    parser.add_argument('--skip', type=lambda v: v.split(','), default=[],
+                        help='건너뛸 항목 (interpolation,mask,render)')
+    parser.add_argument('--workdir', default=None, help='작업 디렉토리 (기본값: 임시 디렉토리)')
+    parser.add_argument('-o', '--output', default=None, help='결과 JSON 파일 경로 (기본값: 표준 출력)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix='heatmap_bench_')
+    config_manager, logger, sensor_manager = bench_utils.create_environment(workdir)
+    parameters = bench_utils.load_default_map_config()['parameters']
+
+    results: Dict[str, Any] = {'meta': bench_utils.environment_info(vars(args))}
+    if 'interpolation' not in args.skip:
+        print("보간 분기 벤치마크 실행 중...", file=sys.stderr)
+        results['interpolation'] = bench_interpolation(parameters, args.sensors, args.repeat, args.seed)
+    if 'mask' not in args.skip:
+        print("마스크 생성 벤치마크 실행 중...", file=sys.stderr)
+        results['mask'] = bench_mask(args.vertices, args.repeat)
+    if 'render' not in args.skip:
+        print("렌더링 벤치마크 실행 중...", file=sys.stderr)
+        results['render'] = asyncio.run(bench_render(args, config_manager, logger, sensor_manager))
+
+    bench_utils.write_results(results, output)
+
+
+if __name__ == '__main__':
+    main()
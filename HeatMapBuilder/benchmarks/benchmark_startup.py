@@ -0,0 +1,105 @@
+"""애드온 콜드 스타트 벤치마크
+
+app.py를 새 프로세스로 실행하고(로컬 모드, 임시 작업 디렉토리) 다음을 측정합니다.
+
+- first_response: 프로세스 실행부터 /api/metrics가 처음 HTTP 200을 반환할 때까지
+- map_generator_load: 서버가 보고하는 생성기(matplotlib/scipy 등) 백그라운드 로드 소요시간
+- server_first_response: 서버가 보고하는 첫 200 응답 소요시간 (인터프리터 시작 이후 기준)
+
+사용 예:
+    python benchmarks/benchmark_startup.py --repeat 5 -o startup.json
+"""
+import os
+import re
+import sys
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from typing import Any, Dict, Optional
+
+import bench_utils
+from bench_utils import summarize
+
+STARTUP_GAUGE = re.compile(r'^heatmap_startup_seconds\{stage="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def fetch(url: str) -> Optional[str]:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            if response.status == 200:
+                return response.read().decode('utf-8')
+    except OSError:
+        pass
+    return None
+
+
+def run_once(port: int, timeout: float, load_wait: float) -> Dict[str, Any]:
+    """app.py를 한 번 실행하여 첫 응답까지의 소요시간과 서버 측 시작 메트릭을 반환합니다."""
+    workdir = tempfile.mkdtemp(prefix='heatmap_startup_')
+    url = f'http://127.0.0.1:{port}/api/metrics'
+    env = dict(os.environ, PORT=str(port))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(bench_utils.APPS_DIR, 'app.py')],
+                               cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first_response = None
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py가 종료되었습니다 (코드 {process.returncode})")
+            if fetch(url) is not None:
+                first_response = time.perf_counter() - start
+                break
+            time.sleep(0.01)
+        if first_response is None:
+            raise TimeoutError(f"{timeout}초 안에 응답이 없습니다")
+
+        # 백그라운드 생성기 로드가 끝날 때까지 대기
+        stages: Dict[str, float] = {}
+        deadline = time.perf_counter() + load_wait
+        while time.perf_counter() < deadline:
+            stages = {name: float(value) for name, value in STARTUP_GAUGE.findall(fetch(url) or '')}
+            if 'map_generator_load' in stages:
+                break
+            time.sleep(0.1)
+        return {'first_response': first_response,
+                **{f'server_{name}' if name == 'first_response' else name: value
+                   for name, value in stages.items()}}
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='애드온 콜드 스타트 벤치마크')
+    parser.add_argument('--repeat', type=int, default=3, help='실행 횟수')
+    parser.add_argument('--port', type=int, default=18099, help='테스트 서버 포트')
+    parser.add_argument('--timeout', type=float, default=60.0, help='첫 응답 대기 시간 (초)')
+    parser.add_argument('--load-wait', type=float, default=60.0, help='생성기 로드 대기 시간 (초)')
+    parser.add_argument('-o', '--output', help='결과 JSON 파일 (없으면 표준 출력)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    runs = []
+    for i in range(args.repeat):
+        print(f"시작 측정 {i + 1}/{args.repeat}...", file=sys.stderr)
+        runs.append(run_once(args.port, args.timeout, args.load_wait))
+
+    results: Dict[str, Any] = {'meta': bench_utils.environment_info(vars(args)), 'runs': runs}
+    for key in sorted({key for run in runs for key in run}):
+        samples = [run[key] for run in runs if key in run]
+        results[key] = summarize(samples)
+    bench_utils.write_results(results, os.path.abspath(args.output) if args.output else None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""WebSocketClient / SensorManager 부하 벤치마크
+
+로컬 모의 Home Assistant(fake_homeassistant.FakeHomeAssistant)에 실제 WebSocketClient로
+연결하여 다음 시나리오의 소요시간과 성공률을 측정하고 JSON으로 출력합니다.
+
+- get_states: SensorManager.get_all_states() 반복 (엔티티 레지스트리 + get_states, 대규모 레지스트리)
+- events: 초당 --event-rate개의 state_changed 이벤트가 흐르는 중 get_all_states()
+- concurrent: 한 클라이언트에서 get_states 요청 --concurrency개를 동시에 전송
+  WebSocketClient는 요청마다 응답을 직접 recv()하는 단일 수신자 구조라 동시에 recv()를 기다리는
+  요청은 websockets의 ConcurrencyError로 실패합니다. 이 시나리오는 그 한계를 측정하는 것이며
+  failures가 0이 아닌 것이 현재 클라이언트의 예상 결과입니다. (결과의 note 참고)
+- disconnects: 요청마다 --disconnect-rate 확률로 연결이 끊기는 서버에 get_states 반복 (재연결 포함)
+
+모든 시나리오에 --latency(+ --jitter) 응답 지연을 적용합니다.
+
+사용 예:
+    python benchmarks/benchmark_websocket.py --entities 5000 --event-rate 200 --concurrency 8 -o websocket.json
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import Any, Dict
+
+CONCURRENT_NOTE = ('WebSocketClient는 단일 수신자 구조(요청마다 직접 recv)라 동시 요청 중 하나만 성공하고 '
+                   '나머지는 ConcurrencyError로 실패하는 것이 예상 결과입니다. (응답 분배기가 없음)')
+
+import bench_utils
+from bench_utils import summarize
+from fake_homeassistant import FakeHomeAssistant, DEFAULT_TOKEN
+
+from sensor_manager import SensorManager
+from websocket_client import WebSocketClient
+
+
+def make_sensor_manager(config_manager, logger, server: FakeHomeAssistant) -> SensorManager:
+    """모의 서버에 연결하는 (로컬 모드가 아닌) SensorManager를 생성합니다."""
+    sensor_manager = SensorManager(False, config_manager, logger, DEFAULT_TOKEN)
+    sensor_manager.websocket_client = WebSocketClient(DEFAULT_TOKEN, logger, uri=server.uri)
+    sensor_manager.websocket_client.reconnect_delay = 0.1  # 재연결 실패 시 대기 (실제 기본값 5초)
+    return sensor_manager
+
+
+async def timed_calls(func, repeat: int) -> Dict[str, Any]:
+    """func()를 repeat회 순서대로 실행하여 소요시간 통계와 실패(None/빈 결과) 횟수를 반환합니다."""
+    samples, failures = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func()
+        samples.append(time.perf_counter() - start)
+        if not result:
+            failures += 1
+    return {**summarize(samples), 'failures': failures}
+
+
+async def run_scenario(name: str, server_options: Dict[str, Any], environment, args) -> Dict[str, Any]:
+    config_manager, logger = environment
+    print(f"시나리오 {name}...", file=sys.stderr)
+    async with FakeHomeAssistant(**server_options) as server:
+        sensor_manager = make_sensor_manager(config_manager, logger, server)
+        client = sensor_manager.websocket_client
+        try:
+            if name == 'concurrent':
+                await client.ensure_connected()
+                start = time.perf_counter()
+                results = await asyncio.gather(*[client.send_message('get_states')
+                                                 for _ in range(args.concurrency)])
+                result: Dict[str, Any] = {
+                    'wall': time.perf_counter() - start,
+                    'requests': args.concurrency,
+                    'failures': sum(1 for r in results if not r),
+                    'note': CONCURRENT_NOTE
+                }
+                print(f"  참고: {CONCURRENT_NOTE}", file=sys.stderr)
+            elif name == 'disconnects':
+                result = await timed_calls(lambda: client.send_message('get_states'), args.repeat)
+            else:
+                result = await timed_calls(sensor_manager.get_all_states, args.repeat)
+        finally:
+            await client.close()
+        result['server'] = dict(server.stats)
+        return result
+
+
+async def run(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix='heatmap_ws_bench_')
+    config_manager, logger, _ = bench_utils.create_environment(workdir, args.log_level)
+    environment = (config_manager, logger)
+    base = {'entities': args.entities, 'attribute_bytes': args.attribute_bytes,
+            'latency': args.latency, 'jitter': args.jitter, 'seed': args.seed}
+    scenarios = {
+        'get_states': base,
+        'events': {**base, 'event_rate': args.event_rate},
+        'concurrent': base,
+        'disconnects': {**base, 'disconnect_rate': args.disconnect_rate},
+    }
+    results: Dict[str, Any] = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(name, scenarios[name], environment, args)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='WebSocketClient / SensorManager 부하 벤치마크')
+    parser.add_argument('--entities', type=int, default=5000, help='모의 서버 엔티티 수')
+    parser.add_argument('--attribute-bytes', type=int, default=200, help='엔티티당 추가 속성 길이')
+    parser.add_argument('--repeat', type=int, default=10, help='시나리오별 요청 횟수')
+    parser.add_argument('--event-rate', type=float, default=200.0, help='events 시나리오의 초당 이벤트 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent 시나리오의 동시 요청 수')
+    parser.add_argument('--disconnect-rate', type=float, default=0.2, help='disconnects 시나리오의 연결 끊김 확률')
+    parser.add_argument('--latency', type=float, default=0.0, help='응답 지연 (초)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='응답 지연에 더할 최대 임의 지연 (초)')
+    parser.add_argument('--scenarios', default='get_states,events,concurrent,disconnects',
+                        type=lambda v: [s.strip() for s in v.split(',') if s.strip()], help='실행할 시나리오')
+    parser.add_argument('--log-level', default='CRITICAL', help='애드온 로그 레벨 (실패 로그를 보려면 ERROR)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='결과 JSON 파일 (없으면 표준 출력)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    results: Dict[str, Any] = {'meta': bench_utils.environment_info(vars(args))}
+    results.update(asyncio.run(run(args)))
+    bench_utils.write_results(results, output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""Home Assistant 웹소켓 API 모의 서버 (부하 테스트용)
+
+WebSocketClient와 SensorManager를 실제 Home Assistant 없이 부하 테스트하기 위한 로컬
+웹소켓 서버입니다. Home Assistant 웹소켓 프로토콜의 인증(auth_required -> auth ->
+auth_ok/auth_invalid), 요청 결과(result), 이벤트(event) 메시지 형식을 따르며 다음을 재현합니다.
+
+- 대규모 레지스트리: get_states, config/entity_registry/list, config/label_registry/list가
+  합성 엔티티 수천 개를 반환 (엔티티 수, 엔티티당 속성 크기 설정)
+- 이벤트 스트림: 초당 event_rate개의 state_changed 이벤트 (subscribe_events로 구독한 연결에는
+  구독 id로 전송, WebSocketClient는 구독하지 않으므로 기본값으로는 구독하지 않은 연결에도 id 0으로 전송)
+- 동시 요청: 요청마다 별도 태스크에서 응답하므로 지연이 있으면 응답 순서가 요청 순서와 달라질 수 있음
+- 장애 주입: 응답 지연(latency + 0~jitter초), 요청마다 disconnect_rate 확률로 응답 없이 연결 끊기
+
+WebSocketClient(token, logger, uri=server.uri)로 연결합니다.
+
+사용 예 (단독 실행):
+    python benchmarks/fake_homeassistant.py --entities 5000 --event-rate 50 --port 18123
+"""
+import json
+import time
+import uuid
+import random
+import string
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from websockets.asyncio.server import serve  # type: ignore
+from websockets.exceptions import ConnectionClosed  # type: ignore
+
+HA_VERSION = '2025.1.0'
+AUTH_TIMEOUT = 10  # 인증 메시지 대기 시간 (초)
+DEFAULT_TOKEN = 'fake-supervisor-token'
+
+# 센서가 아닌 엔티티의 도메인별 (상태 후보, 속성)
+OTHER_DOMAINS = {
+    'light': (['on', 'off'], {'supported_color_modes': ['brightness'], 'color_mode': 'brightness', 'brightness': 180}),
+    'switch': (['on', 'off'], {}),
+    'binary_sensor': (['on', 'off'], {'device_class': 'motion'}),
+    'automation': (['on', 'off'], {'id': '0', 'last_triggered': None, 'mode': 'single', 'current': 0}),
+    'media_player': (['idle', 'playing', 'off'], {'volume_level': 0.3, 'is_volume_muted': False}),
+}
+# 숫자 센서의 (device_class, 단위, 최소, 최대)
+SENSOR_CLASSES = [
+    ('temperature', '°C', 18.0, 28.0),
+    ('humidity', '%', 30.0, 70.0),
+    ('power', 'W', 0.0, 2000.0),
+    ('illuminance', 'lx', 0.0, 800.0),
+]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _context() -> Dict[str, Any]:
+    return {'id': uuid.uuid4().hex, 'parent_id': None, 'user_id': None}
+
+
+def synthetic_states(count: int, sensor_ratio: float = 0.3, attribute_bytes: int = 200,
+                     seed: int = 0) -> List[Dict[str, Any]]:
+    """get_states 형식의 합성 엔티티 상태 목록을 생성합니다.
+
+    Args:
+        count: 엔티티 수
+        sensor_ratio: 숫자 센서(sensor.*) 비율, 나머지는 OTHER_DOMAINS에서 고르게 선택
+        attribute_bytes: 엔티티마다 추가하는 임의 문자열 속성의 길이 (속성이 큰 통합구성요소 재현)
+    """
+    rng = random.Random(seed)
+    timestamp = _now()
+    domains = list(OTHER_DOMAINS)
+    states = []
+    for i in range(count):
+        if rng.random() < sensor_ratio:
+            device_class, unit, low, high = rng.choice(SENSOR_CLASSES)
+            entity_id = f'sensor.fake_{device_class}_{i}'
+            state = f'{rng.uniform(low, high):.1f}'
+            attributes = {'state_class': 'measurement', 'unit_of_measurement': unit, 'device_class': device_class}
+        else:
+            domain = domains[i % len(domains)]
+            choices, extra = OTHER_DOMAINS[domain]
+            entity_id = f'{domain}.fake_{i}'
+            state = rng.choice(choices)
+            attributes = dict(extra)
+        attributes['friendly_name'] = entity_id.split('.', 1)[1].replace('_', ' ').title()
+        if attribute_bytes > 0:
+            attributes['description'] = ''.join(rng.choices(string.ascii_letters + ' ', k=attribute_bytes))
+        states.append({
+            'entity_id': entity_id,
+            'state': state,
+            'attributes': attributes,
+            'last_changed': timestamp,
+            'last_reported': timestamp,
+            'last_updated': timestamp,
+            'context': _context()
+        })
+    return states
+
+
+class _Session:
+    """인증된 연결 하나 (이벤트 구독 id -> event_type, None이면 모든 이벤트)"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.subscriptions: Dict[Any, Optional[str]] = {}
+
+
+class FakeHomeAssistant:
+    """Home Assistant 웹소켓 API를 흉내내는 로컬 서버"""
+
+    def __init__(self, entities: int = 1000, sensor_ratio: float = 0.3, attribute_bytes: int = 200,
+                 states: Optional[List[Dict[str, Any]]] = None, areas: int = 20, labels: int = 5,
+                 event_rate: float = 0.0, events_require_subscription: bool = False,
+                 latency: float = 0.0, jitter: float = 0.0, disconnect_rate: float = 0.0,
+                 access_token: Optional[str] = DEFAULT_TOKEN, host: str = '127.0.0.1', port: int = 0,
+                 seed: int = 0):
+        """
+        Args:
+            states: 합성 엔티티에 추가할 get_states 형식 상태 목록 (예: bench_utils.build_floor_plan의 센서)
+            access_token: 허용할 토큰 (None이면 모든 토큰 허용)
+            port: 0이면 빈 포트를 사용 (start() 후 uri 속성으로 확인)
+        """
+        self.rng = random.Random(seed)
+        self.event_rate = event_rate
+        self.events_require_subscription = events_require_subscription
+        self.latency = latency
+        self.jitter = jitter
+        self.disconnect_rate = disconnect_rate
+        self.access_token = access_token
+        self.host = host
+        self.port = port
+
+        all_states = synthetic_states(entities, sensor_ratio, attribute_bytes, seed) + list(states or [])
+        self.states: Dict[str, Dict[str, Any]] = {state['entity_id']: state for state in all_states}
+        self.label_registry = [{'label_id': f'label_{i}', 'name': f'Label {i}', 'color': None, 'icon': None,
+                                'description': None} for i in range(labels)]
+        self.entity_registry = []
+        for i, entity_id in enumerate(self.states):
+            self.entity_registry.append({
+                'entity_id': entity_id,
+                'id': uuid.UUID(int=self.rng.getrandbits(128)).hex,
+                'unique_id': f'fake_{i}',
+                'platform': 'fake',
+                'device_id': None,
+                'area_id': f'area_{self.rng.randrange(areas)}' if areas else None,
+                'labels': [label['label_id'] for label in self.label_registry if self.rng.random() < 0.1],
+                'name': None,
+                'icon': None,
+                'disabled_by': None,
+                'hidden_by': None,
+                'entity_category': None,
+                'has_entity_name': True,
+                'original_name': None
+            })
+
+        self.stats: Dict[str, Any] = {'connections': 0, 'auth_failures': 0, 'requests': {},
+                                      'events': 0, 'disconnects': 0, 'bytes_sent': 0}
+        self._sessions = set()
+        self._server = None
+        self._event_task: Optional[asyncio.Task] = None
+        self._commands = {
+            'get_states': lambda session, message: list(self.states.values()),
+            'get_config': lambda session, message: {'version': HA_VERSION, 'unit_system': {'temperature': '°C'}},
+            'config/entity_registry/list': lambda session, message: self.entity_registry,
+            'config/label_registry/list': lambda session, message: self.label_registry,
+            'subscribe_events': self._subscribe,
+            'unsubscribe_events': self._unsubscribe,
+        }
+
+    @property
+    def uri(self) -> str:
+        return f'ws://{self.host}:{self.port}/api/websocket'
+
+    async def start(self):
+        self._server = await serve(self._handle, self.host, self.port, max_size=2**24, compression=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.event_rate > 0:
+            self._event_task = asyncio.create_task(self._emit_events())
+
+    async def stop(self):
+        if self._event_task is not None:
+            self._event_task.cancel()
+            self._event_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _send(self, connection, payload: Dict[str, Any]):
+        text = json.dumps(payload)
+        self.stats['bytes_sent'] += len(text)
+        await connection.send(text)
+
+    async def _handle(self, connection):
+        """연결 하나의 인증과 요청 수신 (응답은 요청마다 별도 태스크)"""
+        self.stats['connections'] += 1
+        try:
+            await self._send(connection, {'type': 'auth_required', 'ha_version': HA_VERSION})
+            auth = json.loads(await asyncio.wait_for(connection.recv(), AUTH_TIMEOUT))
+            if auth.get('type') != 'auth' or (self.access_token is not None
+                                              and auth.get('access_token') != self.access_token):
+                self.stats['auth_failures'] += 1
+                await self._send(connection, {'type': 'auth_invalid',
+                                              'message': 'Invalid access token or password'})
+                return
+            await self._send(connection, {'type': 'auth_ok', 'ha_version': HA_VERSION})
+        except (ConnectionClosed, asyncio.TimeoutError, ValueError):
+            return
+
+        session = _Session(connection)
+        tasks = set()
+        self._sessions.add(session)
+        try:
+            async for text in connection:
+                try:
+                    message = json.loads(text)
+                except ValueError:
+                    continue
+                task = asyncio.create_task(self._respond(session, message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._sessions.discard(session)
+            for task in tasks:
+                task.cancel()
+
+    async def _respond(self, session, message: Dict[str, Any]):
+        message_id = message.get('id')
+        message_type = message.get('type')
+        requests = self.stats['requests']
+        requests[message_type] = requests.get(message_type, 0) + 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        if self.disconnect_rate and self.rng.random() < self.disconnect_rate:
+            # 종료 핸드셰이크 없이 끊어 네트워크 단절/Supervisor 재시작을 재현
+            self.stats['disconnects'] += 1
+            session.connection.transport.abort()
+            return
+
+        if message_type == 'ping':
+            payload = {'id': message_id, 'type': 'pong'}
+        elif message_type in self._commands:
+            payload = {'id': message_id, 'type': 'result', 'success': True,
+                       'result': self._commands[message_type](session, message)}
+        else:
+            payload = {'id': message_id, 'type': 'result', 'success': False,
+                       'error': {'code': 'unknown_command', 'message': 'Unknown command.'}}
+        try:
+            await self._send(session.connection, payload)
+        except ConnectionClosed:
+            pass
+
+    def _subscribe(self, session, message):
+        session.subscriptions[message.get('id')] = message.get('event_type')
+        return None
+
+    def _unsubscribe(self, session, message):
+        session.subscriptions.pop(message.get('subscription'), None)
+        return None
+
+    def _change_state(self, entity_id: str) -> Dict[str, Any]:
+        """엔티티 하나의 상태를 바꾸고 state_changed 이벤트 데이터를 반환합니다."""
+        old_state = self.states[entity_id]
+        timestamp = _now()
+        new_state = dict(old_state, last_changed=timestamp, last_reported=timestamp, last_updated=timestamp,
+                         context=_context())
+        try:
+            new_state['state'] = f"{float(old_state['state']) + self.rng.uniform(-0.5, 0.5):.1f}"
+        except ValueError:
+            choices = OTHER_DOMAINS.get(entity_id.split('.', 1)[0], ([old_state['state']], {}))[0]
+            new_state['state'] = self.rng.choice(choices)
+        self.states[entity_id] = new_state
+        return {'event_type': 'state_changed',
+                'data': {'entity_id': entity_id, 'old_state': old_state, 'new_state': new_state},
+                'origin': 'LOCAL', 'time_fired': timestamp, 'context': new_state['context']}
+
+    async def _emit_events(self):
+        """초당 event_rate개의 state_changed 이벤트를 전송합니다. (sleep 해상도보다 잦으면 묶어서 전송)"""
+        loop = asyncio.get_running_loop()
+        entity_ids = list(self.states)
+        start = loop.time()
+        emitted = 0
+        while True:
+            await asyncio.sleep(min(1.0 / self.event_rate, 0.01))
+            due = int((loop.time() - start) * self.event_rate) - emitted
+            for _ in range(due):
+                emitted += 1
+                event = self._change_state(self.rng.choice(entity_ids))
+                for session in list(self._sessions):
+                    targets = [subscription_id for subscription_id, event_type in session.subscriptions.items()
+                               if event_type in (None, 'state_changed')]
+                    if not targets and not self.events_require_subscription:
+                        targets = [0]
+                    for subscription_id in targets:
+                        try:
+                            await self._send(session.connection,
+                                             {'id': subscription_id, 'type': 'event', 'event': event})
+                            self.stats['events'] += 1
+                        except ConnectionClosed:
+                            break
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Home Assistant 웹소켓 API 모의 서버')
+    parser.add_argument('--entities', type=int, default=5000, help='합성 엔티티 수')
+    parser.add_argument('--sensor-ratio', type=float, default=0.3, help='숫자 센서 비율')
+    parser.add_argument('--attribute-bytes', type=int, default=200, help='엔티티당 추가 속성 길이')
+    parser.add_argument('--event-rate', type=float, default=0.0, help='초당 state_changed 이벤트 수')
+    parser.add_argument('--latency', type=float, default=0.0, help='응답 지연 (초)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='응답 지연에 더할 최대 임의 지연 (초)')
+    parser.add_argument('--disconnect-rate', type=float, default=0.0, help='요청마다 연결을 끊을 확률')
+    parser.add_argument('--token', default=DEFAULT_TOKEN, help='허용할 액세스 토큰')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18123)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    server = FakeHomeAssistant(entities=args.entities, sensor_ratio=args.sensor_ratio,
+                               attribute_bytes=args.attribute_bytes, event_rate=args.event_rate,
+                               latency=args.latency, jitter=args.jitter, disconnect_rate=args.disconnect_rate,
+                               access_token=args.token, host=args.host, port=args.port, seed=args.seed)
+    async with server:
+        print(f"모의 Home Assistant 실행 중: {server.uri} (엔티티 {len(server.states)}개, Ctrl+C로 종료)")
+        start = time.time()
+        try:
+            while True:
+                await asyncio.sleep(10)
+                print(f"[{time.time() - start:.0f}초] {json.dumps(server.stats, ensure_ascii=False)}")
+        except asyncio.CancelledError:
+            pass
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
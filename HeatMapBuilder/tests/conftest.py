@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import asyncio
+
+import pytest
+
+APPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'apps')
+if APPS_DIR not in sys.path:
+    sys.path.insert(0, APPS_DIR)
+
+WALLS = ('<path d="M 0 0 L 500 0 L 500 1000 L 0 1000 Z"/>'
+         '<path d="M 500 0 L 1000 0 L 1000 1000 L 500 1000 Z"/>')
+POSITIONS = [(150, 200), (350, 800), (650, 300), (850, 700)]
+
+
+def write_mock_states(values):
+    """로컬 모드 SensorManager가 읽는 모의 센서 상태를 씁니다. (sensor.t0 ~ sensor.tN)"""
+    states = [{'entity_id': f'sensor.t{i}', 'state': str(value), 'attributes': {'friendly_name': f'T{i}'}}
+              for i, value in enumerate(values)]
+    with open(os.path.join('local', 'test_config.json'), 'w') as f:
+        json.dump({'temperature_sensors': states,
+                   'entity_registry': [{'entity_id': s['entity_id'], 'labels': [], 'area_id': None} for s in states],
+                   'label_registry': []}, f)
+
+
+class MapEnvironment:
+    """임시 디렉토리의 로컬 모드 애드온 환경 (맵 하나, 센서 4개)"""
+
+    def __init__(self, map_id: str = 'm1'):
+        from config_manager import ConfigManager
+        from custom_logger import CustomLogger
+        from sensor_manager import SensorManager
+        from map_generator import MapGenerator
+
+        os.makedirs('local', exist_ok=True)
+        write_mock_states([20.5, 22.0, 23.5, 25.0])
+        self.map_id = map_id
+        self.config_manager = ConfigManager(True, {'render_process': False})
+        self.logger = CustomLogger(log_file=self.config_manager.paths['log'], log_level='ERROR')
+        self.sensor_manager = SensorManager(True, self.config_manager, self.logger, None)
+        self.generator = MapGenerator(self.config_manager, self.sensor_manager, self.logger)
+
+        with open(os.path.join(APPS_DIR, 'default_config.json'), encoding='utf-8') as f:
+            self.map_config = json.load(f)['default_map_config']
+        self.map_config.update({'name': 'test', 'walls': WALLS, 'unit': '°C',
+                                'sensors': [{'entity_id': f'sensor.t{i}', 'position': {'x': x, 'y': y}}
+                                            for i, (x, y) in enumerate(POSITIONS)]})
+        self.save()
+        self.output_path = self.config_manager.get_output_path(map_id)
+
+    def save(self):
+        self.config_manager.db.save(self.map_id, self.map_config)
+
+    def generate(self):
+        self.sensor_manager.websocket_client._mock_data = None  # 모의 상태 다시 읽기
+        return asyncio.run(self.generator.generate(self.map_id, self.output_path, rotate=True))
+
+    def rotated_path(self, index: int = 1) -> str:
+        root, ext = os.path.splitext(self.output_path)
+        return f"{root}-{index}{ext}"
+
+
+@pytest.fixture
+def map_env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return MapEnvironment()
@@ -0,0 +1,27 @@
+"""맵별 생성 락과 배치 생성 확인"""
+import asyncio
+
+
+def test_generate_skips_map_locked_elsewhere(map_env):
+    with map_env.config_manager.get_generation_lock(map_env.map_id):
+        result = map_env.generate()
+    assert not result['success'] and result['busy']
+
+    assert map_env.generate()['success']
+
+
+def test_batch_generation_uses_shared_lock(map_env):
+    map_env.map_id = 'm2'
+    map_env.save()
+    jobs = [(map_id, map_env.config_manager.get_output_path(map_id)) for map_id in ('m1', 'm2')]
+    generator = map_env.generator
+
+    with map_env.config_manager.get_generation_lock('m2'):
+        results = asyncio.run(generator.generate_batch(jobs))
+    assert results['m1']['success']
+    assert not results['m2']['success'] and results['m2']['busy']
+    assert 'm1' in generator.grid_cache and 'm2' not in generator.grid_cache
+
+    results = asyncio.run(generator.generate_batch(jobs))
+    assert all(result['success'] for result in results.values())
+    assert map_env.config_manager.db.get_map('m2')['last_generation']['timestamp']
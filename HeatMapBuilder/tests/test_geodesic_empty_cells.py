@@ -0,0 +1,51 @@
+
+import numpy as np
+
+# 왼쪽 area(센서 2개), 오른쪽 위/아래 area(센서 없음). 오른쪽 위 area는 x=750 벽으로 나뉘고
+# y=500 벽으로 아래 area와도 막혀 있어 오른쪽 절반은 문으로 닿지 않음
+WALLS = ('<path d="M 0 0 L 500 0 L 500 1000 L 0 1000 Z"/>'
+         '<path d="M 500 0 L 1000 0 L 1000 500 L 500 500 Z"/>'
+         '<path d="M 500 500 L 1000 500 L 1000 1000 L 500 1000 Z"/>'
+         '<line x1="750" y1="0" x2="750" y2="500" stroke-width="10"/>'
+         '<line x1="500" y1="500" x2="1000" y2="500" stroke-width="10"/>')
+
+
+def cell(x, y):
+    return round(x / 1000 * 149), round(y / 1000 * 149)
+
+
+def test_unreachable_cells_use_empty_area_style(map_env):
+    map_env.map_config.update({
+        'walls': WALLS,
+        'sensors': [{'entity_id': 'sensor.t0', 'position': {'x': 150, 'y': 200}},
+                    {'entity_id': 'sensor.t1', 'position': {'x': 350, 'y': 800}}]
+    })
+    map_env.map_config['parameters']['geodesic']['enabled'] = True
+    map_env.map_config['gen_config']['visualization']['empty_area'] = 'white'
+    map_env.save()
+
+    requests = []
+    render_image = map_env.generator.render_image
+
+    def capture(request, *args, **kwargs):
+        requests.append(request)
+        return render_image(request, *args, **kwargs)
+
+    map_env.generator.render_image = capture
+    result = map_env.generate()
+    assert result['success'], result.get('error')
+
+    grid_z = map_env.generator.grid_cache[map_env.generator.grid_key(map_env.map_id)]['grid_z']
+    assert np.isfinite(grid_z[cell(600, 250)])  # 왼쪽 area와 이어진 쪽은 채워짐
+    assert np.isnan(grid_z[cell(875, 250)])  # 벽으로 막힌 쪽은 값 없음
+
+    empty_cells = requests[0]['empty_cells']
+    assert empty_cells[cell(875, 250)]
+    assert not empty_cells[cell(600, 250)]
+    assert not empty_cells[cell(750, 750)]
+
+    generator = map_env.generator
+    overlay = generator.render_overlay(200, None, grid_z)
+    assert tuple(overlay[50, 175]) == (255, 255, 255, 255)  # (875, 250): 빈 area 스타일
+    assert overlay[50, 120, 3] == 0  # (600, 250): 값이 그려지도록 비워 둠
+    assert overlay[150, 150, 3] == 0  # (750, 750)
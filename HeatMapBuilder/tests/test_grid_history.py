@@ -0,0 +1,45 @@
+"""격자 기록 링 버퍼의 다중 프로세스 추가와 센서 수 확인"""
+import multiprocessing
+
+import numpy as np
+
+from grid_history import GridHistory, DEFAULT_MAX_SENSORS, sensor_capacity
+
+SHAPE = (20, 20)
+BOUNDS = (0.0, 0.0, 1000.0, 1000.0)
+
+
+def _append_frames(path, worker, frames):
+    with GridHistory.open_or_create(path, 64, SHAPE, BOUNDS) as history:
+        for i in range(frames):
+            history.append(worker * 1000 + i + 1, np.full(SHAPE, float(i), dtype=np.float32), {'sensor.a': 1.0})
+
+
+def test_appends_from_processes_keep_every_frame(tmp_path):
+    path = str(tmp_path / 'map.hmh')
+    GridHistory.open_or_create(path, 64, SHAPE, BOUNDS).close()
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_append_frames, args=(path, worker, 10)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    with GridHistory.open(path) as history:
+        assert len(history) == 40
+        assert sorted(history.timestamps()) == sorted(w * 1000 + i + 1 for w in range(4) for i in range(10))
+
+
+def test_history_sized_for_many_sensors(tmp_path):
+    path = str(tmp_path / 'map.hmh')
+    values = {f'sensor.t{i}': float(i) for i in range(100)}
+    assert sensor_capacity(len(values)) > DEFAULT_MAX_SENSORS
+
+    with GridHistory.open_or_create(path, 8, SHAPE, BOUNDS, max_sensors=DEFAULT_MAX_SENSORS) as history:
+        dropped = history.append(1, np.zeros(SHAPE, dtype=np.float32), values)
+    assert len(dropped) == len(values) - DEFAULT_MAX_SENSORS
+
+    with GridHistory.open_or_create(path, 8, SHAPE, BOUNDS, max_sensors=sensor_capacity(len(values))) as history:
+        assert history.append(2, np.zeros(SHAPE, dtype=np.float32), values) == []
+        assert len(history.read(2)['sensors']) == len(values)
@@ -0,0 +1,20 @@
+"""타임스탬프를 표시하면 센서값이 그대로여도 표시 시각이 바뀔 때 이미지를 다시 게시하는지 확인"""
+import os
+import time
+
+
+def test_timestamp_republishes_unchanged_states(map_env):
+    timestamp_config = map_env.map_config['gen_config']['timestamp']
+    timestamp_config.update({'enabled': True, 'format': 'YYYY-MM-DD HH:mm:ss'})
+    map_env.save()
+
+    first = map_env.generate()
+    assert first['success'] and first['changed']
+    mtime = os.stat(map_env.output_path).st_mtime_ns
+
+    time.sleep(1.1)  # 초 단위 표시 시각이 바뀌도록
+    second = map_env.generate()
+    assert second['success'] and second['changed']
+    assert second['output']['input_hash'] != first['output']['input_hash']
+    assert os.stat(map_env.output_path).st_mtime_ns != mtime
+    assert os.path.exists(map_env.rotated_path())
@@ -0,0 +1,25 @@
+"""센서값이 그대로면 이미지를 다시 그리거나 쓰지 않는지 확인"""
+import os
+import time
+
+from conftest import write_mock_states
+
+
+def test_unchanged_states_skip_render_and_write(map_env):
+    map_env.map_config['gen_config']['timestamp']['enabled'] = False
+    map_env.save()
+
+    first = map_env.generate()
+    assert first['success'] and first['changed']
+    mtime = os.stat(map_env.output_path).st_mtime_ns
+
+    time.sleep(1.1)
+    second = map_env.generate()
+    assert second['success'] and not second['changed']
+    assert os.stat(map_env.output_path).st_mtime_ns == mtime
+    assert not os.path.exists(map_env.rotated_path())
+
+    write_mock_states([20.5, 22.0, 23.5, 27.0])
+    third = map_env.generate()
+    assert third['success'] and third['changed']
+    assert os.stat(map_env.output_path).st_mtime_ns != mtime